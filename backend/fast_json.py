@@ -0,0 +1,111 @@
+"""
+Fast JSON encoding and response compression for the large backend payloads
+orjson is used when installed (several times faster than the stdlib encoder
+and what FastAPI's jsonable_encoder + json.dumps do per field), with the
+stdlib as fallback. Bodies above COMPRESSION_MIN_BYTES are compressed with
+brotli or gzip, whichever the client accepts (brotli only when installed).
+Player payloads repeat the same keys and family names thousands of times
+and shrink by an order of magnitude.
+"""
+
+import gzip
+import json
+import os
+from datetime import date, datetime
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # Optional: stdlib json fallback
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 5))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 4))  # Higher qualities cost far more CPU per request
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps(data):
+    """Serialize to UTF-8 JSON bytes"""
+    if orjson:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_default).encode('utf-8')
+
+
+def loads(text):
+    if orjson:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def accepted_encodings(accept_encoding):
+    """Encodings the client accepts (q=0 excluded)"""
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        key, _, value = params.replace(" ", "").partition("=")
+        try:
+            if key == "q" and float(value) == 0:
+                continue
+        except ValueError:
+            pass
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli else ("gzip",)
+
+
+def choose_encoding(accept_encoding):
+    accepted = accepted_encodings(accept_encoding)
+    if brotli and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def encoded_body(body, request, cache=None):
+    """(body, encoding) negotiated for this request; `cache` (dict) keeps compressed
+    variants of a body that is served many times, such as a snapshot"""
+    encoding = choose_encoding(request.headers.get("accept-encoding")) if len(body) >= COMPRESSION_MIN_BYTES else None
+    if encoding is None:
+        return body, None
+    if cache is None:
+        return compress(body, encoding), encoding
+    if encoding not in cache:
+        cache[encoding] = compress(body, encoding)
+    return cache[encoding], encoding
+
+
+def json_response(request, data=None, body=None, status_code=200, headers=None, cache=None):
+    """JSON response from `data` (or pre-serialized `body`), compressed when the client accepts it"""
+    if body is None:
+        body = dumps(data)
+    content, encoding = encoded_body(body, request, cache)
+    headers = dict(headers or {})
+    if len(body) >= COMPRESSION_MIN_BYTES:
+        headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=content, status_code=status_code, media_type="application/json", headers=headers)
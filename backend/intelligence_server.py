@@ -1,22 +1,38 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, APIRouter, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, APIRouter, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, FileResponse, Response
 from motor.motor_asyncio import AsyncIOMotorClient
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import os
 import asyncio
 import aiohttp
 import uuid
-from datetime import datetime
+import time
+import hashlib
+from datetime import datetime, timedelta
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
-import json
-from pymongo import MongoClient
+import sys
+
+# Shared modules (metrics_registry.py, profiling.py, player_changes.py) live in the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server_metrics import metrics, LoopLagMonitor
+from detective_targets import check_target_batch
+from player_changes import COLD_FIELDS, username_key, join_player_data
+from request_profiler import request_profiler
+import fast_json
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Event-loop lag: wake-ups later than this are logged with the requests in flight
+LOOP_LAG_THRESHOLD = float(os.environ.get('LOOP_LAG_THRESHOLD', 0.1))
+LOOP_DEBUG = os.environ.get('LOOP_DEBUG', '0') == '1'  # asyncio debug mode names the slow callback itself
+in_flight_requests: Dict[int, tuple] = {}
+
 # MongoDB connection
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 client = AsyncIOMotorClient(mongo_url)
@@ -29,6 +45,11 @@ from contextlib import asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     asyncio.create_task(intelligence_monitor())
+    asyncio.create_task(LoopLagMonitor(metrics, in_flight_requests, threshold=LOOP_LAG_THRESHOLD).run())
+    if LOOP_DEBUG:
+        loop = asyncio.get_running_loop()
+        loop.set_debug(True)
+        loop.slow_callback_duration = LOOP_LAG_THRESHOLD
     print("[START] FastAPI Intelligence Dashboard started")
     print("[CONNECT] WebSocket endpoint: ws://localhost:8001/ws")
     print("[COMM] Connected to scraping service on port 5001")
@@ -53,6 +74,42 @@ app.add_middleware(
     max_age=3600,  # Cache preflight responses
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Per-route latency and response size; the route template keeps label cardinality bounded"""
+    request_id = id(request)
+    start = time.perf_counter()
+    in_flight_requests[request_id] = (request.url.path, start)
+    metrics.add_gauge("http_requests_in_flight", 1)
+    response = None
+    try:
+        response = await call_next(request)
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", None) or "<unmatched>"
+        metrics.observe("http_request_duration_seconds", time.perf_counter() - start,
+                        method=request.method, route=path, status=response.status_code if response else 500)
+        if response is not None:
+            size = response.headers.get("content-length")
+            if size is not None:
+                metrics.observe("http_response_size_bytes", int(size), route=path)
+        metrics.add_gauge("http_requests_in_flight", -1)
+        in_flight_requests.pop(request_id, None)
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Opt-in cProfile of single requests (see request_profiler.py); one check while disabled"""
+    if not request_profiler.active or not request_profiler.should_profile(request):
+        return await call_next(request)
+    profile = request_profiler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        name = request_profiler.finish(profile, request)
+    response.headers["X-Profile-Id"] = name
+    return response
+
 # API Router
 api_router = APIRouter(prefix="/api")
 
@@ -65,24 +122,34 @@ class ConnectionManager:
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
+        metrics.set_gauge("websocket_connections", len(self.active_connections))
         print(f"WebSocket connected. Total connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
+        metrics.set_gauge("websocket_connections", len(self.active_connections))
         print(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
 
     async def broadcast(self, message: dict):
         """Broadcast message to all connected clients"""
         if self.active_connections:
+            start = time.perf_counter()
+            metrics.add_gauge("websocket_broadcasts_pending", 1)
             disconnected = []
-            for connection in self.active_connections:
-                try:
-                    await connection.send_json(message)
-                except:
-                    disconnected.append(connection)
-            for conn in disconnected:
-                self.disconnect(conn)
+            try:
+                for connection in self.active_connections:
+                    try:
+                        await connection.send_json(message)
+                    except:
+                        disconnected.append(connection)
+                for conn in disconnected:
+                    metrics.inc("websocket_send_failures_total")
+                    self.disconnect(conn)
+            finally:
+                metrics.add_gauge("websocket_broadcasts_pending", -1)
+                metrics.observe("websocket_broadcast_duration_seconds", time.perf_counter() - start,
+                                type=message.get("type", "unknown"))
 
 manager = ConnectionManager()
 
@@ -98,6 +165,16 @@ class FamilyTargets(BaseModel):
 class DetectiveTargets(BaseModel):
     usernames: List[str]
 
+class DetectiveImport(BaseModel):
+    usernames: List[str] = []
+    text: Optional[str] = None  # Hit list, one name per line or comma separated
+    replace: bool = False  # Deactivate active targets that are not on the list
+
+class ProfilingConfig(BaseModel):
+    enabled: Optional[bool] = None  # honour the X-Profile request header
+    route: Optional[str] = None  # profile the next `count` requests to this path
+    count: int = 1
+
 class UserPreferences(BaseModel):
     user_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     favorite_families: List[str] = []
@@ -115,62 +192,102 @@ class UserPreferences(BaseModel):
     }
 
 # --- SCRAPING SERVICE COMMUNICATION ---
+SCRAPER_UNREACHABLE = 503  # "status" of the error result when the scraping service could not be reached
+
 async def call_scraping_service(endpoint: str, method: str = "GET", data: dict = None):
-    """Communicate with Flask scraping service"""
+    """Communicate with Flask scraping service; error results carry the HTTP "status" """
     url = f"{manager.scraping_service_url}{endpoint}"
     try:
         async with aiohttp.ClientSession() as session:
             if method == "GET":
                 async with session.get(url) as response:
-                    return await response.json()
+                    result = await response.json()
             elif method == "POST":
                 async with session.post(url, json=data) as response:
-                    return await response.json()
+                    result = await response.json()
+            if response.status >= 400 and isinstance(result, dict):
+                result.setdefault("status", response.status)
+            return result
     except Exception as e:
         print(f"Error calling scraping service: {e}")
-        return {"error": str(e)}
+        return {"error": str(e), "status": SCRAPER_UNREACHABLE}
+
+def raise_for_scraper_error(result):
+    """Turn an error result of call_scraping_service into an HTTP error (nothing is broadcast)"""
+    if isinstance(result, dict) and "error" in result:
+        raise HTTPException(status_code=result.get("status", 500), detail=result["error"])
 
 # --- API ENDPOINTS ---
 @api_router.get("/")
 async def root():
     return {"message": "Omerta Intelligence Dashboard API", "status": "active"}
 
+# --- PLAYER SNAPSHOT ---
+PLAYER_SNAPSHOT_TTL = 30  # Seconds; also invalidated on every list-updated notification
+player_snapshot = {"body": None, "etag": None, "variants": {}, "expires": 0.0}
+player_snapshot_lock = asyncio.Lock()
+
+def invalidate_player_snapshot():
+    player_snapshot["expires"] = 0.0
+
+def serialize_players(players, details):
+    """Parse the cached data strings, join the cold fields and build the response
+    body plus its compressed variants; returns (body, etag, variants)"""
+    parsed_players = []
+    for player in players:
+        try:
+            hot = fast_json.loads(player.get('data', '{}'))
+        except (TypeError, ValueError):
+            continue
+        parsed_players.append(join_player_data(hot, details.get(player.get('username_key'))))
+    players_json = fast_json.dumps(parsed_players)
+    body = (b'{"players": ' + players_json +
+            f', "count": {len(parsed_players)}, "source": "mongodb_snapshot", '
+            f'"timestamp": "{datetime.utcnow().isoformat()}"}}'.encode('utf-8'))
+    # Compress once per snapshot instead of once per request
+    variants = {encoding: fast_json.compress(body, encoding) for encoding in fast_json.available_encodings()}
+    return body, '"' + hashlib.md5(players_json).hexdigest() + '"', variants
+
+async def get_player_snapshot():
+    """Serialized /api/players body + ETag, rebuilt at most once per invalidation"""
+    loop = asyncio.get_running_loop()
+    if player_snapshot["body"] is not None and loop.time() < player_snapshot["expires"]:
+        metrics.inc("player_snapshot_total", result="hit")
+        return player_snapshot
+    async with player_snapshot_lock:
+        # Concurrent misses wait for the one rebuild instead of each querying
+        if player_snapshot["body"] is not None and loop.time() < player_snapshot["expires"]:
+            metrics.inc("player_snapshot_total", result="hit")
+            return player_snapshot
+        players = await db.player_cache.find({}, {"_id": 0, "username_key": 1, "data": 1}).sort("last_updated", -1).to_list(length=2000)
+        # Hot/cold join in one batched read
+        details = {
+            detail.get("username_key"): detail
+            async for detail in db.player_details.find(
+                {"username_key": {"$in": [player.get("username_key") for player in players]}},
+                {"_id": 0, "username_key": 1, **{field: 1 for field in COLD_FIELDS}}
+            )
+        }
+        # Parsing/serializing 2000 documents would stall the event loop
+        body, etag, variants = await asyncio.to_thread(serialize_players, players, details)
+        player_snapshot.update(body=body, etag=etag, variants=variants, expires=loop.time() + PLAYER_SNAPSHOT_TTL)
+        metrics.inc("player_snapshot_total", result="rebuild")
+        return player_snapshot
+
 @api_router.get("/players")
-async def get_players():
-    """Get all cached players directly from MongoDB"""
+async def get_players(request: Request):
+    """Get all cached players from the snapshot; 304 when If-None-Match matches"""
     try:
-        # Direct MongoDB access for better performance and consistency
-        mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-        client = MongoClient(mongo_url)
-        db = client[os.environ.get('DB_NAME', 'omerta_intelligence')]
-        
-        # Get all cached players
-        players = list(
-            db.player_cache
-            .find({}, {"_id": 0})
-            .sort("last_updated", -1)
-            .limit(2000)
-        )
-        
-        # Parse player data
-        parsed_players = []
-        for player in players:
-            try:
-                player_data = json.loads(player.get('data', '{}'))
-                parsed_players.append(player_data)
-            except:
-                pass
-        
-        return {
-            "players": parsed_players,
-            "count": len(parsed_players),
-            "source": "mongodb_direct",
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
+        snapshot = await get_player_snapshot()
     except Exception as e:
         return {"error": f"MongoDB direct access failed: {str(e)}", "players": [], "count": 0}
 
+    headers = {"ETag": snapshot["etag"], "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if snapshot["etag"] in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return fast_json.json_response(request, body=snapshot["body"], headers=headers, cache=snapshot["variants"])
+
 @api_router.get("/players/{player_id}")
 async def get_player_details(player_id: str):
     result = await call_scraping_service(f"/api/scraping/player/{player_id}")
@@ -185,27 +302,72 @@ async def get_player_details_by_username(username: str):
         raise HTTPException(status_code=404, detail="Player data not found")
     return result
 
+# Default lookback window per history resolution
+HISTORY_DEFAULT_WINDOW = {"raw": timedelta(days=7), "hour": timedelta(days=30), "day": timedelta(days=365)}
+
+@api_router.get("/players/by-username/{username}/history")
+async def get_player_history(
+    request: Request,
+    username: str,
+    resolution: str = Query("hour", pattern="^(raw|hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    """Stat history for one player in a single indexed range read.
+
+    raw returns the changed-field points written by the scraper,
+    hour/day return downsampled rollups (last/min/max per bucket)."""
+    end = end or datetime.utcnow()
+    start = start or end - HISTORY_DEFAULT_WINDOW[resolution]
+    # History and rollups are keyed by username_key, so every casing returns the one series
+    key = username_key(username)
+    if resolution == "raw":
+        cursor = db.player_stat_history.find(
+            {"username_key": key, "timestamp": {"$gte": start, "$lte": end}},
+            {"_id": 0}
+        ).sort("timestamp", 1)
+    else:
+        cursor = db.player_stat_rollups.find(
+            {"username_key": key, "resolution": resolution, "bucket": {"$gte": start, "$lte": end}},
+            {"_id": 0, "username": 0, "username_key": 0, "resolution": 0, "expires_at": 0}
+        ).sort("bucket", 1)
+    points = await cursor.to_list(length=None)
+
+    return fast_json.json_response(request, {
+        "username": username,
+        "resolution": resolution,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "points": points,
+        "count": len(points)
+    })
+
 @api_router.get("/intelligence/notifications")
-async def get_notifications():
-    result = await call_scraping_service("/api/scraping/notifications")
-    return result
+async def get_notifications(request: Request):
+    """Proxy to the scraper's notification pages (limit, before/after cursors, username, type)"""
+    query = f"?{request.url.query}" if request.url.query else ""
+    result = await call_scraping_service(f"/api/scraping/notifications{query}")
+    return fast_json.json_response(request, result)
 
 @api_router.get("/intelligence/tracked-players")
-async def get_tracked_players():
-    """Get tracked players directly from MongoDB"""
+async def get_tracked_players(request: Request):
+    """Get tracked players directly from MongoDB (targets + their cache entries in two reads)"""
     try:
-        # Direct MongoDB access
-        mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-        client = MongoClient(mongo_url)
-        db = client[os.environ.get('DB_NAME', 'omerta_intelligence')]
-        
-        # Get detective targets and their cached data
-        targets = list(db.detective_targets.find({"is_active": True}))
+        targets = await db.detective_targets.find(
+            {"is_active": True}, {"_id": 0, "username": 1, "player_id": 1, "added_timestamp": 1}
+        ).to_list(length=None)
+        cached = {
+            player.get("username_key"): player
+            async for player in db.player_cache.find(
+                {"username_key": {"$in": [username_key(target['username']) for target in targets]}},
+                {"_id": 0, "username_key": 1, "data": 1, "last_updated": 1}
+            )
+        }
         result = []
         
         for target in targets:
             username = target['username']
-            cached_data = db.player_cache.find_one({"username": username})
+            cached_data = cached.get(username_key(username))
             
             player_info = {
                 "username": username,
@@ -216,7 +378,7 @@ async def get_tracked_players():
             
             if cached_data:
                 try:
-                    raw = json.loads(cached_data.get('data', '{}'))
+                    raw = fast_json.loads(cached_data.get('data', '{}'))
                     inner = raw.get('data', raw) if isinstance(raw, dict) and 'data' in raw else raw
                     
                     if isinstance(inner, dict):
@@ -237,6 +399,11 @@ async def get_tracked_players():
                             player_info["wealth"] = inner.get('wealth')
                         if inner.get('plating') is not None:
                             player_info["plating"] = inner.get('plating')
+
+                        # List-level context so views don't need the full player list
+                        for field in ('rank_name', 'f_name', 'position', 'status'):
+                            if inner.get(field) is not None:
+                                player_info[field] = inner.get(field)
                             
                     player_info["last_updated"] = cached_data.get('last_updated')
                     
@@ -245,43 +412,70 @@ async def get_tracked_players():
             
             result.append(player_info)
         
-        return {
+        return fast_json.json_response(request, {
             "tracked_players": result,
             "count": len(result),
             "source": "mongodb_direct",
             "timestamp": datetime.utcnow().isoformat()
-        }
+        })
         
     except Exception as e:
         return {"error": f"MongoDB access failed: {str(e)}", "tracked_players": [], "count": 0}
 
+async def remove_targets_direct(usernames):
+    """Scraper down: deactivate the targets in Mongo directly, as before the scraper owned
+    target writes (it reloads its target set from Mongo when it starts)"""
+    error = check_target_batch(usernames)
+    if error:
+        return {"error": error, "status": 400}
+    keys = list({username_key(u) for u in usernames if isinstance(u, str) and u.strip()})
+    result = await db.detective_targets.update_many(
+        {"username_key": {"$in": keys}, "is_active": True},
+        {"$set": {"is_active": False, "removed_at": datetime.utcnow()}}
+    )
+    return {
+        "message": f"Removed {result.modified_count} detective targets",
+        "removed": result.modified_count,
+        "source": "mongodb_direct",
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 @api_router.post("/intelligence/detective/remove")
 async def remove_detective_targets(targets: DetectiveTargets):
-    """Remove detective targets"""
-    try:
-        # Direct MongoDB access
-        mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-        client = MongoClient(mongo_url)
-        db = client[os.environ.get('DB_NAME', 'omerta_intelligence')]
-        
-        removed_count = 0
-        for username in targets.usernames:
-            result = db.detective_targets.update_one(
-                {"username": username},
-                {"$set": {"is_active": False}}
-            )
-            if result.modified_count > 0:
-                removed_count += 1
-        
-        return {
-            "message": f"Removed {removed_count} detective targets",
-            "removed": removed_count,
-            "timestamp": datetime.utcnow().isoformat()
+    """Remove detective targets (one bulk write in the scraper, which also owns the in-memory
+    target set; written to Mongo directly while the scraper is unreachable)"""
+    result = await call_scraping_service("/api/scraping/detective/remove", "POST", {"usernames": targets.usernames})
+    if result.get("status") == SCRAPER_UNREACHABLE:
+        result = await remove_targets_direct(targets.usernames)
+    raise_for_scraper_error(result)
+    await manager.broadcast({
+        "type": "detective_targets_updated",
+        "data": {
+            "removed_targets": targets.usernames,
+            "timestamp": datetime.now().isoformat()
         }
-    except Exception as e:
-        return {"error": f"Failed to remove targets: {str(e)}"}
+    })
+    return result
+
+@api_router.post("/intelligence/detective/import")
+async def import_detective_targets(hit_list: DetectiveImport):
+    """Import a hit list in one request; per-username outcomes in `results`"""
+    result = await call_scraping_service("/api/scraping/detective/import", "POST", hit_list.dict())
+    raise_for_scraper_error(result)
+    await manager.broadcast({
+        "type": "detective_targets_updated",
+        "data": {
+            "imported": result.get("added", 0),
+            "removed": result.get("removed", 0),
+            "timestamp": datetime.now().isoformat()
+        }
+    })
+    return result
+
+@api_router.post("/intelligence/detective/add")
 async def add_detective_targets(targets: DetectiveTargets):
     result = await call_scraping_service("/api/scraping/detective/add", "POST", {"usernames": targets.usernames})
+    raise_for_scraper_error(result)
     await manager.broadcast({
         "type": "detective_targets_updated",
         "data": {
@@ -315,6 +509,91 @@ async def get_family_targets():
         return {"families": settings.get("families", [])}
     return {"families": []}
 
+# --- FAMILY AGGREGATES ---
+FAMILY_STATS_TTL = 60  # Seconds; also invalidated on every list-updated notification
+family_stats_cache = {"data": None, "expires": 0.0}
+
+def invalidate_family_stats():
+    family_stats_cache["expires"] = 0.0
+
+async def compute_family_stats():
+    """Aggregate player_cache per family in one pipeline on the promoted top-level fields"""
+    tracked = [username_key(t["username"]) async for t in db.detective_targets.find({"is_active": True}, {"username": 1})]
+    is_tracked = {"$in": ["$username_key", tracked]}
+    pipeline = [
+        {"$match": {"f_name": {"$nin": [None, ""]}}},
+        {"$group": {
+            "_id": {"family": "$f_name", "rank": "$rank_name"},
+            "f_id": {"$first": "$f_id"},
+            "members": {"$sum": 1},
+            "alive": {"$sum": {"$cond": [{"$ne": ["$status", 3]}, 1, 0]}},
+            "ranked": {"$sum": {"$cond": [{"$gt": ["$position", 0]}, 1, 0]}},
+            "tracked": {"$sum": {"$cond": [is_tracked, 1, 0]}},
+            "kills": {"$sum": {"$cond": [is_tracked, {"$ifNull": ["$kills", 0]}, 0]}},
+            "shots": {"$sum": {"$cond": [is_tracked, {"$ifNull": ["$shots", 0]}, 0]}},
+            "wealth": {"$sum": {"$cond": [is_tracked, {"$ifNull": ["$wealth", 0]}, 0]}},
+            "capo": {"$max": {"$cond": [{"$in": ["$f_isCapo", [True, 1, "1", "true"]]}, "$username", None]}}
+        }},
+        {"$group": {
+            "_id": "$_id.family",
+            "f_id": {"$first": "$f_id"},
+            "member_count": {"$sum": "$members"},
+            "alive_count": {"$sum": "$alive"},
+            "ranked_count": {"$sum": "$ranked"},
+            "tracked_count": {"$sum": "$tracked"},
+            "tracked_kills": {"$sum": "$kills"},
+            "tracked_shots": {"$sum": "$shots"},
+            "tracked_wealth": {"$sum": "$wealth"},
+            "capo": {"$max": "$capo"},
+            "rank_distribution": {"$push": {"k": {"$ifNull": ["$_id.rank", "Unknown"]}, "v": "$members"}}
+        }},
+        {"$project": {
+            "_id": 0,
+            "name": "$_id",
+            "f_id": 1,
+            "member_count": 1,
+            "alive_count": 1,
+            "dead_count": {"$subtract": ["$member_count", "$alive_count"]},
+            "ranked_count": 1,
+            "tracked_count": 1,
+            "tracked_kills": 1,
+            "tracked_shots": 1,
+            "tracked_wealth": 1,
+            "capo": 1,
+            "rank_distribution": {"$arrayToObject": "$rank_distribution"}
+        }},
+        {"$sort": {"member_count": -1}}
+    ]
+    return await db.player_cache.aggregate(pipeline).to_list(length=None)
+
+@api_router.get("/families/stats")
+async def get_family_stats(request: Request):
+    """Per-family member/alive/ranked counts, rank distribution, capo and tracked-member totals"""
+    now = asyncio.get_running_loop().time()
+    if family_stats_cache["data"] is None or now >= family_stats_cache["expires"]:
+        family_stats_cache["data"] = await compute_family_stats()
+        family_stats_cache["expires"] = now + FAMILY_STATS_TTL
+    families = family_stats_cache["data"]
+    return fast_json.json_response(request, {
+        "families": families,
+        "count": len(families),
+        "timestamp": datetime.utcnow().isoformat()
+    })
+
+@api_router.get("/families/{family_name}/members")
+async def get_family_members(request: Request, family_name: str, limit: int = Query(10, ge=1, le=500)):
+    """Members of one family ordered by position (unranked last), read via the f_name index"""
+    members = await db.player_cache.find(
+        {"f_name": family_name},
+        {"_id": 0, "username": 1, "user_id": 1, "rank_name": 1, "position": 1, "status": 1, "plating": 1}
+    ).to_list(length=None)
+    members.sort(key=lambda m: m.get("position") or float("inf"))
+    return fast_json.json_response(request, {
+        "family": family_name,
+        "members": members[:limit],
+        "count": len(members)
+    })
+
 @api_router.get("/status")
 async def get_system_status():
     scraping_status = await call_scraping_service("/api/scraping/status")
@@ -360,6 +639,8 @@ async def get_user_preferences(user_id: str):
 
 @api_router.post("/internal/list-updated")
 async def handle_list_update(update_data: dict):
+    invalidate_family_stats()
+    invalidate_player_snapshot()
     await manager.broadcast({
         "type": "player_list_updated",
         "data": update_data
@@ -374,9 +655,36 @@ async def handle_intelligence_notification(notification: dict):
     })
     return {"status": "broadcasted"}
 
+# --- PROFILING ---
+@api_router.get("/admin/profiling")
+async def get_profiling_status():
+    return request_profiler.get_status()
+
+@api_router.post("/admin/profiling")
+async def configure_profiling(config: ProfilingConfig):
+    request_profiler.configure(config.enabled, config.route, config.count)
+    return request_profiler.get_status()
+
+@api_router.get("/admin/profiles/{name}")
+async def download_profile(name: str, format: str = Query("prof", pattern="^(prof|text)$"),
+                           limit: int = Query(40, ge=1, le=500), sort: str = "cumulative"):
+    """Stored request profile as a .prof download or as pstats text"""
+    path = request_profiler.store.path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "text":
+        return PlainTextResponse(request_profiler.store.summary(name, limit, sort))
+    return FileResponse(path, filename=name, media_type="application/octet-stream")
+
 # Include router
 app.include_router(api_router)
 
+# --- METRICS ---
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Request latency, response sizes, event-loop lag and WebSocket gauges (Prometheus text)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # --- WEBSOCKET ENDPOINT ---
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
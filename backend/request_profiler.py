@@ -0,0 +1,78 @@
+"""
+Request profiler for the FastAPI intelligence backend
+Opt-in cProfile capture of single requests. Profiling is switched on at
+runtime (POST /api/admin/profiling) and then applies to requests carrying
+the X-Profile header or to the next requests of an armed route. Results
+are .prof files with a bounded retention count, downloadable through the
+admin endpoints. While switched off the middleware does one attribute check.
+
+cProfile follows the event loop thread, so coroutines of other requests
+running concurrently with the profiled one show up in its profile too.
+Storage (naming, retention, pstats summaries) is profiling.ProfileStore,
+shared with the scraper's cycle profiler.
+"""
+
+import cProfile
+import os
+import re
+
+from profiling import ProfileStore
+
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles'))
+PROFILE_RETENTION = int(os.environ.get('PROFILE_RETENTION', 20))
+PROFILE_HEADER = "x-profile"
+
+
+class RequestProfiler:
+    def __init__(self, directory=PROFILE_DIR, retention=PROFILE_RETENTION):
+        self.store = ProfileStore(directory, retention)
+        self.header_enabled = os.environ.get('PROFILING_ENABLED', '0') == '1'
+        self.armed_routes = {}  # route path -> remaining captures
+        self.active = self.header_enabled
+        self.profiling = False  # One profile at a time: a second enable would replace the first
+
+    def configure(self, enabled=None, route=None, count=1):
+        if enabled is not None:
+            self.header_enabled = bool(enabled)
+        if route:
+            self.armed_routes[route] = self.armed_routes.get(route, 0) + max(1, int(count))
+        self.active = self.header_enabled or bool(self.armed_routes)
+
+    def should_profile(self, request):
+        if self.profiling:
+            return False
+        if self.header_enabled and request.headers.get(PROFILE_HEADER):
+            return True
+        remaining = self.armed_routes.get(request.url.path)
+        if remaining:
+            if remaining == 1:
+                del self.armed_routes[request.url.path]
+            else:
+                self.armed_routes[request.url.path] = remaining - 1
+            self.active = self.header_enabled or bool(self.armed_routes)
+            return True
+        return False
+
+    def start(self):
+        profile = cProfile.Profile()
+        profile.enable()
+        self.profiling = True
+        return profile
+
+    def finish(self, profile, request):
+        profile.disable()
+        self.profiling = False
+        route = re.sub(r'[^\w\-]+', '_', request.url.path).strip('_') or 'root'
+        return self.store.save(profile, f"{request.method.lower()}-{route}")
+
+    def get_status(self):
+        return {
+            "header_enabled": self.header_enabled,
+            "header": PROFILE_HEADER,
+            "armed_routes": dict(self.armed_routes),
+            "retention": self.store.retention,
+            "profiles": self.store.list()
+        }
+
+
+request_profiler = RequestProfiler()
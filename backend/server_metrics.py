@@ -0,0 +1,59 @@
+"""
+Server metrics for the FastAPI intelligence backend
+Per-route latency and response size histograms, WebSocket gauges and an
+event-loop lag monitor, rendered in Prometheus text format at /metrics.
+The registry is the shared metrics_registry.MetricsRegistry (repository root).
+"""
+
+import asyncio
+import logging
+
+from metrics_registry import MetricsRegistry
+
+logger = logging.getLogger("server_metrics")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic sleep wakes up; a late wake-up means a
+    coroutine held the loop. Lags above the threshold are logged together
+    with the requests that were in flight at that moment."""
+
+    def __init__(self, metrics, in_flight, interval=0.5, threshold=0.1):
+        self.metrics = metrics
+        self.in_flight = in_flight  # request id -> (route, start) maintained by the middleware
+        self.interval = interval
+        self.threshold = threshold
+        self.max_lag = 0.0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.metrics.observe("event_loop_lag_seconds", lag)
+            self.metrics.set_gauge("event_loop_lag_last_seconds", round(lag, 6))
+            self.max_lag = max(self.max_lag, lag)
+            self.metrics.set_gauge("event_loop_lag_max_seconds", round(self.max_lag, 6))
+            if lag >= self.threshold:
+                routes = sorted({route for route, _ in self.in_flight.values()}) or ["<background>"]
+                for route in routes:
+                    self.metrics.inc("event_loop_blocked_total", route=route)
+                logger.warning(f"[LOOP] Event loop blocked for {lag * 1000:.0f}ms; in flight: {', '.join(routes)}")
+
+
+metrics = MetricsRegistry(buckets=LATENCY_BUCKETS)
+metrics.describe("http_request_duration_seconds", "histogram", "Request latency per route", LATENCY_BUCKETS)
+metrics.describe("http_response_size_bytes", "histogram", "Response body size per route", SIZE_BUCKETS)
+metrics.describe("http_requests_in_flight", "gauge", "Requests currently being handled")
+metrics.describe("event_loop_lag_seconds", "histogram", "Delay of a periodic wake-up (time the loop was blocked)", LAG_BUCKETS)
+metrics.describe("event_loop_blocked_total", "counter", "Lag events above the threshold, by route in flight")
+metrics.describe("websocket_connections", "gauge", "Open WebSocket connections")
+metrics.describe("websocket_broadcast_duration_seconds", "histogram", "Time to send one message to all clients", LATENCY_BUCKETS)
+metrics.describe("websocket_broadcasts_pending", "gauge", "Broadcasts started but not finished (send queue depth)")
+metrics.describe("websocket_send_failures_total", "counter", "Sends that failed and dropped the connection")
+metrics.describe("player_snapshot_total", "counter", "/api/players snapshot hits and rebuilds")
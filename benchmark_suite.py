@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite for the Omerta Intelligence backend and scraper hot paths
+Micro-benchmarks call scraper functions directly (list parsing,
+get_user_id_by_username, cache_player_data merge, stdlib json vs. orjson
+encoding of the player payload); macro-benchmarks run against a local
+mongod and a backend started on a spare port (/api/players, tracked
+players, WebSocket broadcast, list ingestion, and per Accept-Encoding the
+bytes on the wire and backend CPU per request). Every run seeds the
+same dataset (seed_data.py), writes machine-readable JSON and compares the
+medians against a stored baseline.
+
+    python benchmark_suite.py --save-baseline          # record benchmark_baseline.json
+    python benchmark_suite.py                          # compare; exit code 1 on regression
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import gzip
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import aiohttp
+import psutil
+import requests
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+from pipeline_benchmark import start_stub_backend
+from seed_data import seed
+from synthetic_data import SyntheticWorld
+
+try:
+    import orjson
+except ImportError:  # Optional: the orjson encoding benchmark is skipped without it
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Optional: br is only benchmarked when installed
+    brotli = None
+
+# Load environment variables
+load_dotenv()
+
+BENCH_DB_NAME = os.environ.get('BENCH_DB_NAME', 'omerta_benchmark_suite')
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+
+
+def summarize(samples):
+    """Timing statistics in milliseconds"""
+    ordered = sorted(samples)
+    return {
+        "iterations": len(ordered),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3)
+    }
+
+
+def measure(function, iterations, warmup=1):
+    for _ in range(warmup):
+        function()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def compare(results, baseline, tolerance):
+    """Per-benchmark median ratio against the baseline; returns (report, regressions)"""
+    report = {}
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("median_ms"):
+            continue
+        ratio = result["median_ms"] / base["median_ms"]
+        report[name] = {"baseline_ms": base["median_ms"], "current_ms": result["median_ms"], "ratio": round(ratio, 3)}
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return report, regressions
+
+
+class BenchmarkSuite:
+    def __init__(self, players, seed_value, iterations, backend_port):
+        self.players = players
+        self.seed_value = seed_value
+        self.iterations = iterations
+        self.backend_port = backend_port
+        self.backend_url = f"http://127.0.0.1:{backend_port}"
+        self.mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+        self.client = MongoClient(self.mongo_url)
+        self.db = self.client[BENCH_DB_NAME]
+        self.results = {}
+        self.backend_process = None
+        self.stub_backend = None
+        self.scraper = None
+        self.world = None
+
+    # --- Setup ---
+    def setup(self):
+        print(f"🔧 Seeding {self.players} players into {BENCH_DB_NAME} (seed {self.seed_value})")
+        self.client.drop_database(BENCH_DB_NAME)
+        seed(self.db, self.players, self.seed_value, targets=200, days=7, churn=0.01,
+             history_players=1000, batch_size=5000)
+        self.world = SyntheticWorld(self.players, seed=self.seed_value)
+
+        # Scraper notifications go to a stub; the real backend is measured separately
+        self.stub_backend = start_stub_backend()
+        os.environ['DB_NAME'] = BENCH_DB_NAME
+        os.environ['BACKEND_URL'] = f"http://127.0.0.1:{self.stub_backend.server_address[1]}"
+        os.environ['SCRAPER_DISTRIBUTED'] = '0'
+        import mongodb_scraping_service_windows as scraper
+        self.scraper = scraper
+
+    def start_backend(self):
+        env = {**os.environ, "DB_NAME": BENCH_DB_NAME, "MONGO_URL": self.mongo_url}
+        self.backend_process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "intelligence_server:app",
+             "--host", "127.0.0.1", "--port", str(self.backend_port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL
+        )
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                if requests.get(f"{self.backend_url}/api/", timeout=1).status_code == 200:
+                    print(f"🔧 Backend ready on {self.backend_url}")
+                    return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise RuntimeError("Backend did not start within 30 seconds")
+
+    def teardown(self):
+        if self.backend_process:
+            self.backend_process.terminate()
+            self.backend_process.wait(timeout=10)
+        if self.stub_backend:
+            self.stub_backend.shutdown()
+        self.client.drop_database(BENCH_DB_NAME)
+
+    # --- Micro-benchmarks ---
+    def bench_parse_user_list(self):
+        text = self.world.users_payload()
+        scraper = self.scraper
+
+        def run():
+            for user in scraper.parse_user_list(text, "BENCH"):
+                scraper.list_entry_to_data(user)
+        return measure(run, self.iterations)
+
+    def bench_get_user_id_by_username(self):
+        data_manager = self.scraper.data_manager
+        data_manager.full_user_list = self.world.players
+        # Spread over the list so late entries count as much as early ones
+        usernames = self.world.usernames()[::max(1, self.players // 100)]
+
+        def run():
+            for username in usernames:
+                data_manager.get_user_id_by_username(username)
+        return measure(run, self.iterations)
+
+    def bench_cache_player_data_unchanged(self):
+        data_manager = self.scraper.data_manager
+        entries = [self.scraper.list_entry_to_data(user) for user in self.world.players[:500]]
+
+        def run():
+            for user_id, username, list_data in entries:
+                data_manager.cache_player_data(user_id, username, list_data)
+        return measure(run, self.iterations)
+
+    def bench_cache_player_data_changed(self):
+        data_manager = self.scraper.data_manager
+        usernames = self.world.usernames()[:500]
+
+        def run():
+            for username in usernames:
+                detail = self.world.details[username]
+                detail["bullets_shot"]["total"] += 1
+                data_manager.cache_player_data(detail["id"], username, dict(detail))
+            data_manager.flush_notifications()
+            data_manager.flush_history()
+        return measure(run, self.iterations)
+
+    def player_payload(self):
+        """The /api/players body as the backend builds it: every cached data string parsed"""
+        players = [json.loads(doc["data"]) for doc in self.db.player_cache.find({}, {"data": 1}).limit(2000)]
+        return {"players": players, "count": len(players), "timestamp": datetime.utcnow().isoformat()}
+
+    def bench_encode_players_json(self):
+        payload = self.player_payload()
+        result = measure(lambda: json.dumps(payload, default=str).encode('utf-8'), self.iterations)
+        body = json.dumps(payload, default=str).encode('utf-8')
+        result["bytes"] = len(body)
+        result["gzip_bytes"] = len(gzip.compress(body, compresslevel=5))
+        if brotli:
+            result["br_bytes"] = len(brotli.compress(body, quality=4))
+        return result
+
+    def bench_encode_players_orjson(self):
+        if not orjson:
+            raise RuntimeError("orjson is not installed")
+        payload = self.player_payload()
+        result = measure(lambda: orjson.dumps(payload, default=str), self.iterations)
+        result["bytes"] = len(orjson.dumps(payload, default=str))
+        return result
+
+    # --- Macro-benchmarks ---
+    def bench_api_players(self):
+        session = requests.Session()
+        return measure(lambda: session.get(f"{self.backend_url}/api/players", timeout=30).raise_for_status(),
+                       self.iterations)
+
+    def bench_api_tracked_players(self):
+        session = requests.Session()
+        return measure(
+            lambda: session.get(f"{self.backend_url}/api/intelligence/tracked-players", timeout=30).raise_for_status(),
+            self.iterations
+        )
+
+    def bench_api_encoding(self, path, encoding):
+        """Latency, bytes on the wire and backend CPU per request for one Accept-Encoding"""
+        session = requests.Session()
+        headers = {"Accept-Encoding": encoding}
+        wire_bytes = []
+
+        def fetch():
+            response = session.get(f"{self.backend_url}{path}", headers=headers, stream=True, timeout=30)
+            response.raise_for_status()
+            wire_bytes.append(len(response.raw.read(decode_content=False)))
+
+        backend = psutil.Process(self.backend_process.pid)
+        fetch()  # warmup (also builds the player snapshot)
+        cpu_before = sum(backend.cpu_times()[:2])
+        result = measure(fetch, self.iterations, warmup=0)
+        cpu = sum(backend.cpu_times()[:2]) - cpu_before
+        result["encoding"] = encoding
+        result["wire_bytes"] = wire_bytes[-1]
+        result["cpu_ms_per_request"] = round(cpu / self.iterations * 1000, 3)
+        return result
+
+    def bench_websocket_broadcast(self, clients=50):
+        """Time from POST /api/internal/list-updated until every WebSocket client has the message"""
+        async def run_all():
+            samples = []
+            async with aiohttp.ClientSession() as session:
+                sockets = [await session.ws_connect(f"{self.backend_url.replace('http', 'ws')}/ws") for _ in range(clients)]
+                for ws in sockets:
+                    await ws.receive_json(timeout=10)  # connection greeting
+
+                async def wait_for_update(ws):
+                    while True:
+                        message = await ws.receive_json(timeout=10)
+                        if message.get("type") == "player_list_updated":
+                            return
+
+                for _ in range(self.iterations + 1):
+                    start = time.perf_counter()
+                    waiters = [asyncio.create_task(wait_for_update(ws)) for ws in sockets]
+                    async with session.post(f"{self.backend_url}/api/internal/list-updated",
+                                            json={"type": "benchmark", "count": 0}) as response:
+                        await response.read()
+                    await asyncio.gather(*waiters)
+                    samples.append(time.perf_counter() - start)
+                for ws in sockets:
+                    await ws.close()
+            return samples[1:]  # first round is warmup
+
+        result = summarize(asyncio.run(run_all()))
+        result["clients"] = clients
+        return result
+
+    def bench_list_ingestion(self):
+        scraper = self.scraper
+        data_manager = scraper.data_manager
+
+        def run():
+            self.world.tick(0.01)
+            text = self.world.users_payload()
+            player_list = scraper.parse_user_list(text, "BENCH")
+            scraper.ingest_user_list(data_manager, player_list, text, "BENCH")
+        return measure(run, max(1, self.iterations // 5))
+
+    # --- Runner ---
+    def run_all(self, only=None):
+        micro = [
+            ("parse_user_list", self.bench_parse_user_list),
+            ("get_user_id_by_username", self.bench_get_user_id_by_username),
+            ("cache_player_data_unchanged", self.bench_cache_player_data_unchanged),
+            ("cache_player_data_changed", self.bench_cache_player_data_changed),
+            ("encode_players_json", self.bench_encode_players_json),
+            ("encode_players_orjson", self.bench_encode_players_orjson)
+        ]
+        macro = [
+            ("api_players", self.bench_api_players),
+            ("api_tracked_players", self.bench_api_tracked_players),
+            ("api_players_identity", lambda: self.bench_api_encoding("/api/players", "identity")),
+            ("api_players_gzip", lambda: self.bench_api_encoding("/api/players", "gzip")),
+            ("api_tracked_players_identity", lambda: self.bench_api_encoding("/api/intelligence/tracked-players", "identity")),
+            ("api_tracked_players_gzip", lambda: self.bench_api_encoding("/api/intelligence/tracked-players", "gzip")),
+            ("api_family_stats_identity", lambda: self.bench_api_encoding("/api/families/stats", "identity")),
+            ("api_family_stats_gzip", lambda: self.bench_api_encoding("/api/families/stats", "gzip")),
+            *([("api_players_br", lambda: self.bench_api_encoding("/api/players", "br"))] if brotli else []),
+            ("websocket_broadcast", self.bench_websocket_broadcast),
+            ("list_ingestion", self.bench_list_ingestion)
+        ]
+        benchmarks = (micro if only != "macro" else []) + (macro if only != "micro" else [])
+
+        self.setup()
+        try:
+            if only != "micro":
+                self.start_backend()
+            for name, bench in benchmarks:
+                try:
+                    self.results[name] = bench()
+                    result = self.results[name]
+                    extra = "".join(f"   {key} {result[key]}" for key in ("bytes", "gzip_bytes", "br_bytes",
+                                                                          "wire_bytes", "cpu_ms_per_request")
+                                    if key in result)
+                    print(f"⏱️  {name:<30} median {result['median_ms']:>10.2f} ms   "
+                          f"p95 {result['p95_ms']:>10.2f} ms{extra}")
+                except Exception as e:
+                    print(f"❌ Benchmark '{name}' crashed: {e}")
+        finally:
+            self.teardown()
+        return self.results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro and macro benchmarks with baseline comparison")
+    parser.add_argument("--players", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--only", choices=["micro", "macro"])
+    parser.add_argument("--backend-port", type=int, default=8099)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default="benchmark_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median slowdown before failing")
+    args = parser.parse_args()
+
+    suite = BenchmarkSuite(args.players, args.seed, args.iterations, args.backend_port)
+    results = suite.run_all(args.only)
+    output = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "players": args.players,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "python": platform.python_version(),
+            "platform": platform.platform()
+        },
+        "results": results
+    }
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("players") != args.players:
+            print(f"⚠️  Baseline was recorded with {baseline.get('meta', {}).get('players')} players")
+        output["comparison"], regressions = compare(results, baseline, args.tolerance)
+        for name, row in output["comparison"].items():
+            marker = "❌" if name in regressions else "✅"
+            print(f"{marker} {name:<30} {row['baseline_ms']:>10.2f} → {row['current_ms']:>10.2f} ms  (x{row['ratio']})")
+        output["regressions"] = regressions
+
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"📌 Baseline saved to {args.baseline}")
+
+    sys.exit(1 if regressions else 0)
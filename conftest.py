@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Shared pytest fixtures: MongoDB tests need a server at MONGO_URL and are
+skipped without one (or without pymongo).
+"""
+
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def mongo_client():
+    pymongo = pytest.importorskip("pymongo")
+    client = pymongo.MongoClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'),
+                                 serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except pymongo.errors.PyMongoError:
+        pytest.skip("MongoDB not available")
+    yield client
+    client.close()
@@ -11,20 +11,30 @@ import json
 import threading
 from flask import Flask, request, jsonify
 import os
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 from dotenv import load_dotenv
 
+from player_changes import username_key
+from detective_targets import write_target_updates, check_target_batch, import_usernames
+from scraper_logging import get_logger
+
 # Load environment variables
 load_dotenv()
 
+# --- LOGGING ---
+db_log = get_logger("db")
+targets_log = get_logger("targets")
+settings_log = get_logger("settings")
+startup_log = get_logger("startup")
+
 # --- MongoDB SETUP ---
 def init_mongodb():
     mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
     client = MongoClient(mongo_url)
     db = client[os.environ.get('DB_NAME', 'omerta_intelligence')]
     
-    print(f"[DB] Connected to MongoDB: {mongo_url}")
-    print(f"[DB] Database: {db.name}")
+    db_log.info(f"Connected to MongoDB: {mongo_url}")
+    db_log.info(f"Database: {db.name}")
     
     return db
 
@@ -41,35 +51,20 @@ class ContainerIntelligenceManager:
         try:
             targets = list(self.db.detective_targets.find({"is_active": True}))
             self.detective_targets = {target['username'] for target in targets}
-            print(f"[DB] Loaded {len(self.detective_targets)} detective targets")
+            db_log.info(f"Loaded {len(self.detective_targets)} detective targets")
         except Exception as e:
-            print(f"[ERROR] Loading detective targets: {e}")
+            targets_log.error(f"Loading detective targets: {e}")
 
-    def add_detective_targets(self, usernames):
-        """Add new detective targets to MongoDB"""
-        added_count = 0
-        for username in usernames:
-            try:
-                result = self.db.detective_targets.update_one(
-                    {"username": username},
-                    {
-                        "$set": {
-                            "username": username,
-                            "player_id": f"player_{username.lower()}",
-                            "added_timestamp": datetime.utcnow(),
-                            "is_active": True
-                        }
-                    },
-                    upsert=True
-                )
-                if result.upserted_id or result.modified_count > 0:
-                    self.detective_targets.add(username)
-                    added_count += 1
-                    print(f"[TARGET] Added detective target: {username}")
-            except Exception as e:
-                print(f"[ERROR] Adding detective target {username}: {e}")
-        
-        return {"added": added_count, "total": len(self.detective_targets)}
+    def update_detective_targets(self, add=(), remove=(), replace=False):
+        """Add and remove detective targets with one bulk_write; same outcomes as
+        the Windows service (see detective_targets.write_target_updates)"""
+        tracked = {username_key(target): target for target in self.detective_targets}
+        result = write_target_updates(self.db.detective_targets, tracked, add, remove, replace)
+        self.detective_targets.difference_update(result["untrack"])
+        self.detective_targets.update(result["track"])
+        targets_log.info(f"Detective targets: +{result['added']} -{result['removed']} ({len(self.detective_targets)} tracked)")
+        return {"added": result["added"], "removed": result["removed"],
+                "total": len(self.detective_targets), "results": result["results"]}
 
     def ensure_sample_data(self):
         """Ensure we have sample data with REAL values for demonstration"""
@@ -144,23 +139,32 @@ class ContainerIntelligenceManager:
             }
         ]
         
+        operations = []
         for player in sample_players:
-            try:
-                doc = {
-                    "username": player["username"],
-                    "user_id": player["user_id"],
-                    "data": json.dumps(player["data"], default=str),
-                    "last_updated": datetime.utcnow(),
-                    "priority": 1
-                }
-                
-                self.db.player_cache.update_one(
-                    {"username": player["username"]},
-                    {"$set": doc},
-                    upsert=True
-                )
-            except Exception as e:
-                print(f"[SAMPLE] Error creating sample data for {player['username']}: {e}")
+            doc = {
+                "username": player["username"],
+                "username_key": username_key(player["username"]),
+                "user_id": player["user_id"],
+                "data": json.dumps(player["data"], default=str),
+                "last_updated": datetime.utcnow(),
+                "priority": 1,
+                # Top-level copies used by family aggregates
+                "f_name": player["data"].get("f_name"),
+                "rank_name": player["data"].get("rank_name"),
+                "position": player["data"].get("position"),
+                "status": player["data"].get("status"),
+                "plating": player["data"].get("plating"),
+                "kills": player["data"].get("kills"),
+                "shots": player["data"]["bullets_shot"].get("total"),
+                "wealth": player["data"].get("wealth")
+            }
+            operations.append(UpdateOne({"username_key": doc["username_key"]}, {"$set": doc}, upsert=True))
+
+        # One round trip for all sample players; use seed_data.py for large datasets
+        try:
+            self.db.player_cache.bulk_write(operations, ordered=False)
+        except Exception as e:
+            db_log.error(f"Error creating sample data: {e}")
 
     def get_detective_targets(self):
         """Get all detective targets with cached data"""
@@ -205,13 +209,13 @@ class ContainerIntelligenceManager:
                         player_info["last_updated"] = cached_data.get('last_updated')
                         
                     except Exception as e:
-                        print(f"[TARGETS] Parse error for {username}: {e}")
+                        targets_log.warning(f"Parse error for {username}: {e}")
                 
                 result.append(player_info)
             
             return result
         except Exception as e:
-            print(f"[ERROR] Getting detective targets: {e}")
+            targets_log.error(f"Getting detective targets: {e}")
             return []
 
     def get_cached_players_count(self):
@@ -292,20 +296,68 @@ def add_detective_targets():
         data = request.get_json()
         usernames = data.get('usernames', [])
         
-        if not usernames:
-            return jsonify({"error": "No usernames provided"}), 400
+        error = check_target_batch(usernames)
+        if error:
+            return jsonify({"error": error}), 400
             
-        result = data_manager.add_detective_targets(usernames)
+        result = data_manager.update_detective_targets(add=usernames)
         return jsonify({
             "message": f"Added {result['added']} detective targets (demo mode)",
             "added": result['added'],
             "total_targets": result['total'],
+            "results": result['results'],
             "note": "Real data updates require Windows scraping service",
             "timestamp": datetime.utcnow().isoformat()
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/scraping/detective/remove', methods=['POST'])
+def remove_detective_targets():
+    """Deactivate detective targets with one bulk_write"""
+    try:
+        data = request.get_json() or {}
+        usernames = data.get('usernames', [])
+
+        error = check_target_batch(usernames)
+        if error:
+            return jsonify({"error": error}), 400
+
+        result = data_manager.update_detective_targets(remove=usernames)
+        return jsonify({
+            "message": f"Removed {result['removed']} detective targets (demo mode)",
+            "removed": result['removed'],
+            "total_targets": result['total'],
+            "results": result['results'],
+            "timestamp": datetime.utcnow().isoformat()
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/scraping/detective/import', methods=['POST'])
+def import_detective_targets():
+    """Import a hit list: {"usernames": [...]} and/or {"text": "one per line or comma separated"};
+    "replace": true deactivates active targets that are not on the list"""
+    try:
+        data = request.get_json() or {}
+        usernames = import_usernames(data)
+
+        error = check_target_batch(usernames)
+        if error:
+            return jsonify({"error": error}), 400
+
+        result = data_manager.update_detective_targets(add=usernames, replace=bool(data.get('replace')))
+        return jsonify({
+            "message": f"Imported {len(usernames)} names: {result['added']} added, {result['removed']} removed (demo mode)",
+            "added": result['added'],
+            "removed": result['removed'],
+            "total_targets": result['total'],
+            "results": result['results'],
+            "timestamp": datetime.utcnow().isoformat()
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/scraping/player-username/<username>')
 def get_player_by_username(username):
     """Get player details by username"""
@@ -375,7 +427,8 @@ def scraping_settings():
                     "list_worker_interval": 3600,  # 1 hour
                     "detail_worker_interval": 900,  # 15 minutes
                     "parallel_tabs": 5,
-                    "cloudflare_timeout": 60
+                    "cloudflare_timeout": 60,
+                    "detail_force_refresh": 3600  # 1 hour
                 }
                 return jsonify({
                     "settings": default_settings,
@@ -396,6 +449,7 @@ def scraping_settings():
             settings['detail_worker_interval'] = max(10, settings.get('detail_worker_interval', 900))
             settings['parallel_tabs'] = max(1, min(10, settings.get('parallel_tabs', 5)))
             settings['cloudflare_timeout'] = max(10, min(300, settings.get('cloudflare_timeout', 60)))
+            settings['detail_force_refresh'] = max(60, settings.get('detail_force_refresh', 3600))
             
             # Save to database
             data_manager.db.scraping_settings.update_one(
@@ -410,7 +464,7 @@ def scraping_settings():
                 upsert=True
             )
             
-            print(f"[SETTINGS] Updated: {settings}")
+            settings_log.info(f"Updated: {settings}")
             
             return jsonify({
                 "message": "Settings updated successfully",
@@ -424,27 +478,24 @@ def scraping_settings():
 
 if __name__ == '__main__':
     try:
-        print("\n" + "="*70)
-        print("🎯 OMERTA INTELLIGENCE SCRAPING SERVICE - CONTAINER DEMO MODE")
-        print("⚠️  CLOUDFLARE PROTECTION ACTIVE - REAL SCRAPING REQUIRES WINDOWS")
-        print("🔧 USERNAME-FIRST ARCHITECTURE WITH SAMPLE DATA")
-        print("="*70)
-        
-        print(f"\n🚨 IMPORTANT CLOUDFLARE ISSUE:")
-        print(f"   • Barafranca.com blocks automated requests (HTTP 403)")
-        print(f"   • Container can't run visible Chrome browser")
-        print(f"   • For real scraping: use mongodb_scraping_service_windows.py on Windows")
-        print(f"   • This service provides sample data for UI testing")
-        
-        print(f"\n✅ Demo Services Starting:")
-        print(f"📊 API Status: http://127.0.0.1:5001/api/scraping/status")
-        print(f"🐛 Debug Info: http://127.0.0.1:5001/api/scraping/debug-info")
-        print(f"💾 Sample Players: {data_manager.get_cached_players_count()}")
-        print(f"🎯 Detective Targets: {len(data_manager.detective_targets)}")
+        startup_log.info("🎯 OMERTA INTELLIGENCE SCRAPING SERVICE - CONTAINER DEMO MODE")
+        startup_log.info("⚠️  CLOUDFLARE PROTECTION ACTIVE - REAL SCRAPING REQUIRES WINDOWS")
+        startup_log.info("🔧 USERNAME-FIRST ARCHITECTURE WITH SAMPLE DATA")
+
+        startup_log.warning("🚨 IMPORTANT CLOUDFLARE ISSUE: Barafranca.com blocks automated requests (HTTP 403) "
+                            "and the container can't run a visible Chrome browser")
+        startup_log.warning("For real scraping: use mongodb_scraping_service_windows.py on Windows; "
+                            "this service provides sample data for UI testing")
+
+        startup_log.info("✅ Demo Services Starting:")
+        startup_log.info("📊 API Status: http://127.0.0.1:5001/api/scraping/status")
+        startup_log.info("🐛 Debug Info: http://127.0.0.1:5001/api/scraping/debug-info")
+        startup_log.info(f"💾 Sample Players: {data_manager.get_cached_players_count()}")
+        startup_log.info(f"🎯 Detective Targets: {len(data_manager.detective_targets)}")
         
         app.run(debug=False, use_reloader=False, port=5001, host='127.0.0.1')
 
     except KeyboardInterrupt:
-        print("\n👋 Container scraping service stopped.")
+        startup_log.info("👋 Container scraping service stopped.")
     except Exception as e:
-        print(f"\n[ERROR] Fatal error: {e}")
\ No newline at end of file
+        startup_log.error(f"Fatal error: {e}")
\ No newline at end of file
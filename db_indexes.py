@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+DB Indexes - the declared index set of every collection the services query
+Each index below exists for a concrete query (named in the comment next to
+it); test_query_plans.py runs explain() on those queries and fails when one
+of them falls back to a collection scan or an in-memory sort. ensure_indexes
+is idempotent: indexes whose key pattern already exists (under any name) are
+left alone, conflicts are reported instead of raised.
+"""
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+INDEXES = {
+    "player_cache": [
+        # Stored casing stays unique (cache_player_data writes by it)
+        IndexModel([("username", ASCENDING)], name="username_1", unique=True),
+        # cache_player_data / by-username endpoints / tracked players (case-insensitive)
+        IndexModel([("username_key", ASCENDING)], name="username_key_1", unique=True),
+        # /api/scraping/player/<user_id>
+        IndexModel([("user_id", ASCENDING)], name="user_id_1"),
+        # /api/players and /api/scraping/players snapshots: newest 2000
+        IndexModel([("last_updated", DESCENDING)], name="last_updated_-1"),
+        # /api/families/{name}/members
+        IndexModel([("f_name", ASCENDING), ("position", ASCENDING)], name="f_name_1_position_1"),
+    ],
+    "player_details": [
+        # Hot/cold join ($in on username_key)
+        IndexModel([("username_key", ASCENDING)], name="username_key_1", unique=True),
+    ],
+    "detective_targets": [
+        # Add/remove upserts (case-insensitive)
+        IndexModel([("username_key", ASCENDING)], name="username_key_1", unique=True),
+        # load_detective_targets / tracked players / family stats
+        IndexModel([("is_active", ASCENDING)], name="is_active_1"),
+    ],
+    "intelligence_notifications": [
+        # Keyset pages, newest first (the TTL index on timestamp is created by the
+        # scraper's init_notification_retention, its retention is configurable)
+        IndexModel([("timestamp", DESCENDING), ("_id", DESCENDING)], name="timestamp_-1__id_-1"),
+        # ?username= and ?type= filtered pages
+        IndexModel([("username_key", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+                   name="username_key_1_timestamp_-1__id_-1"),
+        IndexModel([("notification_type", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+                   name="notification_type_1_timestamp_-1__id_-1"),
+    ],
+    "scraping_settings": [
+        # get_settings: {"type": "intervals"}
+        IndexModel([("type", ASCENDING)], name="type_1"),
+    ],
+    "app_settings": [
+        # Family targets: {"setting_type": "family_targets"}
+        IndexModel([("setting_type", ASCENDING)], name="setting_type_1"),
+    ],
+    "user_preferences": [
+        # /api/preferences/{user_id}
+        IndexModel([("user_id", ASCENDING)], name="user_id_1"),
+    ],
+    "player_stat_history": [
+        # Raw history range read per player (TTL lives on the time-series collection itself)
+        IndexModel([("username_key", ASCENDING), ("timestamp", ASCENDING)], name="username_key_1_timestamp_1"),
+    ],
+    "player_stat_rollups": [
+        # Rollup upserts and hour/day range reads per player (case-insensitive)
+        IndexModel([("username_key", ASCENDING), ("resolution", ASCENDING), ("bucket", ASCENDING)],
+                   name="username_key_1_resolution_1_bucket_1", unique=True),
+        # Per-document expiry of rollup buckets
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_1", expireAfterSeconds=0),
+    ],
+}
+
+
+def init_history_collections(db, raw_retention_days, log=print):
+    """Create the stat history store: a time-series collection for raw points
+    (plain collection + TTL index on MongoDB < 5.0). The query indexes of the
+    history and rollup collections are part of the declared set above. Points of
+    a collection created with metaField username (before username_key) carry
+    username_key as a plain field; the ones without it age out with the TTL."""
+    raw_retention = raw_retention_days * 86400
+    try:
+        db.create_collection(
+            "player_stat_history",
+            timeseries={"timeField": "timestamp", "metaField": "username_key", "granularity": "minutes"},
+            expireAfterSeconds=raw_retention
+        )
+        log("Created time-series collection player_stat_history")
+    except CollectionInvalid:
+        pass  # Already exists
+    except OperationFailure as e:
+        log(f"Time-series not supported ({e}), using regular collection for history")
+        try:
+            db.player_stat_history.create_index("timestamp", expireAfterSeconds=raw_retention)
+        except Exception as e:
+            if "already exists" not in str(e):
+                log(f"Stat history TTL index issue: {e}")
+
+
+# Collections whose documents carry username_key = lower(username)
+USERNAME_KEY_COLLECTIONS = ("player_cache", "player_details", "detective_targets", "intelligence_notifications",
+                            "player_stat_rollups")
+
+
+def backfill_username_keys(db):
+    """Set username_key on documents written before it existed (server-side, one
+    update per collection); returns the number of documents updated"""
+    updated = 0
+    for collection_name in USERNAME_KEY_COLLECTIONS:
+        result = db[collection_name].update_many(
+            {"username_key": {"$exists": False}, "username": {"$type": "string"}},
+            [{"$set": {"username_key": {"$toLower": "$username"}}}]
+        )
+        updated += result.modified_count
+    return updated
+
+
+# Which case-duplicate survives when username_key is made unique (best first, all descending)
+USERNAME_KEY_RANKING = {
+    "player_cache": ("last_updated",),
+    "player_details": ("last_updated",),
+    "detective_targets": ("is_active", "added_timestamp"),
+    "player_stat_rollups": ("samples",),
+}
+# Fields that are unique together with username_key (default: username_key alone)
+USERNAME_KEY_SCOPE = {
+    "player_stat_rollups": ("resolution", "bucket"),
+}
+
+
+def duplicate_ids(docs, fields):
+    """_ids of every document but the best ranked one (highest `fields`, missing values last)"""
+    ranked = sorted(docs, key=lambda doc: tuple((doc.get(field) is not None, doc.get(field)) for field in fields),
+                    reverse=True)
+    return [doc["_id"] for doc in ranked[1:]]
+
+
+def dedupe_username_keys(db, log=print):
+    """Delete case-duplicate documents (same username_key, plus USERNAME_KEY_SCOPE) so
+    the unique username_key indexes can be built, keeping the best ranked one per key
+    (most recently updated; the rollup bucket with the most samples). Collections
+    that already have the index are skipped. Returns the number of documents deleted."""
+    deleted = 0
+    for collection_name, fields in USERNAME_KEY_RANKING.items():
+        collection = db[collection_name]
+        scope = USERNAME_KEY_SCOPE.get(collection_name, ())
+        unique_key = {"username_key": 1, **{field: 1 for field in scope}}
+        if any(dict(index["key"]) == unique_key for index in collection.list_indexes()):
+            continue
+        groups = collection.aggregate([
+            {"$group": {"_id": {field: f"${field}" for field in unique_key}, "count": {"$sum": 1},
+                        "docs": {"$push": {"_id": "$_id", **{field: f"${field}" for field in fields}}}}},
+            {"$match": {"count": {"$gt": 1}}}
+        ], allowDiskUse=True)
+        drop = [doc_id for group in groups for doc_id in duplicate_ids(group["docs"], fields)]
+        if drop:
+            collection.delete_many({"_id": {"$in": drop}})
+            log(f"Deleted {len(drop)} case-duplicate documents from {collection_name}")
+            deleted += len(drop)
+    return deleted
+
+
+def ensure_indexes(db, log=print, collections=None):
+    """Create missing declared indexes; returns {"created": [...], "conflicts": [...]}"""
+    created, conflicts = [], []
+    for collection_name, models in INDEXES.items():
+        if collections and collection_name not in collections:
+            continue
+        collection = db[collection_name]
+        existing = {tuple(index["key"].items()): index for index in collection.list_indexes()}
+        missing = []
+        for model in models:
+            spec = model.document
+            index = existing.get(tuple(spec["key"].items()))
+            if index is None:
+                missing.append(model)
+            elif bool(index.get("unique")) != bool(spec.get("unique")):
+                conflicts.append(f"{collection_name}.{index['name']}: unique={bool(index.get('unique'))}, "
+                                 f"declared unique={bool(spec.get('unique'))}")
+        if not missing:
+            continue
+        try:
+            created.extend(f"{collection_name}.{name}" for name in collection.create_indexes(missing))
+        except Exception:
+            # One bad index (e.g. duplicate usernames under a unique key) must not block the others
+            for model in missing:
+                try:
+                    created.append(f"{collection_name}.{collection.create_indexes([model])[0]}")
+                except Exception as e:
+                    conflicts.append(f"{collection_name}.{model.document['name']}: {e}")
+    for conflict in conflicts:
+        log(f"Index conflict {conflict}")
+    return {"created": created, "conflicts": conflicts}
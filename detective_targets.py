@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Detective Targets - detective_targets writes shared by the scraping services
+Validates add/remove/import batches and applies them to the detective_targets
+collection with a single bulk_write. The in-memory target set stays with the
+service: write_target_updates() returns which names to track and untrack, the
+caller applies that under its own lock.
+"""
+
+from datetime import datetime
+
+from pymongo import UpdateOne, UpdateMany
+from pymongo.errors import BulkWriteError
+
+from player_changes import username_key
+from scraper_logging import get_logger
+
+targets_log = get_logger("targets")
+
+TARGET_BATCH_MAX = 2000  # Max usernames per add/remove/import request
+
+
+def check_target_batch(usernames):
+    """Error message for an unusable add/remove/import batch, None when it is fine"""
+    if not isinstance(usernames, list):
+        return "usernames must be a list"
+    if not usernames:
+        return "No usernames provided"
+    if len(usernames) > TARGET_BATCH_MAX:
+        return f"At most {TARGET_BATCH_MAX} usernames per request"
+    return None
+
+
+def import_usernames(data):
+    """Hit list import body: {"usernames": [...]} and/or {"text": "one per line or comma separated"}.
+    A non-list usernames value is returned as is, so check_target_batch can reject it."""
+    usernames = data.get('usernames') or []
+    text = data.get('text') or ''
+    if not isinstance(usernames, list):
+        return usernames
+    return usernames + [name for name in text.replace(',', '\n').split('\n') if name.strip()]
+
+
+def write_target_updates(collection, tracked, add=(), remove=(), replace=False):
+    """Add and remove detective targets with a single bulk_write. `tracked` is
+    {username_key: username} of the targets the caller currently has active;
+    `replace` also deactivates every active target that is not in `add`.
+
+    Returns {"results", "added", "removed", "track", "untrack"}: per-username
+    outcomes (added, reactivated, already_tracked, removed, not_tracked,
+    duplicate, invalid, error) and the names to add to / drop from the caller's
+    set. Removals are taken from the write result; only when its modified count
+    is ambiguous are the rows stamped with this call's removed_at read back."""
+    results = {}
+    now = datetime.utcnow()
+    operations, pending = [], []  # pending[i] = (username, action) of operations[i]
+    seen = set()
+    for username, action in [(u, "add") for u in add] + [(u, "remove") for u in remove]:
+        if not isinstance(username, str) or not username.strip():
+            results[str(username)] = "invalid"
+            continue
+        username = username.strip()
+        key = username_key(username)
+        if key in seen:
+            results.setdefault(username, "duplicate")
+            continue
+        seen.add(key)
+        if action == "add":
+            if key in tracked:
+                results[username] = "already_tracked"
+                continue
+            operations.append(UpdateOne(
+                {"username_key": key},
+                {"$set": {
+                    "username": username,
+                    "username_key": key,
+                    "player_id": f"player_{username.lower()}",
+                    "added_timestamp": now,
+                    "is_active": True
+                }},
+                upsert=True
+            ))
+        else:
+            operations.append(UpdateOne({"username_key": key, "is_active": True},
+                                        {"$set": {"is_active": False, "removed_at": now}}))
+        pending.append((username, action))
+
+    keep = {username_key(u) for u, outcome in results.items() if outcome == "already_tracked"}
+    keep |= {username_key(u) for u, action in pending if action == "add"}
+    if replace:
+        operations.append(UpdateMany({"is_active": True, "username_key": {"$nin": list(keep)}},
+                                     {"$set": {"is_active": False, "removed_at": now}}))
+        pending.append((None, "replace"))
+
+    failed, upserted, modified = set(), set(), 0
+    if operations:
+        try:
+            result = collection.bulk_write(operations, ordered=False)
+            upserted, modified = set(result.upserted_ids), result.modified_count
+        except BulkWriteError as e:
+            # Unordered: everything except the reported indexes was applied
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            upserted = {item["index"] for item in e.details.get("upserted", [])}
+            modified = e.details.get("nModified", 0)
+            targets_log.error(f"{len(failed)} of {len(operations)} target writes failed")
+        except Exception as e:
+            failed = set(range(len(operations)))
+            targets_log.error(f"Updating detective targets: {e}")
+
+    applied = [(index, username, action) for index, (username, action) in enumerate(pending) if index not in failed]
+    # Every applied non-upsert add modifies its row (added_timestamp), the rest are deactivations
+    deactivated_count = modified - sum(1 for index, _, action in applied
+                                       if action == "add" and index not in upserted)
+    remove_keys = {username_key(username) for _, username, action in applied if action == "remove"}
+    replaced = any(action == "replace" for _, _, action in applied)
+    if deactivated_count <= 0:
+        deactivated = {}
+    elif not replaced and deactivated_count == len(remove_keys):
+        deactivated = {key: None for key in remove_keys}
+    else:
+        deactivated = {
+            doc["username_key"]: doc.get("username")
+            for doc in collection.find({"removed_at": now, "is_active": False},
+                                       {"username_key": 1, "username": 1})
+        }
+
+    track, untrack = [], []
+    for index, (username, action) in enumerate(pending):
+        if index in failed:
+            if username:
+                results[username] = "error"
+        elif action == "add":
+            results[username] = "added" if index in upserted else "reactivated"
+            track.append(username)
+        elif action == "remove":
+            key = username_key(username)
+            results[username] = "removed" if key in deactivated else "not_tracked"
+            if key in tracked:
+                untrack.append(tracked[key])
+        else:
+            for key, name in deactivated.items():
+                if key not in remove_keys:
+                    results[tracked.get(key) or name] = "removed"
+            untrack.extend(current for key, current in tracked.items() if key not in keep)
+
+    return {
+        "results": results,
+        "added": sum(1 for outcome in results.values() if outcome in ("added", "reactivated")),
+        "removed": sum(1 for outcome in results.values() if outcome == "removed"),
+        "track": track,
+        "untrack": untrack
+    }
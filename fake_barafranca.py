@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Fake Barafranca API - local stand-in for the users and user endpoints
+Serves /index.php?module=API&action=users and &action=user&name=<username>
+from a seeded synthetic population that evolves in the background, and can
+inject Cloudflare-style interstitials, 403s and latency. Point the scraper
+at it to develop and benchmark on Linux without network access:
+
+    python fake_barafranca.py --size 20000 --challenge-rate 0.05 --latency 0.2
+    set "BARAFRANCA_BASE_URL=http://127.0.0.1:5050"
+    set "SCRAPER_FETCHER=http"
+    python mongodb_scraping_service_windows.py
+"""
+
+import argparse
+import random
+import secrets
+import threading
+import time
+from datetime import datetime
+
+from flask import Flask, request, jsonify, Response
+
+from synthetic_data import SyntheticWorld
+
+CHALLENGE_PAGE = """<!DOCTYPE html>
+<html><head><title>Just a moment...</title></head>
+<body><h1>Checking your browser before accessing barafranca.com</h1>
+<p>This process is automatic. Your browser will redirect to your requested content shortly.</p>
+<p>DDoS protection by Cloudflare</p></body></html>"""
+
+FORBIDDEN_PAGE = """<!DOCTYPE html>
+<html><head><title>Attention Required! | Cloudflare</title></head>
+<body><h1>Sorry, you have been blocked</h1></body></html>"""
+
+
+class FakeBarafranca:
+    """Population, challenge settings and request counters of the fake API"""
+
+    def __init__(self, size, seed=0, tick_interval=30, churn=0.01, challenge_rate=0.0,
+                 forbidden_rate=0.0, clearance_ttl=1800, latency=0.0, jitter=0.0):
+        self.world = SyntheticWorld(size, seed=seed)
+        self.rng = random.Random(seed + 1)
+        self.tick_interval = tick_interval
+        self.churn = churn
+        self.challenge_rate = challenge_rate
+        self.forbidden_rate = forbidden_rate
+        self.clearance_ttl = clearance_ttl
+        self.latency = latency
+        self.jitter = jitter
+        self.clearances = {}  # cf_clearance token -> expiry timestamp
+        self.lock = threading.Lock()
+        self.users_body = self.world.users_payload()
+        self.stats = {"requests": 0, "users": 0, "user": 0, "not_found": 0,
+                      "challenges": 0, "forbidden": 0, "ticks": 0, "changed": 0}
+        self.started_at = datetime.utcnow()
+
+    # --- Evolution ---
+    def start(self):
+        if self.tick_interval > 0:
+            threading.Thread(target=self._tick_loop, name="fake-barafranca-tick", daemon=True).start()
+
+    def _tick_loop(self):
+        while True:
+            time.sleep(self.tick_interval)
+            with self.lock:
+                changed = self.world.tick(self.churn)
+                self.users_body = self.world.users_payload()
+                self.stats["ticks"] += 1
+                self.stats["changed"] += len(changed)
+
+    # --- Challenge simulation ---
+    def has_clearance(self, token):
+        expires = self.clearances.get(token) if token else None
+        return expires is not None and expires > time.time()
+
+    def gate(self, token):
+        """Response to send instead of the API body, or None to let the request through"""
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+        if self.forbidden_rate and self.rng.random() < self.forbidden_rate:
+            self.stats["forbidden"] += 1
+            return Response(FORBIDDEN_PAGE, status=403, mimetype='text/html')
+        if self.challenge_rate and not self.has_clearance(token) and self.rng.random() < self.challenge_rate:
+            # Like Cloudflare: the interstitial hands out a clearance cookie valid for later requests
+            self.stats["challenges"] += 1
+            clearance = secrets.token_hex(16)
+            self.clearances[clearance] = time.time() + self.clearance_ttl
+            response = Response(CHALLENGE_PAGE, status=503, mimetype='text/html')
+            response.set_cookie('cf_clearance', clearance, max_age=self.clearance_ttl)
+            return response
+        return None
+
+    def get_status(self):
+        with self.lock:
+            return {
+                **self.stats,
+                "population": len(self.world.players),
+                "clearances": sum(1 for expires in self.clearances.values() if expires > time.time()),
+                "started_at": self.started_at.isoformat(),
+                "timestamp": datetime.utcnow().isoformat()
+            }
+
+
+def create_app(fake):
+    app = Flask(__name__)
+
+    @app.route('/index.php')
+    def api():
+        if request.args.get('module') != 'API':
+            return Response("Not found", status=404)
+
+        with fake.lock:
+            fake.stats["requests"] += 1
+        blocked = fake.gate(request.cookies.get('cf_clearance'))
+        if blocked is not None:
+            return blocked
+
+        action = request.args.get('action')
+        if action == 'users':
+            with fake.lock:
+                fake.stats["users"] += 1
+                body = fake.users_body
+            return Response(body, mimetype='application/json')
+
+        if action == 'user':
+            username = request.args.get('name', '')
+            with fake.lock:
+                fake.stats["user"] += 1
+                body = fake.world.user_payload(username)
+                if body is None:
+                    fake.stats["not_found"] += 1
+            if body is None:
+                return jsonify({"error": "User not found"}), 404
+            return Response(body, mimetype='application/json')
+
+        return jsonify({"error": f"Unknown action: {action}"}), 400
+
+    @app.route('/fake/status')
+    def status():
+        return jsonify(fake.get_status())
+
+    @app.route('/fake/config', methods=['POST'])
+    def config():
+        """Adjust challenge rates and latency while running"""
+        data = request.get_json() or {}
+        for key in ('challenge_rate', 'forbidden_rate', 'latency', 'jitter', 'churn'):
+            if key in data:
+                setattr(fake, key, max(0.0, float(data[key])))
+        return jsonify({key: getattr(fake, key) for key in
+                        ('challenge_rate', 'forbidden_rate', 'latency', 'jitter', 'churn')})
+
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local fake of the Barafranca users/user API")
+    parser.add_argument("--size", type=int, default=10000, help="number of synthetic players")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tick-interval", type=float, default=30, help="seconds between population changes (0 = static)")
+    parser.add_argument("--churn", type=float, default=0.01, help="fraction of players changed per tick")
+    parser.add_argument("--challenge-rate", type=float, default=0.0, help="chance of a Cloudflare interstitial without clearance")
+    parser.add_argument("--forbidden-rate", type=float, default=0.0, help="chance of a 403 block page")
+    parser.add_argument("--clearance-ttl", type=int, default=1800, help="seconds a passed challenge stays valid")
+    parser.add_argument("--latency", type=float, default=0.0, help="response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=5050)
+    args = parser.parse_args()
+
+    fake = FakeBarafranca(args.size, seed=args.seed, tick_interval=args.tick_interval, churn=args.churn,
+                          challenge_rate=args.challenge_rate, forbidden_rate=args.forbidden_rate,
+                          clearance_ttl=args.clearance_ttl, latency=args.latency, jitter=args.jitter)
+    fake.start()
+    print(f"[FAKE] {args.size} players, tick every {args.tick_interval}s, "
+          f"challenges {args.challenge_rate:.0%}, 403s {args.forbidden_rate:.0%}, latency {args.latency}s")
+    print(f"[FAKE] Users API: http://127.0.0.1:{args.port}/index.php?module=API&action=users")
+    print(f"[FAKE] Status:    http://127.0.0.1:{args.port}/fake/status")
+    create_app(fake).run(debug=False, use_reloader=False, threaded=True, port=args.port, host='127.0.0.1')
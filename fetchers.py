@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Fetchers - pluggable fetch layer under the list and detail workers
+A fetcher turns a Barafranca API URL into the response body text (or None
+when the page could not be fetched). The Windows service uses a browser
+fetcher; the recorder saves every response to disk and the replay fetcher
+serves saved responses, optionally with synthetic latency, so ingestion can
+run and be benchmarked without Chrome, Cloudflare or barafranca.com. The
+plain HTTP fetcher talks to the local fake API (fake_barafranca.py).
+"""
+
+import hashlib
+import json
+import os
+import random
+import time
+from datetime import datetime
+
+import requests
+
+from scraper_logging import get_logger
+
+fetch_log = get_logger("fetch")
+record_log = get_logger("record")
+
+CLOUDFLARE_MARKERS = ("cloudflare", "just a moment", "checking your browser")
+
+
+def recording_path(directory, url):
+    """File holding the recorded response for a URL"""
+    return os.path.join(directory, hashlib.sha1(url.encode('utf-8')).hexdigest() + ".json")
+
+
+class Fetcher:
+    """Base fetcher: fetch(url) returns the body text or None"""
+    request_delay = (0, 0)  # (min, max) seconds workers pause between detail requests
+
+    def fetch(self, url, worker_name, timeout=60):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class RecordingFetcher(Fetcher):
+    """Wraps another fetcher and saves every successful response to a directory"""
+
+    def __init__(self, inner, directory):
+        self.inner = inner
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def fetch(self, url, worker_name, timeout=60):
+        body = self.inner.fetch(url, worker_name, timeout)
+        if body is not None:
+            try:
+                with open(recording_path(self.directory, url), 'w', encoding='utf-8') as f:
+                    json.dump({"url": url, "recorded_at": datetime.utcnow().isoformat(), "body": body}, f)
+            except OSError as e:
+                record_log.warning(f"Could not save {url}: {e}", worker=worker_name)
+        return body
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayFetcher(Fetcher):
+    """Serves recorded responses from a directory and/or an in-memory {url: body} map.
+
+    latency/jitter add a synthetic per-request delay in seconds; unknown URLs
+    return None just like a failed browser fetch.
+    """
+
+    def __init__(self, directory=None, responses=None, latency=0.0, jitter=0.0):
+        self.directory = directory
+        self.responses = responses if responses is not None else {}
+        self.latency = latency
+        self.jitter = jitter
+        self.hits = 0
+        self.misses = 0
+
+    def fetch(self, url, worker_name, timeout=60):
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+        body = self.responses.get(url)
+        if body is None and self.directory:
+            try:
+                with open(recording_path(self.directory, url), encoding='utf-8') as f:
+                    body = json.load(f).get("body")
+            except (OSError, ValueError):
+                body = None
+
+        if body is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return body
+
+
+class HttpFetcher(Fetcher):
+    """Plain requests session that waits out Cloudflare-style interstitials and 403s.
+
+    Only useful against the local fake API; the real site needs the browser.
+    """
+
+    def __init__(self, retry_delay=1.0):
+        self.retry_delay = retry_delay
+        self.session = requests.Session()
+        self.challenges = 0
+        self.forbidden = 0
+
+    def fetch(self, url, worker_name, timeout=60):
+        deadline = time.time() + timeout
+        while True:
+            try:
+                response = self.session.get(url, timeout=max(1, deadline - time.time()))
+                lowered = response.text[:2000].lower()
+                if response.status_code == 403:
+                    self.forbidden += 1
+                elif any(marker in lowered for marker in CLOUDFLARE_MARKERS):
+                    self.challenges += 1
+                elif response.ok:
+                    return response.text.strip()
+                else:
+                    fetch_log.warning(f"HTTP {response.status_code} for {url}", worker=worker_name)
+            except requests.RequestException as e:
+                fetch_log.warning(f"Fetch error: {e}", worker=worker_name)
+
+            if time.time() + self.retry_delay >= deadline:
+                fetch_log.error(f"Giving up on {url} after {timeout}s", worker=worker_name)
+                return None
+            time.sleep(self.retry_delay)
+
+    def close(self):
+        self.session.close()
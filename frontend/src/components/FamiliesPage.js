@@ -2,72 +2,49 @@ import React, { useState, useMemo, useEffect } from 'react';
 import { useIntelligence } from '../hooks/useIntelligence';
 
 const FamiliesPage = () => {
-  const { players, targetFamilies, setFamilyTargets, getPlayerDetails, trackedPlayers } = useIntelligence();
+  const { targetFamilies, setFamilyTargets, trackedPlayers, apiCall, lastUpdate } = useIntelligence();
   const [selectedFamilies, setSelectedFamilies] = useState(new Set(targetFamilies));
   const [expandedFamilies, setExpandedFamilies] = useState(new Set());
-  const [detectiveTargets, setDetectiveTargets] = useState([]);
-  const [playerDetails, setPlayerDetails] = useState({});
+  const [familyStats, setFamilyStats] = useState([]);
+  const [familyMembers, setFamilyMembers] = useState({});
   const [loadingDetails, setLoadingDetails] = useState(false);
 
-  // Load detective targets and their details
+  // Detective targets come with rank/family/position from the tracked-players endpoint
+  const detectiveTargets = trackedPlayers;
+
+  // Load precomputed family aggregates (refreshed whenever the scraper reports an update)
   useEffect(() => {
-    const loadDetectiveData = async () => {
+    const loadFamilyStats = async () => {
       setLoadingDetails(true);
-      
-      // Use tracked players directly from the intelligence hook
-      if (trackedPlayers.length > 0) {
-        setDetectiveTargets(trackedPlayers);
-        
-        // Load additional details for each tracked player
-        const details = {};
-        for (const tracked of trackedPlayers) {
-          const playerDetail = players.find(p => p.id === tracked.player_id || p.uname === tracked.username);
-          if (playerDetail) {
-            try {
-              const detail = await getPlayerDetails(playerDetail.id);
-              if (detail) {
-                details[playerDetail.id] = detail;
-              }
-            } catch (error) {
-              console.error(`Failed to load details for ${tracked.username}:`, error);
-            }
-          }
-        }
-        setPlayerDetails(details);
+      try {
+        const data = await apiCall('/families/stats');
+        setFamilyStats(data.families || []);
+        setFamilyMembers({});
+      } catch (error) {
+        console.error('Failed to load family stats:', error);
       }
-      
       setLoadingDetails(false);
     };
 
-    loadDetectiveData();
-  }, [trackedPlayers, players, getPlayerDetails]);
+    loadFamilyStats();
+  }, [apiCall, lastUpdate]);
 
-  // Group players by family
+  // Family aggregates keyed by name, already sorted by member count on the server
   const familiesByName = useMemo(() => {
-    const grouped = {};
-    
-    players.forEach(player => {
-      const familyName = player.f_name || 'Independent';
-      if (!grouped[familyName]) {
-        grouped[familyName] = [];
-      }
-      grouped[familyName].push(player);
-    });
+    return familyStats.reduce((acc, family) => {
+      acc[family.name] = family;
+      return acc;
+    }, {});
+  }, [familyStats]);
 
-    // Sort families by member count
-    const sortedFamilies = Object.entries(grouped)
-      .sort((a, b) => b[1].length - a[1].length)
-      .reduce((acc, [name, members]) => {
-        acc[name] = members.sort((a, b) => {
-          const aPos = a.position === 0 ? 999999 : a.position;
-          const bPos = b.position === 0 ? 999999 : b.position;
-          return aPos - bPos;
-        });
-        return acc;
-      }, {});
-
-    return sortedFamilies;
-  }, [players]);
+  const loadFamilyMembers = async (familyName) => {
+    try {
+      const data = await apiCall(`/families/${encodeURIComponent(familyName)}/members?limit=10`);
+      setFamilyMembers(prev => ({ ...prev, [familyName]: data }));
+    } catch (error) {
+      console.error(`Failed to load members for ${familyName}:`, error);
+    }
+  };
 
   const handleFamilyToggle = (familyName) => {
     if (familyName === 'Independent') return; // Skip independents
@@ -87,6 +64,9 @@ const FamiliesPage = () => {
       newExpanded.delete(familyName);
     } else {
       newExpanded.add(familyName);
+      if (!familyMembers[familyName]) {
+        loadFamilyMembers(familyName);
+      }
     }
     setExpandedFamilies(newExpanded);
   };
@@ -102,7 +82,7 @@ const FamiliesPage = () => {
   };
 
   const handleSelectAll = () => {
-    const allFamilies = Object.keys(familiesByName).filter(name => name !== 'Independent');
+    const allFamilies = familyStats.map(family => family.name);
     setSelectedFamilies(new Set(allFamilies));
   };
 
@@ -110,12 +90,13 @@ const FamiliesPage = () => {
     setSelectedFamilies(new Set());
   };
 
-  const getFamilyStats = (members) => {
-    const alive = members.filter(m => m.status !== 3).length;
-    const dead = members.filter(m => m.status === 3).length;
-    const ranked = members.filter(m => m.position > 0).length;
-    
-    return { alive, dead, ranked, total: members.length };
+  const getFamilyStats = (family) => {
+    return {
+      alive: family.alive_count,
+      dead: family.dead_count,
+      ranked: family.ranked_count,
+      total: family.member_count
+    };
   };
 
   const formatNumber = (num) => {
@@ -176,17 +157,17 @@ const FamiliesPage = () => {
               </div>
               <div className="bg-emerald-900/30 backdrop-blur-sm rounded-lg border border-emerald-500/30 p-4">
                 <div className="text-2xl font-bold text-white">
-                  {Object.entries(familiesByName)
-                    .filter(([name]) => selectedFamilies.has(name))
-                    .reduce((sum, [, members]) => sum + members.filter(m => m.status !== 3).length, 0)}
+                  {familyStats
+                    .filter(family => selectedFamilies.has(family.name))
+                    .reduce((sum, family) => sum + family.alive_count, 0)}
                 </div>
                 <div className="text-sm text-emerald-200">Active Targets</div>
               </div>
               <div className="bg-orange-900/30 backdrop-blur-sm rounded-lg border border-orange-500/30 p-4">
                 <div className="text-2xl font-bold text-white">
-                  {Object.entries(familiesByName)
-                    .filter(([name]) => selectedFamilies.has(name))
-                    .reduce((sum, [, members]) => sum + members.filter(m => m.position > 0).length, 0)}
+                  {familyStats
+                    .filter(family => selectedFamilies.has(family.name))
+                    .reduce((sum, family) => sum + family.ranked_count, 0)}
                 </div>
                 <div className="text-sm text-orange-200">Ranked Targets</div>
               </div>
@@ -201,10 +182,10 @@ const FamiliesPage = () => {
               
               <div className="max-h-96 overflow-y-auto">
                 <div className="space-y-2 p-4">
-                  {Object.entries(familiesByName).map(([familyName, members]) => {
-                    if (familyName === 'Independent') return null;
-                    
-                    const stats = getFamilyStats(members);
+                  {familyStats.map(family => {
+                    const familyName = family.name;
+                    const stats = getFamilyStats(family);
+                    const members = familyMembers[familyName]?.members || [];
                     const isSelected = selectedFamilies.has(familyName);
                     const isExpanded = expandedFamilies.has(familyName);
                     
@@ -250,6 +231,12 @@ const FamiliesPage = () => {
                                     <span className="mr-1">🏆</span>
                                     {stats.ranked}
                                   </span>
+                                  {family.capo && (
+                                    <span className="flex items-center text-purple-300">
+                                      <span className="mr-1">👑</span>
+                                      {family.capo}
+                                    </span>
+                                  )}
                                 </div>
                               </div>
                             </div>
@@ -277,11 +264,11 @@ const FamiliesPage = () => {
                         {isExpanded && (
                           <div className="border-t border-slate-600/30 p-4 bg-slate-800/20">
                             <div className="grid grid-cols-1 md:grid-cols-2 gap-3">
-                              {members.slice(0, 10).map(member => {
+                              {members.map(member => {
                                 const status = getPlayerStatus(member);
                                 return (
                                   <div
-                                    key={member.id}
+                                    key={member.username}
                                     className={`p-3 rounded-lg border ${
                                       member.status === 3 
                                         ? 'bg-red-900/20 border-red-500/30' 
@@ -290,7 +277,7 @@ const FamiliesPage = () => {
                                   >
                                     <div className="flex justify-between items-start">
                                       <div>
-                                        <div className="font-medium text-white">{member.uname}</div>
+                                        <div className="font-medium text-white">{member.username}</div>
                                         <div className="text-xs text-slate-400 mt-1">
                                           {member.rank_name} • 
                                           {member.position === 0 ? ' Unranked' : ` #${member.position}`}
@@ -303,9 +290,9 @@ const FamiliesPage = () => {
                                   </div>
                                 );
                               })}
-                              {members.length > 10 && (
+                              {stats.total > members.length && (
                                 <div className="col-span-full text-center text-slate-400 text-sm py-2">
-                                  +{members.length - 10} more members...
+                                  +{stats.total - members.length} more members...
                                 </div>
                               )}
                             </div>
@@ -355,8 +342,7 @@ const FamiliesPage = () => {
                 ) : (
                   <div className="p-4 space-y-3">
                     {detectiveTargets.map((target) => {
-                      const playerFromList = players.find(p => p.id === target.player_id || p.uname === target.username);
-                      const status = playerFromList ? getPlayerStatus(playerFromList) : { text: 'UNKNOWN', class: 'text-gray-400', bg: 'bg-gray-900/20' };
+                      const status = target.status !== undefined ? getPlayerStatus(target) : { text: 'UNKNOWN', class: 'text-gray-400', bg: 'bg-gray-900/20' };
                       
                       return (
                         <div
@@ -367,7 +353,7 @@ const FamiliesPage = () => {
                             <div>
                               <div className="font-semibold text-white text-lg">{target.username}</div>
                               <div className="text-sm text-slate-400">
-                                {playerFromList?.rank_name || 'Unknown Rank'} • {playerFromList?.f_name || 'Unknown Family'}
+                                {target.rank_name || 'Unknown Rank'} • {target.f_name || 'Unknown Family'}
                               </div>
                             </div>
                             <span className={`px-2 py-1 rounded text-xs font-medium ${status.class} ${status.bg}`}>
@@ -400,7 +386,7 @@ const FamiliesPage = () => {
                               </div>
                               <div>
                                 <span className="text-slate-400">Rank:</span>
-                                <span className="text-yellow-400 ml-2">#{playerFromList?.position || 'Unranked'}</span>
+                                <span className="text-yellow-400 ml-2">#{target.position || 'Unranked'}</span>
                               </div>
                             </div>
                           </div>
@@ -426,7 +412,7 @@ const FamiliesPage = () => {
                         {family}
                       </span>
                       <span className="text-slate-300 text-sm">
-                        {familiesByName[family]?.filter(m => m.status !== 3).length || 0} active
+                        {familiesByName[family]?.alive_count || 0} active
                       </span>
                     </div>
                   ))}
@@ -663,13 +663,16 @@ const PlayersPage = () => {
               <div className="text-slate-500 text-sm">Intelligence updates will appear here</div>
             </div>
           ) : (
-            notifications.map((notification, index) => (
+            notifications.map((notification, index) => {
+              // Stored notifications use notification_type, real-time ones use type
+              const type = notification.type || notification.notification_type;
+              return (
               <div
                 key={index}
                 className={`p-4 rounded-lg border transition-all duration-200 hover:scale-[1.02] ${
-                  notification.type === 'plating_drop' ? 'bg-red-900/30 border-red-500/50 shadow-red-500/20' :
-                  notification.type === 'kill_update' ? 'bg-orange-900/30 border-orange-500/50 shadow-orange-500/20' :
-                  notification.type === 'shot_update' ? 'bg-yellow-900/30 border-yellow-500/50 shadow-yellow-500/20' :
+                  type === 'plating_drop' || type === 'death' ? 'bg-red-900/30 border-red-500/50 shadow-red-500/20' :
+                  type === 'kill_update' ? 'bg-orange-900/30 border-orange-500/50 shadow-orange-500/20' :
+                  type === 'shot_update' ? 'bg-yellow-900/30 border-yellow-500/50 shadow-yellow-500/20' :
                   'bg-slate-700/30 border-slate-600/50'
                 } shadow-lg`}
               >
@@ -681,7 +684,8 @@ const PlayersPage = () => {
                   {new Date(notification.timestamp).toLocaleTimeString()}
                 </div>
               </div>
-            ))
+              );
+            })
           )}
         </div>
       </div>
@@ -9,7 +9,8 @@ const SettingsPage = () => {
     list_worker_interval: 3600, // 1 hour in seconds
     detail_worker_interval: 900, // 15 minutes in seconds
     parallel_tabs: 5,
-    cloudflare_timeout: 60
+    cloudflare_timeout: 60,
+    detail_force_refresh: 3600 // 1 hour in seconds
   });
   
   const [loading, setLoading] = useState(false);
@@ -162,6 +163,29 @@ const SettingsPage = () => {
               </span>
             </div>
           </div>
+
+          {/* Forced Detail Refresh */}
+          <div className="mb-6">
+            <label className="block text-sm font-semibold text-slate-300 mb-2">
+              Forced Detail Refresh
+            </label>
+            <p className="text-xs text-slate-400 mb-3">
+              Targets whose list version did not change are skipped until this much time has passed
+            </p>
+            
+            <div className="flex items-center gap-4">
+              <input
+                type="number"
+                value={settings.detail_force_refresh ?? 3600}
+                onChange={(e) => setSettings(prev => ({...prev, detail_force_refresh: parseInt(e.target.value) || 3600}))}
+                className="px-3 py-2 bg-slate-600 text-white rounded border border-slate-500 focus:border-blue-400 w-24"
+                min="60"
+              />
+              <span className="text-slate-400 text-sm">
+                seconds ({formatTime(settings.detail_force_refresh ?? 3600)})
+              </span>
+            </div>
+          </div>
         </div>
 
         {/* Performance Settings */}
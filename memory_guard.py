@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Memory Guard - memory telemetry and guardrails for the long-running scraper
+Tracks the RSS of the scraper process and of its child Chrome/chromedriver
+processes, keeps a bounded set of tracemalloc snapshots that can be diffed
+through the API, and enforces thresholds: Chrome above its limit makes the
+workers recycle their drivers, the process above its limit trims the data
+manager's in-memory caches. psutil is optional; without it only the
+process's own RSS is available (and no Chrome numbers).
+"""
+
+import gc
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+from scraper_logging import get_logger
+
+try:
+    import psutil
+except ImportError:  # Optional: child (Chrome) RSS needs psutil
+    psutil = None
+
+memory_log = get_logger("memory")
+
+MEMORY_CHECK_INTERVAL = int(os.environ.get('SCRAPER_MEMORY_CHECK_INTERVAL', 60))
+PROCESS_RSS_LIMIT_MB = int(os.environ.get('SCRAPER_RSS_LIMIT_MB', 0))  # 0 = geen limiet
+CHROME_RSS_LIMIT_MB = int(os.environ.get('SCRAPER_CHROME_RSS_LIMIT_MB', 0))  # 0 = geen limiet
+TRACEMALLOC_FRAMES = int(os.environ.get('SCRAPER_TRACEMALLOC_FRAMES', 10))
+MAX_SNAPSHOTS = 5
+MB = 1024 * 1024
+
+
+def process_rss():
+    """RSS of this process in bytes (None if it can't be determined)"""
+    if psutil:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def children_rss():
+    """Summed RSS of all child processes (Chrome, chromedriver) and their count"""
+    if not psutil:
+        return None, 0
+    total = 0
+    children = psutil.Process().children(recursive=True)
+    for child in children:
+        try:
+            total += child.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return total, len(children)
+
+
+class MemoryGuard:
+    """Samples memory, serves tracemalloc snapshots and applies the RSS thresholds"""
+
+    def __init__(self, metrics=None, trim_callback=None, process_limit_mb=PROCESS_RSS_LIMIT_MB,
+                 chrome_limit_mb=CHROME_RSS_LIMIT_MB, interval=MEMORY_CHECK_INTERVAL):
+        self.metrics = metrics
+        self.trim_callback = trim_callback
+        self.process_limit = process_limit_mb * MB
+        self.chrome_limit = chrome_limit_mb * MB
+        self.interval = interval
+        self.recycle_generation = 0  # Workers recycle their drivers when this moves
+        self.snapshots = []  # [(id, taken_at, snapshot)]
+        self.next_snapshot_id = 1
+        self.last_sample = {}
+        self.actions = []  # Recent guardrail actions
+        self.lock = threading.Lock()
+        self.thread = None
+        if os.environ.get('SCRAPER_TRACEMALLOC', '0') == '1':
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="memory-guard", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                memory_log.error(f"Check failed: {e}")
+
+    # --- Sampling and thresholds ---
+    def sample(self):
+        rss = process_rss()
+        chrome_rss, chrome_processes = children_rss()
+        sample = {
+            "process_rss": rss,
+            "chrome_rss": chrome_rss,
+            "chrome_processes": chrome_processes,
+            "tracemalloc_current": tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None,
+            "gc_objects": len(gc.get_objects()),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        self.last_sample = sample
+        if self.metrics:
+            for key in ("process_rss", "chrome_rss", "tracemalloc_current"):
+                if sample[key] is not None:
+                    self.metrics.set_gauge(f"scraper_{key}_bytes", sample[key])
+            self.metrics.set_gauge("scraper_chrome_processes", chrome_processes)
+        return sample
+
+    def check(self):
+        """Sample memory and apply the thresholds; returns the sample"""
+        sample = self.sample()
+        if self.chrome_limit and sample["chrome_rss"] and sample["chrome_rss"] > self.chrome_limit:
+            self.request_recycle(f"Chrome RSS {sample['chrome_rss'] // MB}MB > {self.chrome_limit // MB}MB")
+        if self.process_limit and sample["process_rss"] and sample["process_rss"] > self.process_limit:
+            self.trim(f"Process RSS {sample['process_rss'] // MB}MB > {self.process_limit // MB}MB")
+        return sample
+
+    def record_action(self, action, reason):
+        entry = {"action": action, "reason": reason, "timestamp": datetime.utcnow().isoformat()}
+        with self.lock:
+            self.actions = (self.actions + [entry])[-20:]
+        if self.metrics:
+            self.metrics.inc("scraper_memory_actions_total", action=action)
+        memory_log.warning(f"⚠️ {action}: {reason}")
+
+    def request_recycle(self, reason="manual"):
+        """Ask every worker to quit and recreate its browser drivers before the next cycle"""
+        with self.lock:
+            self.recycle_generation += 1
+        self.record_action("recycle_drivers", reason)
+
+    def trim(self, reason="manual"):
+        freed = self.trim_callback() if self.trim_callback else {}
+        collected = gc.collect()
+        self.record_action("trim_caches", f"{reason} ({freed}, gc collected {collected})")
+
+    # --- tracemalloc ---
+    def take_snapshot(self):
+        """Store a tracemalloc snapshot (starts tracing on first use); returns its id"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        with self.lock:
+            snapshot_id = self.next_snapshot_id
+            self.next_snapshot_id += 1
+            self.snapshots = (self.snapshots + [(snapshot_id, datetime.utcnow().isoformat(), snapshot)])[-MAX_SNAPSHOTS:]
+        return snapshot_id
+
+    def get_snapshot(self, snapshot_id):
+        for entry in self.snapshots:
+            if entry[0] == snapshot_id:
+                return entry
+        return None
+
+    @staticmethod
+    def format_stats(stats, limit):
+        return [
+            {
+                "location": str(stat.traceback[0]) if stat.traceback else "?",
+                "size": stat.size,
+                "size_diff": getattr(stat, "size_diff", None),
+                "count": stat.count,
+                "count_diff": getattr(stat, "count_diff", None)
+            }
+            for stat in stats[:limit]
+        ]
+
+    def top(self, snapshot_id, limit=25, key_type="lineno"):
+        entry = self.get_snapshot(snapshot_id)
+        if not entry:
+            return None
+        return self.format_stats(entry[2].statistics(key_type), limit)
+
+    def diff(self, old_id, new_id, limit=25, key_type="lineno"):
+        old, new = self.get_snapshot(old_id), self.get_snapshot(new_id)
+        if not old or not new:
+            return None
+        return self.format_stats(new[2].compare_to(old[2], key_type), limit)
+
+    def stop_tracing(self):
+        """tracemalloc costs CPU and memory on every allocation; switch it off when done"""
+        with self.lock:
+            self.snapshots = []
+        tracemalloc.stop()
+
+    def get_status(self):
+        return {
+            **(self.last_sample or self.sample()),
+            "psutil": psutil is not None,
+            "process_limit_mb": self.process_limit // MB,
+            "chrome_limit_mb": self.chrome_limit // MB,
+            "tracing": tracemalloc.is_tracing(),
+            "snapshots": [{"id": snapshot_id, "taken_at": taken_at} for snapshot_id, taken_at, _ in self.snapshots],
+            "recycle_generation": self.recycle_generation,
+            "actions": list(self.actions)
+        }
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Metrics Registry - low-overhead counters, gauges and histograms
+A small in-process registry (no prometheus_client dependency) shared by the
+scraper (scraper_metrics.py) and the FastAPI backend (backend/server_metrics.py).
+Observations are a dict update under one lock; render() produces the
+Prometheus text exposition format.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds: covers a 1ms Mongo write up to a 2 minute Cloudflare wait
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in labels) + "}"
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Thread-safe metric store keyed by (name, sorted label tuple)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}  # key -> [bucket counts, sum, count]
+        self.descriptions = {}  # name -> (type, help, buckets)
+
+    def describe(self, name, metric_type, help_text, buckets=None):
+        """Type and help text of a metric; histograms may override the default buckets"""
+        self.descriptions[name] = (metric_type, help_text, tuple(buckets) if buckets else None)
+
+    def buckets_for(self, name):
+        return (self.descriptions.get(name) or (None, None, None))[2] or self.buckets
+
+    # --- Recording ---
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = value
+
+    def add_gauge(self, name, amount, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = self.gauges.get(key, 0) + amount
+
+    def get_gauge(self, name, default=None, **labels):
+        return self.gauges.get((name, tuple(sorted(labels.items()))), default)
+
+    def clear_gauge(self, name):
+        """Drop every label set of a gauge (e.g. targets that are no longer tracked)"""
+        with self.lock:
+            for key in [key for key in self.gauges if key[0] == name]:
+                del self.gauges[key]
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        buckets = self.buckets_for(name)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[0][index] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the duration of the with-block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    # --- Exposition ---
+    def _header(self, lines, name, default_type, seen):
+        if name in seen:
+            return
+        seen.add(name)
+        metric_type, help_text, _ = self.descriptions.get(name, (default_type, "", None))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        with self.lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted((key, (list(h[0]), h[1], h[2])) for key, h in self.histograms.items())
+
+        lines = []
+        seen = set()
+        for (name, labels), value in counters:
+            self._header(lines, name, "counter", seen)
+            lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        for (name, labels), value in gauges:
+            self._header(lines, name, "gauge", seen)
+            lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        for (name, labels), (bucket_counts, total, count) in histograms:
+            self._header(lines, name, "histogram", seen)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets_for(name), bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{format_labels(labels + (('le', format_value(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{format_labels(labels)} {format_value(total)}")
+            lines.append(f"{name}_count{format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
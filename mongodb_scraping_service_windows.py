@@ -4,26 +4,102 @@ from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 import json
 import threading
-from flask import Flask, request, jsonify
-from queue import Queue, PriorityQueue
+from flask import Flask, request, jsonify, send_file
+from queue import Queue, PriorityQueue, Empty, Full
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 import hashlib
 import os
 import requests
-from pymongo import MongoClient
+from requests.adapters import HTTPAdapter
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+from bson import ObjectId
+from bson.errors import InvalidId
 from dotenv import load_dotenv
+from werkzeug.serving import make_server
 import random  # Added for random delays
+from scrape_leases import LeaseManager, PRIORITY_DETECTIVE, PRIORITY_FAMILY
+from player_changes import (detect_player_changes, changed_history_fields, promoted_fields,
+                             split_player_data, join_player_data, username_key)
+from scraper_metrics import metrics
+from profiling import CycleProfiler
+from memory_guard import MemoryGuard
+from fetchers import Fetcher, HttpFetcher, RecordingFetcher, ReplayFetcher
+from scraper_logging import get_logger
+from detective_targets import write_target_updates, check_target_batch, import_usernames
+from db_indexes import ensure_indexes, backfill_username_keys, dedupe_username_keys, init_history_collections
+
+try:
+    from waitress import create_server as waitress_create_server
+except ImportError:  # Optional: without waitress the API falls back to werkzeug's threaded server
+    waitress_create_server = None
 
 # Load environment variables
 load_dotenv()
 
+# --- LOGGING ---
+# Workers only enqueue records; levels/rate limits per categorie via SCRAPER_LOG_* (zie scraper_logging.py)
+db_log = get_logger("db")
+checkpoint_log = get_logger("checkpoint")
+settings_log = get_logger("settings")
+targets_log = get_logger("targets")
+lease_log = get_logger("lease")
+notify_log = get_logger("notify")
+cache_log = get_logger("cache")
+browser_log = get_logger("browser")
+cloudflare_log = get_logger("cloudflare")
+list_log = get_logger("list")
+detail_log = get_logger("detail")
+api_log = get_logger("api")
+startup_log = get_logger("startup")
+
 # --- CONFIGURATIE ---
-USER_LIST_URL = "https://barafranca.com/index.php?module=API&action=users"
-USER_DETAIL_URL_TEMPLATE = "https://barafranca.com/index.php?module=API&action=user&name={}"
+BARAFRANCA_BASE_URL = os.environ.get('BARAFRANCA_BASE_URL', 'https://barafranca.com').rstrip('/')  # Of de lokale fake API
+USER_LIST_URL = f"{BARAFRANCA_BASE_URL}/index.php?module=API&action=users"
+USER_DETAIL_URL_TEMPLATE = BARAFRANCA_BASE_URL + "/index.php?module=API&action=user&name={}"
 MAIN_LIST_INTERVAL = 30
 MAX_CONCURRENT_TABS = 2
 CACHE_DURATION = 30  # 30 seconden cache voor detective targets
 BATCH_SIZE = 5
+DETAIL_FORCE_REFRESH = 3600  # Detail fetch forceren na 1 uur, ook als de list-versie niet bewoog
+DISTRIBUTED_MODE = os.environ.get('SCRAPER_DISTRIBUTED', '0') == '1'  # Werk delen via Mongo leases
+LEASE_POLL_INTERVAL = 30  # Seconden tussen pogingen om de list-taak te claimen
+PLAYERS_SNAPSHOT_MAX_AGE = 10 if DISTRIBUTED_MODE else 0  # Andere nodes schrijven ook; 0 = alleen eigen writes invalideren
+CHECKPOINT_ID = "scheduler"  # Document in scraper_state met de scheduler checkpoint (per node in distributed mode)
+NODE_ID = os.environ.get('SCRAPER_NODE_ID')  # Vaste node id; zonder wordt het hostname-pid en vindt een herstart zijn checkpoint niet terug
+FETCHER_MODE = os.environ.get('SCRAPER_FETCHER', 'browser')  # browser | record | replay | http
+RECORD_DIR = os.environ.get('SCRAPER_RECORD_DIR', 'recordings')
+REPLAY_LATENCY = float(os.environ.get('SCRAPER_REPLAY_LATENCY', 0))  # Synthetische latency in seconden
+STAGE_METRIC = "scraper_stage_duration_seconds"  # Histogram per worker/stage (zie scraper_metrics.py)
+API_HOST = os.environ.get('SCRAPER_API_HOST', '127.0.0.1')
+API_PORT = int(os.environ.get('SCRAPER_API_PORT', 5001))
+API_SERVER = os.environ.get('SCRAPER_API_SERVER', 'waitress')  # waitress | werkzeug
+API_THREADS = int(os.environ.get('SCRAPER_API_THREADS', 8))  # Waitress worker threads voor de API
+NOTIFY_QUEUE_SIZE = 100  # Max aantal wachtende backend notificaties
+NOTIFY_COALESCE_WINDOW = 1.0  # Updates binnen dit venster worden samengevoegd
+NOTIFY_MAX_RETRIES = 4
+NOTIFICATION_FLUSH_SIZE = 500  # Pending notificaties direct wegschrijven boven deze grens
+NOTIFICATION_PREFS_TTL = 60  # Notification settings uit user_preferences max 60s cachen
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 30))  # TTL; 0 = nooit verwijderen
+NOTIFICATION_PAGE_SIZE = 50  # Standaard paginagrootte van /api/scraping/notifications
+NOTIFICATION_PAGE_MAX = 200
+
+# Stat history: retentie per resolutie (velden staan in player_changes.HISTORY_FIELDS)
+HISTORY_RAW_RETENTION_DAYS = int(os.environ.get('HISTORY_RAW_RETENTION_DAYS', 7))
+HISTORY_HOURLY_RETENTION_DAYS = int(os.environ.get('HISTORY_HOURLY_RETENTION_DAYS', 90))
+HISTORY_DAILY_RETENTION_DAYS = int(os.environ.get('HISTORY_DAILY_RETENTION_DAYS', 730))
+
+# Notification type -> UserPreferences.notification_settings key (None = altijd aan)
+NOTIFICATION_SETTING_KEYS = {
+    "kill_update": "kills",
+    "shot_update": "shots",
+    "plating_drop": "plating_drops",
+    "wealth_change": "profile_changes",
+    "rank_change": "profile_changes",
+    "family_change": "profile_changes",
+    "death": None
+}
 
 # --- MongoDB SETUP ---
 def init_mongodb():
@@ -31,99 +107,245 @@ def init_mongodb():
     client = MongoClient(mongo_url)
     db = client[os.environ.get('DB_NAME', 'omerta_intelligence')]
     
-    print(f"[DB] Connected to MongoDB: {mongo_url}")
-    print(f"[DB] Database: {db.name}")
+    db_log.info(f"Connected to MongoDB: {mongo_url}")
+    db_log.info(f"Database: {db.name}")
     
-    # Create indexes for better performance - handle conflicts gracefully
+    # Declared index set (db_indexes.py); existing indexes are left alone, conflicts logged
     try:
-        # Try to create unique username index
-        try:
-            db.detective_targets.create_index("username", unique=True)
-        except Exception as e:
-            if "already exists" not in str(e):
-                print(f"[DB] Detective targets username index issue: {e}")
-        
-        try:
-            db.detective_targets.create_index("is_active")
-        except Exception as e:
-            if "already exists" not in str(e):
-                print(f"[DB] Detective targets is_active index issue: {e}")
-        
-        try:
-            db.player_cache.create_index("username", unique=True)
-        except Exception as e:
-            if "already exists" not in str(e):
-                print(f"[DB] Player cache username index issue: {e}")
-        
-        try:
-            # Only create non-unique user_id index if it doesn't exist
-            existing_indexes = list(db.player_cache.list_indexes())
-            has_user_id_index = any("user_id" in str(idx) for idx in existing_indexes)
-            if not has_user_id_index:
-                db.player_cache.create_index("user_id")
-        except Exception as e:
-            print(f"[DB] Player cache user_id index issue: {e}")
-        
-        try:
-            db.intelligence_notifications.create_index("timestamp")
-        except Exception as e:
-            if "already exists" not in str(e):
-                print(f"[DB] Intelligence notifications timestamp index issue: {e}")
-        
-        print("[DB] Index setup completed")
+        init_history_collections(db, HISTORY_RAW_RETENTION_DAYS, log=db_log.info)
+        init_notification_retention(db)
+        backfilled = backfill_username_keys(db)
+        if backfilled:
+            db_log.info(f"Backfilled username_key on {backfilled} documents")
+        dedupe_username_keys(db, log=db_log.warning)
+        result = ensure_indexes(db, log=db_log.warning)
+        db_log.info(f"Index setup completed ({len(result['created'])} created, {len(result['conflicts'])} conflicts)")
     except Exception as e:
-        print(f"[DB] Index setup failed: {e}")
+        db_log.error(f"Index setup failed: {e}")
     
     return db
 
+def init_notification_retention(db):
+    """TTL expiry of intelligence_notifications after NOTIFICATION_RETENTION_DAYS (0 = keep forever).
+
+    A plain timestamp_1 index (older installs) is dropped and recreated as TTL,
+    since collMod can only turn it into a TTL index on MongoDB 5.1+; with
+    retention 0 an existing TTL index is recreated without expiry."""
+    collection = db.intelligence_notifications
+    retention = NOTIFICATION_RETENTION_DAYS * 86400 if NOTIFICATION_RETENTION_DAYS > 0 else None
+    index = next((index for index in collection.list_indexes() if dict(index["key"]) == {"timestamp": 1}), None)
+    current = index.get("expireAfterSeconds") if index else None
+    if index is not None and current == retention:
+        return
+    try:
+        if index is not None and current is not None and retention is not None:
+            # TTL -> TTL with another retention works in place on every version
+            db.command("collMod", "intelligence_notifications",
+                       index={"keyPattern": {"timestamp": 1}, "expireAfterSeconds": retention})
+        else:
+            if index is not None:
+                collection.drop_index(index["name"])
+            if retention is None:
+                collection.create_index("timestamp", name="timestamp_1")
+            else:
+                collection.create_index("timestamp", name="timestamp_ttl", expireAfterSeconds=retention)
+        if retention is None:
+            db_log.info("Notifications are kept forever (no TTL)")
+        else:
+            db_log.info(f"Notifications expire after {NOTIFICATION_RETENTION_DAYS} days")
+    except Exception as e:
+        db_log.warning(f"Notification TTL index issue: {e}")
+
+# --- NOTIFICATION CURSORS ---
+def notification_cursor(doc):
+    """Keyset cursor of a notification: '<timestamp iso>_<ObjectId>'"""
+    return f"{doc['timestamp'].isoformat()}_{doc['_id']}"
+
+def parse_notification_cursor(cursor):
+    """(timestamp, ObjectId) from a cursor; ValueError when malformed"""
+    timestamp, _, object_id = cursor.rpartition("_")
+    try:
+        return datetime.fromisoformat(timestamp), ObjectId(object_id)
+    except (InvalidId, TypeError) as e:
+        raise ValueError(f"invalid cursor: {cursor}") from e
+
+# --- BACKEND NOTIFIER ---
+class BackendNotifier:
+    """Background sender that coalesces scraper updates and posts them to FastAPI.
+
+    Workers only enqueue; a single daemon thread owns a keep-alive session,
+    merges updates arriving within the coalesce window into one message and
+    retries failed deliveries with exponential backoff.
+    """
+
+    def __init__(self, backend_url=None, queue_size=NOTIFY_QUEUE_SIZE,
+                 coalesce_window=NOTIFY_COALESCE_WINDOW, max_retries=NOTIFY_MAX_RETRIES):
+        self.backend_url = backend_url or os.environ.get('BACKEND_URL', 'http://127.0.0.1:8001')
+        self.queue = Queue(maxsize=queue_size)
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+        self.dropped = 0
+        self.sent = 0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.thread = threading.Thread(target=self._run, name="backend-notifier", daemon=True)
+        self.thread.start()
+
+    def notify(self, payload):
+        """Enqueue a payload without blocking; drops the oldest update when full"""
+        while True:
+            try:
+                self.queue.put_nowait(payload)
+                return
+            except Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except Empty:
+                    pass
+
+    def _drain(self, first):
+        """Collect everything arriving within the coalesce window after the first update"""
+        batch = [first]
+        deadline = time.time() + self.coalesce_window
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    @staticmethod
+    def coalesce(batch):
+        """Merge several updates into one message; a single update is sent unchanged"""
+        if len(batch) == 1:
+            return batch[0]
+        updated_players = {}
+        for update in batch:
+            for player in update.get('updated_players') or []:
+                updated_players[player.get('username')] = player
+        return {
+            "type": "coalesced_update",
+            "source": "scraper",
+            "types": sorted({update.get('type', 'unknown') for update in batch}),
+            "updates": len(batch),
+            "updated_players": list(updated_players.values()),
+            "count": len(updated_players),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    def _send(self, message):
+        delay = 0.5
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(f"{self.backend_url}/api/internal/list-updated", json=message, timeout=2)
+                if response.status_code < 500:
+                    self.sent += 1
+                    return True
+            except requests.RequestException as e:
+                if attempt == self.max_retries and 'ConnectionRefusedError' not in str(e):
+                    notify_log.warning(f"Backend notify failed: {e}")
+            if attempt < self.max_retries:
+                time.sleep(delay)
+                delay = min(delay * 2, 10)
+        return False
+
+    def _run(self):
+        pending = []
+        while True:
+            try:
+                first = pending.pop(0) if pending else self.queue.get()
+                batch = self._drain(first)
+                message = self.coalesce(batch)
+                if not self._send(message):
+                    # Keep the latest state around so it merges with the next update
+                    pending = [message]
+            except Exception as e:
+                notify_log.warning(f"Notifier error: {e}")
+                time.sleep(1)
+
 # --- SMART DATA MANAGER ---
 class IntelligenceDataManager:
     def __init__(self):
         self.db = init_mongodb()
         self.full_user_list = []
         self.target_families = []
+        self.family_members = set()  # usernames resolved from target_families via the latest list
         self.detective_targets = set()
+        self.user_ids_by_key = {}  # username_key -> user_id, built once per full_user_list
+        self.user_ids_source = None
         self.detailed_user_info = {}
         self.last_list_update = None
         self.lock = threading.Lock()
         self.previous_player_data = {}
         self.notification_callbacks = []
+        self.list_fingerprints = {}  # username_key -> fingerprint from latest list
+        self.detail_fetch_state = {}  # username_key -> fingerprint + time of last detail fetch
+        self.backend_notifier = BackendNotifier()
+        self.changed_usernames = set()  # list fingerprint moved since last publish_list_changes
+        self.lease_manager = None
+        if DISTRIBUTED_MODE:
+            self.lease_manager = LeaseManager(self.db, node_id=NODE_ID)
+            self.lease_manager.start_heartbeat()
+            lease_log.info(f"Distributed mode, node id: {self.lease_manager.node_id}")
+        self.pending_notifications = []
+        self.notification_prefs = None
+        self.notification_prefs_loaded = 0
+        self.pending_history = []
+        self.list_meta = {}  # last list payload: fetched_at, player_count, payload_hash
+        self.player_cache_version = 0  # Bumped on every player_cache write; invalidates players_snapshot
+        self.players_snapshot = None  # Serialized /api/scraping/players body + ETag
+        self.snapshot_lock = threading.Lock()
+        self.last_detail_batch = None
+        self.startup_metrics = {
+            "started_at": time.time(),
+            "restored_from_checkpoint": False,
+            "restored_targets": 0,
+            "first_list_cycle_after": None,
+            "first_detail_cycle_after": None,
+            "first_detail_cycle_fetches": None
+        }
 
         self.load_detective_targets()
+        self.load_family_targets()
+        self.restore_checkpoint()
 
     def get_user_id_by_username(self, username: str):
         """Try to resolve user_id from username using latest list or cache"""
         if not username:
             return None
         try:
-            name_l = username.lower()
-            # Prefer the most recent full_user_list
-            for user in self.full_user_list or []:
-                # different list formats may use different keys
-                u_name = user.get('username') or user.get('uname') or user.get('name')
-                if u_name and str(u_name).lower() == name_l:
+            key = username_key(username)
+            # Prefer the most recent full_user_list (indexed by username_key once per list)
+            user_list = self.full_user_list
+            if self.user_ids_source is not user_list:
+                user_ids = {}
+                for user in user_list or []:
+                    # different list formats may use different keys
+                    u_name = user.get('username') or user.get('uname') or user.get('name')
                     uid = user.get('user_id') or user.get('id') or user.get('player_id')
-                    if uid is not None:
-                        return str(uid)
+                    if u_name and uid is not None:
+                        user_ids.setdefault(username_key(u_name), str(uid))
+                self.user_ids_by_key, self.user_ids_source = user_ids, user_list
+            if key in self.user_ids_by_key:
+                return self.user_ids_by_key[key]
             # Fallback to player_cache document
-            doc = self.db.player_cache.find_one({"username": username})
+            doc = self.db.player_cache.find_one({"username_key": key}, {"user_id": 1})
             if doc and doc.get('user_id'):
                 return str(doc['user_id'])
         except Exception as e:
-            print(f"[MAP] Failed to map username to user_id for {username}: {e}")
+            cache_log.warning(f"Failed to map username to user_id for {username}: {e}")
         return None
 
     def notify_backend_list_updated(self, payload=None):
-        """Non-blocking notify to FastAPI to broadcast updates"""
-        try:
-            backend_url = os.environ.get('BACKEND_URL', 'http://127.0.0.1:8001')
-            data = payload or {"source": "scraper", "timestamp": datetime.utcnow().isoformat()}
-            # fire-and-forget with short timeout
-            requests.post(f"{backend_url}/api/internal/list-updated", json=data, timeout=2)
-        except Exception as e:
-            # don't crash scraper because backend might not be local
-            if 'ConnectionRefusedError' not in str(e):
-                print(f"[NOTIFY] Backend notify failed: {e}")
+        """Non-blocking notify to FastAPI to broadcast updates (sent by BackendNotifier)"""
+        data = payload or {"source": "scraper", "timestamp": datetime.utcnow().isoformat()}
+        self.backend_notifier.notify(data)
 
     def add_notification_callback(self, callback):
         """Register callback voor real-time notifications"""
@@ -135,42 +357,217 @@ class IntelligenceDataManager:
             try:
                 callback(notification_data)
             except Exception as e:
-                print(f"Error in notification callback: {e}")
+                notify_log.error(f"Error in notification callback: {e}")
+
+    @staticmethod
+    def list_fingerprint(list_data):
+        """Fields from the users list that signal a player changed since the last detail fetch"""
+        return (
+            list_data.get('version'),
+            list_data.get('position'),
+            list_data.get('status'),
+            list_data.get('plating')
+        )
+
+    def record_list_fingerprint(self, username, list_data):
+        """Remember the latest list fingerprint for detail scheduling"""
+        fingerprint = self.list_fingerprint(list_data)
+        key = username_key(username)
+        with self.lock:
+            previous = self.list_fingerprints.get(key)
+            if previous is not None and previous != fingerprint:
+                self.changed_usernames.add(username)
+            self.list_fingerprints[key] = fingerprint
+
+    def mark_detail_fetched(self, username, force_refresh=DETAIL_FORCE_REFRESH):
+        """Store the list fingerprint seen at the time of a successful detail fetch"""
+        key = username_key(username)
+        with self.lock:
+            self.detail_fetch_state[key] = {
+                "fingerprint": self.list_fingerprints.get(key),
+                "fetched_at": time.time()
+            }
+        if self.lease_manager:
+            self.lease_manager.complete_detail(username, force_refresh)
+
+    def release_detail(self, username):
+        """Hand a failed detail target back to the shared queue (distributed mode only)"""
+        if self.lease_manager:
+            self.lease_manager.release_detail(username)
+
+    def sync_lease_targets(self, include_family=True):
+        """Distributed mode: make the shared detail schedule match detective targets and family members.
+        Family members are only current on the node that just ingested the list (publish_list_changes);
+        every other sync passes include_family=False and leaves the family-class leases alone."""
+        if not include_family:
+            self.lease_manager.sync_detail_targets({PRIORITY_DETECTIVE: list(self.detective_targets)}, partial=True)
+            return
+        self.lease_manager.sync_detail_targets({
+            PRIORITY_DETECTIVE: list(self.detective_targets),
+            PRIORITY_FAMILY: self.family_only_members()
+        })
+
+    def publish_list_changes(self):
+        """Distributed mode: push family membership and changed players into the lease queue"""
+        with self.lock:
+            changed, self.changed_usernames = self.changed_usernames, set()
+        if not self.lease_manager:
+            return
+        self.sync_lease_targets()
+        moved = self.lease_manager.mark_changed(changed)
+        if moved:
+            lease_log.info(f"{moved} changed targets moved forward in the shared schedule")
+
+    def select_due_targets(self, targets, force_refresh=DETAIL_FORCE_REFRESH):
+        """Split targets into (due, skipped) based on list version changes.
+
+        A target is due when it was never fetched, when its list fingerprint
+        moved since the last detail fetch, when the list has no entry for it,
+        or when the forced-refresh ceiling has passed. Due targets are ordered
+        never-fetched first, then changed, then stale by age.
+        """
+        now = time.time()
+        never_fetched, changed, stale, skipped = [], [], [], []
+        with self.lock:
+            for username in targets:
+                key = username_key(username)
+                state = self.detail_fetch_state.get(key)
+                current = self.list_fingerprints.get(key)
+                if state is None:
+                    never_fetched.append(username)
+                elif current is None or current != state["fingerprint"]:
+                    changed.append(username)
+                elif now - state["fetched_at"] >= force_refresh:
+                    stale.append((state["fetched_at"], username))
+                else:
+                    skipped.append(username)
+        stale.sort()
+        return never_fetched + changed + [username for _, username in stale], skipped
+
+    def load_family_targets(self):
+        """Load target families saved by the backend (app_settings.family_targets)"""
+        try:
+            settings = self.db.app_settings.find_one({"setting_type": "family_targets"})
+            self.target_families = list((settings or {}).get('families', []))
+            db_log.info(f"Loaded {len(self.target_families)} target families")
+        except Exception as e:
+            targets_log.error(f"Loading family targets: {e}")
+
+    def set_family_targets(self, families):
+        """Replace the target families and re-resolve their members"""
+        self.target_families = [f for f in families if f]
+        return self.resolve_family_members()
+
+    def resolve_family_members(self):
+        """Resolve current members of the target families from full_user_list (by f_name or f_id)"""
+        wanted = {str(f).lower() for f in self.target_families}
+        members = set()
+        if wanted:
+            for user in self.full_user_list or []:
+                if not isinstance(user, dict):
+                    continue
+                f_name = user.get('f_name') or (user.get('family', {}) or {}).get('name')
+                f_id = user.get('f_id')
+                if (f_name and str(f_name).lower() in wanted) or (f_id is not None and str(f_id) in wanted):
+                    username = user.get('username') or user.get('uname') or user.get('name')
+                    if username:
+                        members.add(username)
+
+        with self.lock:
+            added = members - self.family_members
+            dropped = self.family_members - members
+            self.family_members = members
+        if added or dropped:
+            targets_log.info(f"Members: {len(members)} (+{len(added)} / -{len(dropped)})")
+        return {"families": self.target_families, "members": len(members),
+                "added": len(added), "dropped": len(dropped)}
+
+    def family_only_members(self):
+        """Family members that are not also detective targets (compared case-insensitively)"""
+        target_keys = {username_key(username) for username in self.detective_targets}
+        return [username for username in self.family_members if username_key(username) not in target_keys]
+
+    def get_detail_schedule(self, force_refresh=DETAIL_FORCE_REFRESH):
+        """Due detail targets: explicit detective targets first, then target-family members"""
+        explicit = list(self.detective_targets)
+        family = self.family_only_members()
+        explicit_due, explicit_skipped = self.select_due_targets(explicit, force_refresh)
+        family_due, family_skipped = self.select_due_targets(family, force_refresh)
+        return explicit_due + family_due, explicit_skipped + family_skipped
+
+    def trim_caches(self):
+        """Memory guardrail: shrink in-memory caches that are rebuilt by the next list cycle"""
+        with self.lock:
+            targets = {username_key(username) for username in self.detective_targets | self.family_members}
+            # Keep only the keys used for user_id lookups and family resolution
+            compact = []
+            for user in self.full_user_list or []:
+                if isinstance(user, dict):
+                    compact.append({
+                        "name": user.get('username') or user.get('uname') or user.get('name'),
+                        "id": user.get('user_id') or user.get('id') or user.get('player_id'),
+                        "f_name": user.get('f_name') or (user.get('family', {}) or {}).get('name'),
+                        "f_id": user.get('f_id')
+                    })
+            self.full_user_list = compact
+            before = len(self.list_fingerprints)
+            self.list_fingerprints = {u: fp for u, fp in self.list_fingerprints.items() if u in targets}
+            self.changed_usernames = {u for u in self.changed_usernames if username_key(u) in targets}
+        self.players_snapshot = None
+        return {"list_entries": len(compact), "fingerprints_dropped": before - len(self.list_fingerprints)}
+
+    def update_target_gauges(self):
+        """Refresh per-target staleness gauges (seconds since the last detail fetch)"""
+        now = time.time()
+        with self.lock:
+            targets = set(self.detective_targets) | set(self.family_only_members())
+            fetched = {username: self.detail_fetch_state.get(username_key(username), {}).get("fetched_at")
+                       for username in targets}
+        metrics.clear_gauge("scraper_target_staleness_seconds")
+        never_fetched = 0
+        for username, fetched_at in fetched.items():
+            if fetched_at is None:
+                never_fetched += 1
+                continue
+            kind = "detective" if username in self.detective_targets else "family"
+            metrics.set_gauge("scraper_target_staleness_seconds", round(now - fetched_at, 3), username=username, kind=kind)
+        metrics.set_gauge("scraper_targets_never_fetched", never_fetched)
+        metrics.set_gauge("scraper_tracked_targets", len(targets))
+        metrics.set_gauge("scraper_list_players", len(self.full_user_list or []))
 
     def load_detective_targets(self):
         """Load active detective targets from MongoDB"""
         try:
             targets = list(self.db.detective_targets.find({"is_active": True}))
             self.detective_targets = {target['username'] for target in targets}
-            print(f"[DB] Loaded {len(self.detective_targets)} detective targets")
+            db_log.info(f"Loaded {len(self.detective_targets)} detective targets")
         except Exception as e:
-            print(f"[ERROR] Loading detective targets: {e}")
+            targets_log.error(f"Loading detective targets: {e}")
 
     def add_detective_targets(self, usernames):
         """Add new detective targets to MongoDB"""
-        added_count = 0
-        for username in usernames:
-            try:
-                result = self.db.detective_targets.update_one(
-                    {"username": username},
-                    {
-                        "$set": {
-                            "username": username,
-                            "player_id": f"player_{username.lower()}",
-                            "added_timestamp": datetime.utcnow(),
-                            "is_active": True
-                        }
-                    },
-                    upsert=True
-                )
-                if result.upserted_id or result.modified_count > 0:
-                    self.detective_targets.add(username)
-                    added_count += 1
-                    print(f"[TARGET] Added detective target: {username}")
-            except Exception as e:
-                print(f"[ERROR] Adding detective target {username}: {e}")
-        
-        return {"added": added_count, "total": len(self.detective_targets)}
+        return self.update_detective_targets(add=usernames)
+
+    def remove_detective_targets(self, usernames):
+        """Deactivate detective targets"""
+        return self.update_detective_targets(remove=usernames)
+
+    def update_detective_targets(self, add=(), remove=(), replace=False):
+        """Add and remove detective targets with a single bulk_write (see
+        detective_targets.write_target_updates) and update the in-memory set
+        incrementally. `replace` also deactivates every active target that is
+        not in `add` (hit list import)."""
+        with self.lock:
+            tracked = {username_key(target): target for target in self.detective_targets}
+        result = write_target_updates(self.db.detective_targets, tracked, add, remove, replace)
+        with self.lock:
+            self.detective_targets.difference_update(result["untrack"])
+            self.detective_targets.update(result["track"])
+            total = len(self.detective_targets)
+
+        if result["added"] or result["removed"]:
+            targets_log.info(f"Detective targets: +{result['added']} -{result['removed']} ({total} tracked)")
+        return {"added": result["added"], "removed": result["removed"], "total": total, "results": result["results"]}
 
     def get_detective_targets(self):
         """Get all active detective targets with their latest data - USERNAME FIRST"""
@@ -181,8 +578,8 @@ class IntelligenceDataManager:
             for target in targets:
                 username = target['username']
                 
-                # Get latest cached data for this target BY USERNAME
-                cached_data = self.db.player_cache.find_one({"username": username})
+                # Get latest cached data for this target BY USERNAME (case-insensitive)
+                cached_data = self.db.player_cache.find_one({"username_key": username_key(username)})
                 
                 player_info = {
                     "username": username,
@@ -224,13 +621,13 @@ class IntelligenceDataManager:
                         player_info["last_updated"] = cached_data.get('last_updated')
                         
                     except Exception as e:
-                        print(f"[DETECTIVE] ❌ Parse error for {username}: {e}")
+                        targets_log.error(f"❌ Parse error for {username}: {e}")
                 
                 result.append(player_info)
             
             return result
         except Exception as e:
-            print(f"[DETECTIVE] ❌ Error getting targets: {e}")
+            targets_log.error(f"❌ Error getting targets: {e}")
             return []
 
     def cache_player_data(self, user_id, username, data):
@@ -251,7 +648,14 @@ class IntelligenceDataManager:
                 user_id_str = self.get_user_id_by_username(username_str)
             
             # SMART CHANGE DETECTION: Check if data actually changed
-            existing_cache = self.db.player_cache.find_one({"username": username_str})
+            key = username_key(username_str)
+            with metrics.timer(STAGE_METRIC, worker="cache", stage="mongo_read"):
+                existing_cache = self.db.player_cache.find_one({"username_key": key})
+            merge_start = time.perf_counter()
+
+            # Detail pages are fetched under the target name as typed; keep the casing the list stored
+            if existing_cache and existing_cache.get('username') and any(field in data for field in ['wealth', 'kills', 'bullets_shot']):
+                username_str = existing_cache['username']
             
             if existing_cache:
                 try:
@@ -277,8 +681,9 @@ class IntelligenceDataManager:
                     old_comparable = normalize_for_comparison(existing_data)
                     new_comparable = normalize_for_comparison(data)
                     
-                    # If no meaningful changes, skip update
-                    if old_comparable == new_comparable:
+                    # If no meaningful changes, skip update (unless promoted fields or the hot/cold split still need a backfill)
+                    if old_comparable == new_comparable and 'position' in existing_cache and 'cold_hash' in existing_cache:
+                        metrics.inc("scraper_cache_results_total", result="unchanged")
                         return False  # No changes needed
                     
                     # SMART MERGE: Combine existing detailed data with new updates
@@ -342,9 +747,15 @@ class IntelligenceDataManager:
                             merged_data['id'] = user_id_str
                     
                     final_data = merged_data
+
+                    # CHANGE DETECTION: queue notifications for meaningful deltas
+                    changes = detect_player_changes(username_str, existing_data, final_data)
+                    if changes:
+                        self.queue_notifications(user_id_str, username_str, changes)
+                    self.queue_history(username_str, changed_history_fields(existing_data, final_data))
                     
                 except Exception as e:
-                    print(f"[CACHE] ❌ Smart merge error for {username_str}: {e}")
+                    cache_log.error(f"❌ Smart merge error for {username_str}: {e}")
                     final_data = data
             else:
                 # No existing data, use new data
@@ -354,37 +765,154 @@ class IntelligenceDataManager:
                 if user_id_str:
                     final_data['user_id'] = user_id_str
                     final_data['id'] = user_id_str
+                self.queue_history(username_str, changed_history_fields(None, final_data))
             
+            # HOT/COLD SPLIT: profile fields go to player_details, only when they changed
+            hot_data, cold_data = split_player_data(final_data)
+            cold_hash = (existing_cache or {}).get('cold_hash')
+            if cold_data:
+                new_cold_hash = hashlib.md5(json.dumps(cold_data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+                if new_cold_hash == cold_hash:
+                    cold_data = None
+                cold_hash = new_cold_hash
+
             # Create document with username as primary key
             doc = {
                 "username": username_str,  # PRIMARY KEY
+                "username_key": key,       # Case-insensitive lookups
                 "user_id": user_id_str,    # Secondary for legacy compatibility
-                "data": json.dumps(final_data, default=str),
+                "data": json.dumps(hot_data, default=str),
+                "cold_hash": cold_hash,
                 "last_updated": datetime.utcnow(),
-                "priority": 1
+                "priority": 1,
+                **promoted_fields(final_data)
             }
             
+            metrics.observe(STAGE_METRIC, time.perf_counter() - merge_start, worker="cache", stage="merge")
+
             # Use username as the unique identifier
-            result = self.db.player_cache.update_one(
-                {"username": username_str},
-                {"$set": doc},
-                upsert=True
-            )
+            with metrics.timer(STAGE_METRIC, worker="cache", stage="mongo_write"):
+                if cold_data:
+                    # $set per field: a detail page without avatar keeps the stored one
+                    self.db.player_details.update_one(
+                        {"username_key": key},
+                        {"$set": {**cold_data, "username": username_str, "last_updated": doc["last_updated"]}},
+                        upsert=True
+                    )
+                    metrics.inc("scraper_cold_writes_total")
+                result = self.db.player_cache.update_one(
+                    {"username_key": key},
+                    {"$set": doc},
+                    upsert=True
+                )
+            metrics.inc("scraper_cache_results_total", result="updated" if result.upserted_id or result.modified_count > 0 else "unchanged")
             
             # Verify the operation
             if result.upserted_id or result.modified_count > 0:
+                self.player_cache_version += 1
                 # Only log for detective targets or meaningful changes
                 if username_str in self.detective_targets:
                     data_type = "detailed" if any(field in final_data for field in ['wealth', 'kills']) else "basic"
-                    print(f"[CACHE] ✅ {data_type.title()} update for {username_str}")
+                    cache_log.debug(f"✅ {data_type.title()} update for {username_str}")
                 return True
             else:
                 return False
                 
         except Exception as e:
-            print(f"[ERROR] Caching player data for {username} (ID: {user_id}): {e}")
+            metrics.inc("scraper_cache_results_total", result="error")
+            cache_log.error(f"Caching player data for {username} (ID: {user_id}): {e}")
             return False
 
+    def checkpoint_id(self):
+        """Every node schedules its own claims, so each keeps its own checkpoint document"""
+        if self.lease_manager:
+            return f"{CHECKPOINT_ID}:{self.lease_manager.node_id}"
+        return CHECKPOINT_ID
+
+    def save_checkpoint(self):
+        """Persist scheduler state so a restart resumes the schedule instead of refetching everything.
+
+        Only detail targets are checkpointed: fingerprints of the other players
+        don't affect the schedule, and all ~200k of them would not fit in one
+        16MB document."""
+        with self.lock:
+            targets = {username_key(username) for username in self.detective_targets | self.family_members}
+            state = {
+                "list_meta": dict(self.list_meta),
+                # Usernames are stored as values, not keys (keys can't safely hold '.' or '$')
+                "list_fingerprints": [[u, list(fp)] for u, fp in self.list_fingerprints.items() if u in targets],
+                "detail_fetch_state": [
+                    {"username": u,
+                     "fingerprint": list(st["fingerprint"]) if st["fingerprint"] is not None else None,
+                     "fetched_at": st["fetched_at"]}
+                    for u, st in self.detail_fetch_state.items() if u in targets
+                ],
+                "family_members": sorted(self.family_members),
+                "last_detail_batch": self.last_detail_batch,
+                "saved_at": time.time()
+            }
+        try:
+            self.db.scraper_state.replace_one({"_id": self.checkpoint_id()}, state, upsert=True)
+        except Exception as e:
+            checkpoint_log.warning(f"Save failed: {e}")
+
+    def restore_checkpoint(self):
+        """Load the last scheduler checkpoint (fingerprints are stored as lists, compared as tuples)"""
+        try:
+            state = self.db.scraper_state.find_one({"_id": self.checkpoint_id()})
+        except Exception as e:
+            checkpoint_log.warning(f"Restore failed: {e}")
+            return False
+        if not state:
+            return False
+
+        with self.lock:
+            self.list_meta = state.get("list_meta") or {}
+            # Older checkpoints are keyed by username as typed
+            self.list_fingerprints = {username_key(u): tuple(fp) for u, fp in state.get("list_fingerprints") or []}
+            self.detail_fetch_state = {
+                username_key(st["username"]): {"fingerprint": tuple(st["fingerprint"]) if st.get("fingerprint") is not None else None,
+                                 "fetched_at": st.get("fetched_at", 0)}
+                for st in state.get("detail_fetch_state") or []
+            }
+            self.family_members = set(state.get("family_members") or [])
+            self.last_detail_batch = state.get("last_detail_batch")
+
+        self.startup_metrics["restored_from_checkpoint"] = True
+        self.startup_metrics["restored_targets"] = len(self.detail_fetch_state)
+        age = int(time.time() - state.get("saved_at", time.time()))
+        checkpoint_log.info(f"Restored schedule for {len(self.detail_fetch_state)} targets, "
+                            f"{len(self.list_fingerprints)} list fingerprints (saved {age}s ago)")
+        return True
+
+    def resume_delay(self, last_run, interval):
+        """Seconds to wait before the first cycle after a restart (0 if already due)"""
+        if not last_run:
+            return 0
+        return max(0, int(last_run + interval - time.time()))
+
+    def record_list_cycle(self, player_list, payload_text):
+        """Remember list payload metadata and measure the first list cycle after startup"""
+        self.list_meta = {
+            "fetched_at": time.time(),
+            "player_count": len(player_list),
+            "payload_hash": hashlib.md5(payload_text.encode('utf-8')).hexdigest()
+        }
+        if self.startup_metrics["first_list_cycle_after"] is None:
+            self.startup_metrics["first_list_cycle_after"] = round(time.time() - self.startup_metrics["started_at"], 1)
+            checkpoint_log.info(f"First list cycle {self.startup_metrics['first_list_cycle_after']}s after start")
+        self.save_checkpoint()
+
+    def record_detail_cycle(self, fetched_count):
+        """Remember the detail batch time and measure time-to-steady-state after startup"""
+        self.last_detail_batch = time.time()
+        if self.startup_metrics["first_detail_cycle_after"] is None:
+            self.startup_metrics["first_detail_cycle_after"] = round(time.time() - self.startup_metrics["started_at"], 1)
+            self.startup_metrics["first_detail_cycle_fetches"] = fetched_count
+            checkpoint_log.info(f"Steady state {self.startup_metrics['first_detail_cycle_after']}s after start "
+                                f"({fetched_count} detail fetches in first cycle)")
+        self.save_checkpoint()
+
     def get_settings(self):
         """Get current scraping settings from database"""
         try:
@@ -397,17 +925,76 @@ class IntelligenceDataManager:
                     "list_worker_interval": 3600,  # 1 hour
                     "detail_worker_interval": 900,  # 15 minutes  
                     "parallel_tabs": 5,
-                    "cloudflare_timeout": 60
+                    "cloudflare_timeout": 60,
+                    "detail_force_refresh": DETAIL_FORCE_REFRESH
                 }
         except Exception as e:
-            print(f"[SETTINGS] Error loading settings: {e}")
+            settings_log.warning(f"Error loading settings: {e}")
             return {
                 "list_worker_interval": 3600,
                 "detail_worker_interval": 900,
                 "parallel_tabs": 5,
-                "cloudflare_timeout": 60
+                "cloudflare_timeout": 60,
+                "detail_force_refresh": DETAIL_FORCE_REFRESH
             }
 
+    def load_cold_fields(self, keys):
+        """player_details documents for these username_keys in one read: {username_key: doc}"""
+        if not keys:
+            return {}
+        details = self.db.player_details.find({"username_key": {"$in": list(keys)}}, {"_id": 0, "last_updated": 0})
+        return {detail["username_key"]: detail for detail in details}
+
+    def load_player(self, query):
+        """Full player dict (hot data joined with its cold fields) for one player_cache query, or None"""
+        player = self.db.player_cache.find_one(query, {"_id": 0, "username_key": 1, "data": 1})
+        if not player:
+            return None
+        hot = json.loads(player.get('data', '{}'))
+        return join_player_data(hot, self.load_cold_fields([player.get("username_key")]).get(player.get("username_key")))
+
+    def snapshot_is_current(self, snapshot):
+        if not snapshot or snapshot["version"] != self.player_cache_version:
+            return False
+        return not PLAYERS_SNAPSHOT_MAX_AGE or time.time() - snapshot["built_at"] < PLAYERS_SNAPSHOT_MAX_AGE
+
+    def get_players_snapshot(self):
+        """Serialized players response + ETag; rebuilt only after player_cache was written"""
+        snapshot = self.players_snapshot
+        if self.snapshot_is_current(snapshot):
+            metrics.inc("scraper_players_snapshot_total", result="hit")
+            return snapshot
+        with self.snapshot_lock:
+            # Another request may have rebuilt it while we waited
+            snapshot = self.players_snapshot
+            if self.snapshot_is_current(snapshot):
+                metrics.inc("scraper_players_snapshot_total", result="hit")
+                return snapshot
+            version = self.player_cache_version
+            with metrics.timer(STAGE_METRIC, worker="api", stage="players_snapshot"):
+                players = list(self.db.player_cache.find({}, {"_id": 0, "username_key": 1, "data": 1})
+                               .sort("last_updated", -1).limit(2000))
+                cold = self.load_cold_fields([player.get("username_key") for player in players])
+                parsed_players = []
+                for player in players:
+                    try:
+                        hot = json.loads(player.get('data', '{}'))
+                    except (TypeError, ValueError):
+                        continue
+                    parsed_players.append(join_player_data(hot, cold.get(player.get("username_key"))))
+                players_json = json.dumps(parsed_players, default=str)
+                body = (f'{{"players": {players_json}, "count": {len(parsed_players)}, '
+                        f'"timestamp": "{datetime.utcnow().isoformat()}"}}')
+            snapshot = {
+                "version": version,
+                "built_at": time.time(),
+                "etag": hashlib.md5(players_json.encode('utf-8')).hexdigest(),
+                "body": body.encode('utf-8')
+            }
+            self.players_snapshot = snapshot
+            metrics.inc("scraper_players_snapshot_total", result="rebuild")
+            return snapshot
+
     def get_cached_players_count(self):
         """Get count of cached players"""
         try:
@@ -415,35 +1002,189 @@ class IntelligenceDataManager:
         except:
             return 0
 
+    def get_notification_settings(self):
+        """Union of notification toggles over all saved UserPreferences (cached briefly)"""
+        if self.notification_prefs is not None and time.time() - self.notification_prefs_loaded < NOTIFICATION_PREFS_TTL:
+            return self.notification_prefs
+        prefs = {}
+        try:
+            for doc in self.db.user_preferences.find({}, {"notification_settings": 1}):
+                for key, enabled in (doc.get('notification_settings') or {}).items():
+                    prefs[key] = prefs.get(key, False) or bool(enabled)
+        except Exception as e:
+            notify_log.warning(f"Could not load notification settings: {e}")
+        self.notification_prefs = prefs
+        self.notification_prefs_loaded = time.time()
+        return prefs
+
+    def build_notification(self, player_id, username, notification_type, message, data=None):
+        """Build an intelligence_notifications document"""
+        return {
+            "player_id": player_id,
+            "username": username,
+            "username_key": username_key(username),
+            "notification_type": notification_type,
+            "message": message,
+            "data": json.dumps(data) if data else None,
+            "timestamp": datetime.utcnow(),
+            "is_read": False
+        }
+
+    def queue_notifications(self, player_id, username, changes):
+        """Queue detected changes; written with one insert_many by flush_notifications"""
+        prefs = self.get_notification_settings()
+        docs = [
+            self.build_notification(player_id, username, notification_type, message, data)
+            for notification_type, message, data in changes
+            if NOTIFICATION_SETTING_KEYS.get(notification_type) is None
+            or prefs.get(NOTIFICATION_SETTING_KEYS[notification_type], True)
+        ]
+        if not docs:
+            return
+        with self.lock:
+            self.pending_notifications.extend(docs)
+            flush_now = len(self.pending_notifications) >= NOTIFICATION_FLUSH_SIZE
+        if flush_now:
+            self.flush_notifications()
+
+    def flush_notifications(self):
+        """Write all pending notifications with a single insert_many"""
+        with self.lock:
+            docs, self.pending_notifications = self.pending_notifications, []
+        if not docs:
+            return 0
+        try:
+            self.db.intelligence_notifications.insert_many(docs, ordered=False)
+        except Exception as e:
+            notify_log.error(f"Writing {len(docs)} notifications: {e}")
+            return 0
+
+        for doc in docs:
+            self.notify_intelligence_update({
+                "type": doc["notification_type"],
+                "username": doc["username"],
+                "message": doc["message"],
+                "timestamp": doc["timestamp"].isoformat()
+            })
+        return len(docs)
+
+    def queue_history(self, username, fields):
+        """Queue a history point with only the changed fields; written by flush_history"""
+        if not fields:
+            return
+        with self.lock:
+            self.pending_history.append({"username": username, "username_key": username_key(username),
+                                         "timestamp": datetime.utcnow(), **fields})
+            flush_now = len(self.pending_history) >= NOTIFICATION_FLUSH_SIZE
+        if flush_now:
+            self.flush_history()
+
+    def flush_history(self):
+        """Append pending raw points and fold them into hourly/daily rollups (per username_key,
+        so a player stored under another casing later keeps one series)"""
+        with self.lock:
+            points, self.pending_history = self.pending_history, []
+        if not points:
+            return 0
+
+        rollups = {}
+        for point in points:
+            ts = point["timestamp"]
+            buckets = (
+                ("hour", ts.replace(minute=0, second=0, microsecond=0), HISTORY_HOURLY_RETENTION_DAYS),
+                ("day", ts.replace(hour=0, minute=0, second=0, microsecond=0), HISTORY_DAILY_RETENTION_DAYS)
+            )
+            for resolution, bucket, retention_days in buckets:
+                key = (point["username_key"], resolution, bucket)
+                rollup = rollups.setdefault(key, {
+                    "username": point["username"], "last": {}, "min": {}, "max": {}, "samples": 0,
+                    "expires_at": bucket + timedelta(days=retention_days)
+                })
+                rollup["samples"] += 1
+                for field, value in point.items():
+                    if field in ("username", "username_key", "timestamp"):
+                        continue
+                    rollup["last"][field] = value
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        rollup["min"][field] = min(rollup["min"].get(field, value), value)
+                        rollup["max"][field] = max(rollup["max"].get(field, value), value)
+
+        operations = []
+        for (key, resolution, bucket), rollup in rollups.items():
+            update = {
+                "$set": {"username": rollup["username"], "expires_at": rollup["expires_at"],
+                         **{f"last.{f}": v for f, v in rollup["last"].items()}},
+                "$inc": {"samples": rollup["samples"]}
+            }
+            if rollup["min"]:
+                update["$min"] = {f"min.{f}": v for f, v in rollup["min"].items()}
+                update["$max"] = {f"max.{f}": v for f, v in rollup["max"].items()}
+            operations.append(UpdateOne(
+                {"username_key": key, "resolution": resolution, "bucket": bucket}, update, upsert=True
+            ))
+
+        try:
+            self.db.player_stat_history.insert_many(points, ordered=False)
+            self.db.player_stat_rollups.bulk_write(operations, ordered=False)
+        except Exception as e:
+            db_log.error(f"Writing {len(points)} history points: {e}")
+            return 0
+        return len(points)
+
     def add_intelligence_notification(self, player_id, username, notification_type, message, data=None):
         """Add intelligence notification to MongoDB"""
         try:
-            self.db.intelligence_notifications.insert_one({
-                "player_id": player_id,
-                "username": username,
-                "notification_type": notification_type,
-                "message": message,
-                "data": json.dumps(data) if data else None,
-                "timestamp": datetime.utcnow(),
-                "is_read": False
-            })
+            doc = self.build_notification(player_id, username, notification_type, message, data)
+            self.db.intelligence_notifications.insert_one(doc)
             
             # Also notify via callbacks for real-time updates
             notification_data = {
                 "type": notification_type,
                 "username": username,
                 "message": message,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": doc["timestamp"].isoformat()
             }
             self.notify_intelligence_update(notification_data)
             
         except Exception as e:
-            print(f"[ERROR] Adding notification: {e}")
+            notify_log.error(f"Adding notification: {e}")
+
+    def query_notifications(self, limit=NOTIFICATION_PAGE_SIZE, before=None, after=None, username=None,
+                            notification_type=None):
+        """One page of notifications, newest first, by keyset on (timestamp, _id).
+
+        `before` pages to older notifications and `after` to newer ones, both
+        with a cursor from a previous page. Returns (docs, has_more)."""
+        query = {}
+        if username:
+            query["username_key"] = username_key(username)
+        if notification_type:
+            query["notification_type"] = notification_type
+        direction = -1
+        cursor = before or after
+        if cursor:
+            timestamp, object_id = parse_notification_cursor(cursor)
+            op = "$lt" if before else "$gt"
+            # Range on timestamp keeps the index bounds tight; the $or breaks ties on _id
+            query["timestamp"] = {"$lte" if before else "$gte": timestamp}
+            query["$or"] = [{"timestamp": {op: timestamp}}, {"timestamp": timestamp, "_id": {op: object_id}}]
+            direction = -1 if before else 1
+        docs = list(
+            self.db.intelligence_notifications
+            .find(query)
+            .sort([("timestamp", direction), ("_id", direction)])
+            .limit(limit + 1)
+        )
+        has_more = len(docs) > limit
+        docs = docs[:limit]
+        if direction == 1:
+            docs.reverse()
+        return docs, has_more
 
 # --- IMPROVED BROWSER SETUP (Windows - VISIBLE with ANTI-DETECTION) ---
 def create_compatible_browser():
     """Create compatible browser for Windows with fallback options"""
-    print("[BROWSER] Setting up compatible browser voor Windows...")
+    browser_log.info("Setting up compatible browser voor Windows...")
     
     options = uc.ChromeOptions()
     
@@ -466,28 +1207,28 @@ def create_compatible_browser():
         # Advanced anti-detection (may not work on all Chrome versions)
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
         options.add_experimental_option('useAutomationExtension', False)
-        print("[BROWSER] ✅ Advanced anti-detection options applied")
+        browser_log.info("✅ Advanced anti-detection options applied")
     except Exception as e:
-        print(f"[BROWSER] ⚠️ Advanced options not supported: {e}")
-        print("[BROWSER] ℹ️ Using basic compatibility mode")
+        browser_log.warning(f"⚠️ Advanced options not supported: {e}")
+        browser_log.info("ℹ️ Using basic compatibility mode")
     
     try:
         # Create driver with automatic version detection
         driver = uc.Chrome(options=options)
-        print("[BROWSER] ✅ Chrome driver created successfully")
+        browser_log.info("✅ Chrome driver created successfully")
         
         # Try to hide automation indicators
         try:
             driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            print("[BROWSER] ✅ Webdriver masking applied")
+            browser_log.info("✅ Webdriver masking applied")
         except Exception as e:
-            print(f"[BROWSER] ⚠️ Webdriver masking failed: {e}")
+            browser_log.warning(f"⚠️ Webdriver masking failed: {e}")
         
         return driver
         
     except Exception as e:
-        print(f"[BROWSER] ❌ Chrome driver creation failed: {e}")
-        print("[BROWSER] 🔧 Trying fallback options...")
+        browser_log.error(f"❌ Chrome driver creation failed: {e}")
+        browser_log.info("🔧 Trying fallback options...")
         
         # Fallback: Ultra-simple options
         simple_options = uc.ChromeOptions()
@@ -496,28 +1237,31 @@ def create_compatible_browser():
         simple_options.add_argument('--window-size=1280,720')
         
         driver = uc.Chrome(options=simple_options)
-        print("[BROWSER] ✅ Fallback browser created")
+        browser_log.info("✅ Fallback browser created")
         return driver
 
-def smart_cloudflare_handler(driver, url, worker_name, timeout=60):
+def smart_cloudflare_handler(driver, url, worker_name, timeout=60, stage_worker="list"):
     """Smart Cloudflare handler with improved detection"""
-    print(f"\n[{worker_name}] Navigating to: {url}")
+    cloudflare_log.info(f"Navigating to: {url}", worker=worker_name)
     
     try:
-        driver.get(url)
-        time.sleep(3)  # Initial wait
-        
-        page_source = driver.page_source.lower()
+        with metrics.timer(STAGE_METRIC, worker=stage_worker, stage="navigate"):
+            driver.get(url)
+            time.sleep(3)  # Initial wait
+            
+            page_source = driver.page_source.lower()
         
         # IMPROVED: Better Cloudflare detection
         if "cloudflare" in page_source or "just a moment" in page_source or "checking your browser" in page_source:
-            print(f"\n🔒 CLOUDFLARE GEDETECTEERD!")
-            print(f"📋 ACTIES NODIG:")
-            print(f"   1. ✅ Chrome venster is zichtbaar")
-            print(f"   2. ⏳ Wacht 5-10 seconden voor automatische bypass")
-            print(f"   3. 🧩 Los CAPTCHA op als die verschijnt")
-            print(f"   4. 🚪 Laat het venster OPEN")
-            print(f"\n⏰ Maximaal {timeout} seconden wachttijd...")
+            cloudflare_log.warning(
+                "🔒 CLOUDFLARE GEDETECTEERD!\n"
+                "📋 ACTIES NODIG:\n"
+                "   1. ✅ Chrome venster is zichtbaar\n"
+                "   2. ⏳ Wacht 5-10 seconden voor automatische bypass\n"
+                "   3. 🧩 Los CAPTCHA op als die verschijnt\n"
+                "   4. 🚪 Laat het venster OPEN\n"
+                f"⏰ Maximaal {timeout} seconden wachttijd...",
+                worker=worker_name, target=url)
             
             start_time = time.time()
             while time.time() - start_time < timeout:
@@ -525,7 +1269,11 @@ def smart_cloudflare_handler(driver, url, worker_name, timeout=60):
                     current_source = driver.page_source.lower()
                     # IMPROVED: Better detection logic
                     if "cloudflare" not in current_source and "just a moment" not in current_source and "checking your browser" not in current_source:
-                        print(f"\n✅ CLOUDFLARE GEPASSEERD! Scraper gaat verder...")
+                        waited = time.time() - start_time
+                        cloudflare_log.info("✅ CLOUDFLARE GEPASSEERD! Scraper gaat verder...",
+                                            worker=worker_name, stage="cloudflare_wait", duration=waited)
+                        metrics.observe(STAGE_METRIC, waited, worker=stage_worker, stage="cloudflare_wait")
+                        metrics.inc("scraper_cloudflare_challenges_total", worker=stage_worker, outcome="passed")
                         return True
                 except:
                     pass
@@ -533,22 +1281,28 @@ def smart_cloudflare_handler(driver, url, worker_name, timeout=60):
                 time.sleep(2)
                 elapsed = int(time.time() - start_time)
                 if elapsed % 10 == 0 and elapsed > 0:
-                    print(f"⏳ {timeout - elapsed} seconden over...")
+                    cloudflare_log.info(f"⏳ {timeout - elapsed} seconden over...", worker=worker_name)
             
-            print(f"⏰ Time-out bereikt. Proberen verder te gaan...")
+            waited = time.time() - start_time
+            cloudflare_log.warning("⏰ Time-out bereikt. Proberen verder te gaan...",
+                                   worker=worker_name, stage="cloudflare_wait", duration=waited)
+            metrics.observe(STAGE_METRIC, waited, worker=stage_worker, stage="cloudflare_wait")
+            metrics.inc("scraper_cloudflare_challenges_total", worker=stage_worker, outcome="timeout")
             return False
         else:
-            print(f"✅ Geen Cloudflare - direct toegang!")
+            cloudflare_log.debug("✅ Geen Cloudflare - direct toegang!", worker=worker_name)
             return True
             
     except Exception as e:
-        print(f"[{worker_name}] Cloudflare handler error: {e}")
+        cloudflare_log.error(f"Cloudflare handler error: {e}", worker=worker_name)
         return False
 
 # --- Flask App Setup ---
 app = Flask(__name__)
 data_manager = IntelligenceDataManager()
 priority_queue = PriorityQueue()
+profiler = CycleProfiler()
+memory_guard = MemoryGuard(metrics, data_manager.trim_caches)
 
 @app.route('/api/scraping/status')
 def get_status():
@@ -559,6 +1313,9 @@ def get_status():
             "mode": "windows_visible_browser", 
             "cached_players": data_manager.get_cached_players_count(),
             "detective_targets": len(data_manager.detective_targets),
+            "target_families": len(data_manager.target_families),
+            "family_members": len(data_manager.family_members),
+            "startup": data_manager.startup_metrics,
             "timestamp": datetime.utcnow().isoformat()
         })
     except Exception as e:
@@ -583,7 +1340,8 @@ def scraping_settings():
                     "list_worker_interval": 3600,  # 1 hour
                     "detail_worker_interval": 900,  # 15 minutes
                     "parallel_tabs": 5,
-                    "cloudflare_timeout": 60
+                    "cloudflare_timeout": 60,
+                    "detail_force_refresh": DETAIL_FORCE_REFRESH
                 }
                 return jsonify({
                     "settings": default_settings,
@@ -604,6 +1362,7 @@ def scraping_settings():
             settings['detail_worker_interval'] = max(10, settings.get('detail_worker_interval', 900))
             settings['parallel_tabs'] = max(1, min(10, settings.get('parallel_tabs', 5)))
             settings['cloudflare_timeout'] = max(10, min(300, settings.get('cloudflare_timeout', 60)))
+            settings['detail_force_refresh'] = max(60, settings.get('detail_force_refresh', DETAIL_FORCE_REFRESH))
             
             # Save to database
             data_manager.db.scraping_settings.update_one(
@@ -618,7 +1377,7 @@ def scraping_settings():
                 upsert=True
             )
             
-            print(f"[SETTINGS] Updated: {settings}")
+            settings_log.info(f"Updated: {settings}")
             
             return jsonify({
                 "message": "Settings updated successfully",
@@ -670,48 +1429,178 @@ def remove_detective_targets():
         data = request.get_json()
         usernames = data.get('usernames', [])
         
-        if not usernames:
-            return jsonify({"error": "No usernames provided"}), 400
-            
-        removed_count = 0
-        for username in usernames:
-            try:
-                result = data_manager.db.detective_targets.update_one(
-                    {"username": username},
-                    {"$set": {"is_active": False}}
-                )
-                if result.modified_count > 0:
-                    data_manager.detective_targets.discard(username)  # Remove from memory set
-                    removed_count += 1
-                    print(f"[TARGET] Removed detective target: {username}")
-            except Exception as e:
-                print(f"[ERROR] Removing detective target {username}: {e}")
-        
-        # Reload targets from database
-        data_manager.load_detective_targets()
-        
+        error = check_target_batch(usernames)
+        if error:
+            return jsonify({"error": error}), 400
+
+        result = data_manager.remove_detective_targets(usernames)
         return jsonify({
-            "message": f"Removed {removed_count} detective targets",
-            "removed": removed_count,
-            "total_targets": len(data_manager.detective_targets),
+            "message": f"Removed {result['removed']} detective targets",
+            "removed": result['removed'],
+            "total_targets": result['total'],
+            "results": result['results'],
             "timestamp": datetime.utcnow().isoformat()
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+@app.route('/api/scraping/detective/add', methods=['POST'])
 def add_detective_targets():
     """Add new detective targets"""
     try:
         data = request.get_json()
         usernames = data.get('usernames', [])
         
-        if not usernames:
-            return jsonify({"error": "No usernames provided"}), 400
-            
+        error = check_target_batch(usernames)
+        if error:
+            return jsonify({"error": error}), 400
+
         result = data_manager.add_detective_targets(usernames)
         return jsonify({
             "message": f"Added {result['added']} detective targets",
             "added": result['added'],
             "total_targets": result['total'],
+            "results": result['results'],
+            "timestamp": datetime.utcnow().isoformat()
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/scraping/detective/import', methods=['POST'])
+def import_detective_targets():
+    """Import a hit list: {"usernames": [...]} and/or {"text": "one per line or comma separated"};
+    "replace": true deactivates active targets that are not on the list"""
+    try:
+        data = request.get_json() or {}
+        usernames = import_usernames(data)
+
+        error = check_target_batch(usernames)
+        if error:
+            return jsonify({"error": error}), 400
+
+        result = data_manager.update_detective_targets(add=usernames, replace=bool(data.get('replace')))
+        return jsonify({
+            "message": f"Imported {len(usernames)} names: {result['added']} added, {result['removed']} removed",
+            "added": result['added'],
+            "removed": result['removed'],
+            "total_targets": result['total'],
+            "results": result['results'],
+            "timestamp": datetime.utcnow().isoformat()
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/scraping/families/set', methods=['POST'])
+def set_family_targets():
+    """Set target families whose members are kept in the detail schedule"""
+    try:
+        data = request.get_json() or {}
+        families = data.get('families', [])
+        if not isinstance(families, list):
+            return jsonify({"error": "families must be a list"}), 400
+
+        result = data_manager.set_family_targets(families)
+        return jsonify({
+            "message": f"Tracking {result['members']} members of {len(result['families'])} families",
+            **result,
+            "timestamp": datetime.utcnow().isoformat()
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/scraping/families')
+def get_family_targets():
+    """Get target families and their resolved members"""
+    try:
+        return jsonify({
+            "families": data_manager.target_families,
+            "members": sorted(data_manager.family_members),
+            "count": len(data_manager.family_members),
+            "timestamp": datetime.utcnow().isoformat()
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/scraping/metrics')
+def get_metrics():
+    """Per-stage timings, counters and target staleness in Prometheus text format"""
+    try:
+        data_manager.update_target_gauges()
+        return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/scraping/profile', methods=['GET', 'POST'])
+def scraping_profile():
+    """Arm a one-shot cProfile capture of the next list cycle or detail batch"""
+    try:
+        if request.method == 'POST':
+            data = request.get_json() or {}
+            try:
+                armed = profiler.arm(data.get('target', ''), data.get('count', 1))
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            return jsonify({"message": f"Armed {data['target']} ({armed} pending)", **profiler.get_status()})
+        return jsonify(profiler.get_status())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/scraping/profiles/<name>')
+def download_profile(name):
+    """Stored profile as a .prof download, or ?format=text for the top functions"""
+    path = profiler.store.path(name)
+    if not path:
+        return jsonify({"error": "Profile not found"}), 404
+    if request.args.get('format') == 'text':
+        return profiler.store.summary(name, limit=request.args.get('limit', 40, type=int),
+                                      sort=request.args.get('sort', 'cumulative')), 200, {"Content-Type": "text/plain; charset=utf-8"}
+    return send_file(path, as_attachment=True, download_name=name)
+
+@app.route('/api/scraping/memory', methods=['GET', 'POST'])
+def scraping_memory():
+    """Process/Chrome RSS, tracemalloc snapshots and guardrail actions.
+    POST {"action": "snapshot" | "recycle" | "trim" | "stop_tracing"}"""
+    try:
+        if request.method == 'POST':
+            action = (request.get_json() or {}).get('action')
+            if action == 'snapshot':
+                snapshot_id = memory_guard.take_snapshot()
+                return jsonify({"snapshot_id": snapshot_id, "top": memory_guard.top(snapshot_id, limit=request.args.get('limit', 25, type=int))})
+            elif action == 'recycle':
+                memory_guard.request_recycle("manual")
+            elif action == 'trim':
+                memory_guard.trim("manual")
+            elif action == 'stop_tracing':
+                memory_guard.stop_tracing()
+            else:
+                return jsonify({"error": "action must be snapshot, recycle, trim or stop_tracing"}), 400
+        return jsonify(memory_guard.get_status())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/scraping/memory/diff')
+def scraping_memory_diff():
+    """Top allocation growth between two snapshots (?from=<id>&to=<id>, default: last two)"""
+    ids = [snapshot_id for snapshot_id, _, _ in memory_guard.snapshots]
+    old_id = request.args.get('from', ids[-2] if len(ids) > 1 else None, type=int)
+    new_id = request.args.get('to', ids[-1] if ids else None, type=int)
+    group = request.args.get('group', 'lineno')
+    if group not in ('lineno', 'filename', 'traceback'):
+        return jsonify({"error": "group must be lineno, filename or traceback"}), 400
+    diff = memory_guard.diff(old_id, new_id, limit=request.args.get('limit', 25, type=int), key_type=group)
+    if diff is None:
+        return jsonify({"error": "Need two stored snapshots", "snapshots": ids}), 404
+    return jsonify({"from": old_id, "to": new_id, "diff": diff})
+
+@app.route('/api/scraping/leases')
+def get_lease_stats():
+    """Shared work queue state (distributed mode)"""
+    try:
+        if not data_manager.lease_manager:
+            return jsonify({"distributed": False})
+        return jsonify({
+            "distributed": True,
+            **data_manager.lease_manager.get_stats(),
             "timestamp": datetime.utcnow().isoformat()
         })
     except Exception as e:
@@ -719,19 +1608,33 @@ def add_detective_targets():
 
 @app.route('/api/scraping/notifications')
 def get_notifications():
-    """Get intelligence notifications"""
+    """Get intelligence notifications, newest first.
+
+    Query: limit, before/after (cursor from a previous page), username, type"""
     try:
-        # Get recent notifications from MongoDB
-        notifications = list(
-            data_manager.db.intelligence_notifications
-            .find({}, {"_id": 0})
-            .sort("timestamp", -1)
-            .limit(50)
-        )
-        
+        limit = min(max(request.args.get('limit', NOTIFICATION_PAGE_SIZE, type=int), 1), NOTIFICATION_PAGE_MAX)
+        before = request.args.get('before')
+        after = request.args.get('after')
+        if before and after:
+            return jsonify({"error": "Use either before or after, not both"}), 400
+        try:
+            docs, has_more = data_manager.query_notifications(
+                limit, before, after, request.args.get('username'), request.args.get('type')
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Pass as ?before= for the next (older) page, ?after= to poll for newer ones
+        cursors = {
+            "before": notification_cursor(docs[-1]) if docs and (has_more or after) else None,
+            "after": notification_cursor(docs[0]) if docs else after
+        }
+        notifications = [{"id": str(doc.pop("_id")), **doc} for doc in docs]
         return jsonify({
             "notifications": notifications,
             "count": len(notifications),
+            "has_more": has_more,
+            "cursors": cursors,
             "timestamp": datetime.utcnow().isoformat()
         })
     except Exception as e:
@@ -739,30 +1642,13 @@ def get_notifications():
 
 @app.route('/api/scraping/players')
 def get_players():
-    """Get all cached players"""
+    """Get all cached players (pre-serialized snapshot, 304 when If-None-Match matches)"""
     try:
-        # Get all cached players from MongoDB
-        players = list(
-            data_manager.db.player_cache
-            .find({}, {"_id": 0})
-            .sort("last_updated", -1)
-            .limit(2000)  # Increased limit to show more players
-        )
-        
-        # Parse player data
-        parsed_players = []
-        for player in players:
-            try:
-                player_data = json.loads(player.get('data', '{}'))
-                parsed_players.append(player_data)
-            except:
-                pass
-        
-        return jsonify({
-            "players": parsed_players,
-            "count": len(parsed_players),
-            "timestamp": datetime.utcnow().isoformat()
-        })
+        snapshot = data_manager.get_players_snapshot()
+        response = app.response_class(snapshot["body"], mimetype="application/json")
+        response.set_etag(snapshot["etag"])
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -770,21 +1656,15 @@ def get_players():
 def get_player_detail(player_id):
     """Get specific player details by user_id (legacy support)"""
     try:
-        # Find player in cache by user_id
-        player = data_manager.db.player_cache.find_one(
-            {"user_id": player_id}, 
-            {"_id": 0}
-        )
-        
-        if not player:
-            return jsonify({"error": "Player not found"}), 404
-        
-        # Parse player data
+        # Find player in cache by user_id (hot document joined with its profile fields)
         try:
-            player_data = json.loads(player.get('data', '{}'))
-            return jsonify(player_data)
-        except:
+            player_data = data_manager.load_player({"user_id": player_id})
+        except ValueError:
             return jsonify({"error": "Invalid player data"}), 500
+
+        if player_data is None:
+            return jsonify({"error": "Player not found"}), 404
+        return jsonify(player_data)
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -793,424 +1673,490 @@ def get_player_detail(player_id):
 def get_player_detail_by_username(username):
     """Get specific player details by USERNAME (primary method)"""
     try:
-        # Find player in cache by username
-        player = data_manager.db.player_cache.find_one(
-            {"username": username}, 
-            {"_id": 0}
-        )
-        
-        if not player:
-            return jsonify({"error": f"Player {username} not found"}), 404
-        
-        # Parse player data and handle wrapper
+        # Find player in cache by username (hot document joined with its profile fields)
         try:
-            raw_data = json.loads(player.get('data', '{}'))
-            # Handle the data wrapper if present
-            if isinstance(raw_data, dict) and 'data' in raw_data:
-                player_data = raw_data['data']
-            else:
-                player_data = raw_data
-            return jsonify(player_data)
-        except Exception as e:
-            print(f"[API] Parse error for {username}: {e}")
+            raw_data = data_manager.load_player({"username_key": username_key(username)})
+        except ValueError as e:
+            api_log.warning(f"Parse error for {username}: {e}")
             return jsonify({"error": "Invalid player data"}), 500
-            
+
+        if raw_data is None:
+            return jsonify({"error": f"Player {username} not found"}), 404
+
+        # Handle the data wrapper if present
+        if isinstance(raw_data, dict) and 'data' in raw_data:
+            player_data = raw_data['data']
+        else:
+            player_data = raw_data
+        return jsonify(player_data)
+
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# --- API SERVER ---
+def create_api_server(host=API_HOST, port=API_PORT, threads=API_THREADS):
+    """Production WSGI server for the Flask API; returns (server, serve, shutdown).
+    Waitress runs a fixed pool of `threads` workers; without it werkzeug's
+    threaded server is used (one thread per request, no pool size)."""
+    if API_SERVER == 'waitress' and waitress_create_server:
+        server = waitress_create_server(app, host=host, port=port, threads=threads)
+        return server, server.run, server.close
+    server = make_server(host, port, app, threaded=True)
+    return server, server.serve_forever, server.shutdown
+
+# --- FETCHERS ---
+class BrowserFetcher(Fetcher):
+    """Fetches API pages through a visible Chrome driver with the Cloudflare handler"""
+    request_delay = (2, 4)  # Random pause between detail requests
+
+    def __init__(self, driver, settle_delay=1, kind="detail"):
+        self.driver = driver
+        self.settle_delay = settle_delay
+        self.kind = kind  # "list" or "detail", used as the metrics worker label
+
+    def fetch(self, url, worker_name, timeout=60):
+        if not smart_cloudflare_handler(self.driver, url, worker_name, timeout=timeout, stage_worker=self.kind):
+            return None
+        time.sleep(self.settle_delay)  # Extra wait after Cloudflare
+        with metrics.timer(STAGE_METRIC, worker=self.kind, stage="extract"):
+            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+            return soup.text.strip()
+
+    def close(self):
+        self.driver.quit()
+
+def create_fetcher(kind, settle_delay=1):
+    """Fetcher for a worker: browser (default), record (browser + save), replay or http (SCRAPER_FETCHER)"""
+    if FETCHER_MODE == 'replay':
+        return ReplayFetcher(RECORD_DIR, latency=REPLAY_LATENCY)
+    if FETCHER_MODE == 'http':
+        return HttpFetcher()
+    driver = create_compatible_browser()
+    if not driver:
+        return None
+    fetcher = BrowserFetcher(driver, settle_delay, kind)
+    if FETCHER_MODE == 'record':
+        recorder = RecordingFetcher(fetcher, RECORD_DIR)
+        recorder.request_delay = fetcher.request_delay
+        return recorder
+    return fetcher
+
+# --- PIPELINE STAGES ---
+def parse_user_list(text, worker_name):
+    """Parse the users API body into a list of player dicts (None if the body is not JSON)"""
+    try:
+        # Look for JSON data in the page
+        if not (text.startswith('[') or text.startswith('{')):
+            return None
+        users_data = json.loads(text)
+    except json.JSONDecodeError as e:
+        list_log.error(f"❌ Failed to parse JSON: {e}", worker=worker_name)
+        list_log.warning(f"Page content preview: {text[:200]}", worker=worker_name)
+        return None
+
+    # Handle both list and dict formats
+    if isinstance(users_data, list):
+        # Direct list of players
+        player_list = users_data
+        list_log.info(f"✅ Got list format: {len(player_list)} players", worker=worker_name)
+    elif isinstance(users_data, dict):
+        # Dictionary wrapper or container
+        list_log.info(f"📊 Got dict format, keys: {list(users_data.keys())}", worker=worker_name)
+
+        # Unwrap common wrapper {cached, time, expires, data}
+        container = users_data.get('data', users_data)
+
+        # If the unwrapped container is a list, it's the player list
+        if isinstance(container, list):
+            player_list = container
+        elif isinstance(container, dict):
+            # Try common keys inside container
+            if 'users' in container:
+                player_list = container['users']
+            elif 'players' in container:
+                player_list = container['players']
+            else:
+                # The Barafranca users API gives family hierarchy, not players
+                # Skip this and rely on detail workers for now
+                list_log.warning("⚠️ Users API returns family data, not player list", worker=worker_name)
+                list_log.info("ℹ️ Relying on detective targets for player data", worker=worker_name)
+                player_list = []
+        else:
+            player_list = []
+
+        list_log.info(f"✅ Extracted {len(player_list) if isinstance(player_list, list) else 0} players from wrapper", worker=worker_name)
+    else:
+        list_log.warning(f"⚠️ Unexpected data format: {type(users_data)}", worker=worker_name)
+        player_list = []
+
+    return player_list if isinstance(player_list, list) else []
+
+def list_entry_to_data(user):
+    """Map one users API entry to (user_id, username, list_data); username is None if missing"""
+    user_id = None
+    username = None
+
+    # Common ID field names
+    for id_field in ['user_id', 'id', 'player_id', 'userId', 'playerId']:
+        if id_field in user:
+            user_id = user[id_field]
+            break
+
+    # Common username field names - the 'name' field from users API is actually the username
+    for name_field in ['username', 'uname', 'player_name', 'userName', 'playerName', 'name']:
+        if name_field in user and user[name_field] is not None:
+            username = user[name_field]
+            break
+
+    if user_id is None:
+        # Try to backfill from common fields
+        user_id = user.get('id') or user.get('player_id')
+
+    if not username:
+        return user_id, None, None
+
+    # Basic list data - let smart cache handle merging
+    list_data = {
+        "id": str(user_id) if user_id else None,
+        "user_id": str(user_id) if user_id else None,
+        "uname": username,
+        "username": username,
+        "rank_name": user.get('rank_name') or user.get('rank'),
+        "plating": user.get('plating'),
+        "position": user.get('position'),
+        "status": user.get('status'),
+        "f_name": user.get('f_name') or (user.get('family', {}) or {}).get('name'),
+        "f_id": user.get('f_id'),
+        "f_isCapo": user.get('f_isCapo'),
+        "version": user.get('version')
+    }
+    return user_id, username, list_data
+
+def ingest_user_list(data_manager, player_list, text, worker_name):
+    """Merge a parsed users list into the cache, flush side effects and notify the backend"""
+    merge_start = time.perf_counter()
+    data_manager.full_user_list = player_list
+    data_manager.resolve_family_members()
+    list_log.info(f"✅ Updated user list: {len(player_list)} players", worker=worker_name)
+
+    # Cache basic user data - USERNAME FIRST approach
+    cached_count = 0
+    failed_count = 0
+
+    for user in player_list:
+        if not isinstance(user, dict):
+            continue
+        user_id, username, list_data = list_entry_to_data(user)
+
+        # USERNAME FIRST: Require username, user_id optional
+        if username:
+            try:
+                data_manager.record_list_fingerprint(username, list_data)
+
+                # Let smart cache_player_data handle all merging logic
+                if data_manager.cache_player_data(user_id, username, list_data):
+                    cached_count += 1
+
+            except Exception as e:
+                list_log.error(f"❌ Cache error for {username}: {e}", worker=worker_name)
+                failed_count += 1
+        else:
+            failed_count += 1
+            if failed_count <= 3:  # Only show first few failures
+                list_log.warning(f"⚠️ No username found in player keys: {list(user.keys())}", worker=worker_name)
+
+    metrics.observe(STAGE_METRIC, time.perf_counter() - merge_start, worker="list", stage="merge")
+
+    with metrics.timer(STAGE_METRIC, worker="list", stage="mongo_flush"):
+        notification_count = data_manager.flush_notifications()
+        data_manager.flush_history()
+    data_manager.publish_list_changes()
+    # Checkpoint only after this cycle's fingerprints are recorded, so a restart that
+    # skips the (still fresh) list fetch doesn't compare against the previous cycle
+    data_manager.record_list_cycle(player_list, text)
+    list_log.info(f"💾 Cached {cached_count} players, {notification_count} notifications", worker=worker_name)
+
+    # Notify backend of list update
+    data_manager.notify_backend_list_updated({
+        "type": "dynamic_list_update",
+        "cached_players": cached_count,
+        "total_players": len(player_list),
+        "notifications": notification_count
+    })
+    return cached_count
+
+def recycle_fetcher(fetcher, kind, settle_delay, worker_name):
+    """Replace a fetcher with a fresh one (new Chrome); keeps the old one if Chrome won't start"""
+    replacement = create_fetcher(kind, settle_delay)
+    if not replacement:
+        list_log.error("❌ Driver recycle failed, keeping the current browser", worker=worker_name)
+        return fetcher
+    try:
+        fetcher.close()
+    except Exception:
+        pass
+    list_log.info("♻️ Browser recycled", worker=worker_name)
+    return replacement
+
+def process_user_list(data_manager, text, worker_name):
+    """Parse and ingest one users API body; returns the cached count or None"""
+    with metrics.timer(STAGE_METRIC, worker="list", stage="parse"):
+        player_list = parse_user_list(text, worker_name)
+    if player_list is None:
+        return None
+    if not player_list:
+        list_log.error("❌ No valid player data", worker=worker_name)
+        return None
+    return ingest_user_list(data_manager, player_list, text, worker_name)
+
+def process_user_detail(data_manager, username, text, force_refresh=DETAIL_FORCE_REFRESH):
+    """Parse and cache one user API body; returns the batch update entry or None"""
+    if not text.startswith('{'):
+        return None
+    user_data = json.loads(text)
+    if not isinstance(user_data, dict):
+        return None
+
+    inner = user_data.get('data', user_data)
+
+    uid = user_data.get('user_id') or inner.get('user_id')
+    if not uid:
+        uid = data_manager.get_user_id_by_username(username)
+        if uid:
+            inner['user_id'] = uid
+
+    data_manager.cache_player_data(uid, username, inner)
+    data_manager.mark_detail_fetched(username, force_refresh)
+
+    return {
+        "username": username,
+        "user_id": str(uid) if uid else None,
+        "wealth": inner.get('wealth'),
+        "kills": inner.get('kills'),
+        "bullets_shot": inner.get('bullets_shot')
+    }
+
+def process_targets(data_manager, fetcher, target_list, driver_id, settings, force_refresh, profile_session=None):
+    """Fetch and cache detail pages for one tab"""
+    with profile_session.thread() if profile_session else nullcontext():
+        return fetch_target_details(data_manager, fetcher, target_list, driver_id, settings, force_refresh)
+
+def fetch_target_details(data_manager, fetcher, target_list, driver_id, settings, force_refresh):
+    driver_updates = []
+    busy = 0.0
+    for username in target_list:
+        try:
+            url = USER_DETAIL_URL_TEMPLATE.format(username)
+            detail_log.debug("🔍 Getting player", worker=f"TAB-{driver_id}", target=username)
+
+            start = time.perf_counter()
+            text = fetcher.fetch(url, f"TAB-{driver_id}", timeout=settings.get('cloudflare_timeout', 60))
+            fetched = time.perf_counter()
+            metrics.observe(STAGE_METRIC, fetched - start, worker="detail", stage="fetch")
+            if text is not None:
+                update = process_user_detail(data_manager, username, text, force_refresh)
+                metrics.observe(STAGE_METRIC, time.perf_counter() - fetched, worker="detail", stage="process")
+                if update:
+                    detail_log.info(f"✅ Updated {username} (wealth={update['wealth'] if update['wealth'] is not None else 'N/A'})",
+                                    worker=f"TAB-{driver_id}", target=username, stage="fetch", duration=fetched - start)
+                    driver_updates.append(update)
+            else:
+                metrics.inc("scraper_fetch_failures_total", worker="detail")
+                detail_log.warning(f"❌ Failed to access {username}", worker=f"TAB-{driver_id}", target=username,
+                                   stage="fetch", duration=fetched - start)
+                data_manager.release_detail(username)
+            busy += time.perf_counter() - start
+
+            # Small delay between requests
+            low, high = fetcher.request_delay
+            if high:
+                time.sleep(random.uniform(low, high))
+
+        except Exception as e:
+            detail_log.error(f"❌ Error processing {username}: {e}", worker=f"TAB-{driver_id}", target=username)
+            data_manager.release_detail(username)
+
+    metrics.inc("scraper_tab_busy_seconds_total", busy, tab=driver_id)
+    metrics.set_gauge("scraper_tab_busy_seconds", busy, tab=driver_id)
+    return driver_updates
+
 # --- Background Workers ---
 def dynamic_list_worker(data_manager):
-    """Dynamic list worker that creates its own browser instance"""
-    driver = None
+    """Dynamic list worker that creates its own fetcher (browser instance by default)"""
+    fetcher = None
     
     try:
-        # Create browser instance for this worker
-        driver = create_compatible_browser()
-        if not driver:
-            print("[DYNAMIC_LIST_WORKER] ❌ Failed to create browser")
+        # Create fetcher for this worker
+        fetcher = create_fetcher("list", settle_delay=2)
+        if not fetcher:
+            list_log.error("❌ Failed to create browser", worker="DYNAMIC_LIST_WORKER")
             return
             
+        # Warm restart: don't refetch the list if the checkpointed fetch is still fresh
+        delay = data_manager.resume_delay(
+            data_manager.list_meta.get('fetched_at'),
+            data_manager.get_settings().get('list_worker_interval', 3600)
+        )
+        if delay:
+            list_log.info(f"♻️ Restored list is fresh, first fetch in {delay} seconds", worker="DYNAMIC_LIST_WORKER")
+            time.sleep(delay)
+
+        recycle_seen = memory_guard.recycle_generation
         while True:
             try:
                 settings = data_manager.get_settings()
                 list_interval = settings.get('list_worker_interval', 3600)
+
+                # Memory guardrail asked for fresh browsers
+                if memory_guard.recycle_generation != recycle_seen:
+                    recycle_seen = memory_guard.recycle_generation
+                    fetcher = recycle_fetcher(fetcher, "list", 2, "DYNAMIC_LIST_WORKER")
+
+                # Distributed mode: only the node holding the list lease fetches the list
+                if data_manager.lease_manager:
+                    if not data_manager.lease_manager.claim_list():
+                        time.sleep(LEASE_POLL_INTERVAL)
+                        continue
+                    # Families may have been set through another node; this node resolves their members
+                    data_manager.load_family_targets()
                 
-                print(f"\n[DYNAMIC_LIST_WORKER] Fetching user list...")
+                list_log.info("Fetching user list...", worker="DYNAMIC_LIST_WORKER")
                 
-                # Use improved Cloudflare handler
-                if smart_cloudflare_handler(driver, USER_LIST_URL, worker_name="DYNAMIC_LIST_WORKER"):
-                    time.sleep(2)  # Extra wait after Cloudflare
-                    page_source = driver.page_source
-                    soup = BeautifulSoup(page_source, 'html.parser')
-                    
-                    # Try to parse JSON from the page
-                    try:
-                        # Look for JSON data in the page
-                        if soup.text.strip().startswith('[') or soup.text.strip().startswith('{'):
-                            users_data = json.loads(soup.text.strip())
-                            
-                            # Handle both list and dict formats
-                            if isinstance(users_data, list):
-                                # Direct list of players
-                                player_list = users_data
-                                print(f"[DYNAMIC_LIST_WORKER] ✅ Got list format: {len(player_list)} players")
-                            elif isinstance(users_data, dict):
-                                # Dictionary wrapper or container
-                                print(f"[DYNAMIC_LIST_WORKER] 📊 Got dict format, keys: {list(users_data.keys())}")
-
-                                # Unwrap common wrapper {cached, time, expires, data}
-                                container = users_data.get('data', users_data)
-
-                                # If the unwrapped container is a list, it's the player list
-                                if isinstance(container, list):
-                                    player_list = container
-                                elif isinstance(container, dict):
-                                    # Try common keys inside container
-                                    if 'users' in container:
-                                        player_list = container['users']
-                                    elif 'players' in container:
-                                        player_list = container['players']
-                                    else:
-                                        # The Barafranca users API gives family hierarchy, not players
-                                        # Skip this and rely on detail workers for now
-                                        print(f"[DYNAMIC_LIST_WORKER] ⚠️ Users API returns family data, not player list")
-                                        print(f"[DYNAMIC_LIST_WORKER] ℹ️ Relying on detective targets for player data")
-                                        player_list = []
-                                else:
-                                    player_list = []
-
-                                print(f"[DYNAMIC_LIST_WORKER] ✅ Extracted {len(player_list) if isinstance(player_list, list) else 0} players from wrapper")
-                            else:
-                                print(f"[DYNAMIC_LIST_WORKER] ⚠️ Unexpected data format: {type(users_data)}")
-                                player_list = []
-                            
-                            # Process the player list
-                            if isinstance(player_list, list) and len(player_list) > 0:
-                                data_manager.full_user_list = player_list
-                                print(f"[DYNAMIC_LIST_WORKER] ✅ Updated user list: {len(player_list)} players")
-                                
-                                # Cache basic user data - USERNAME FIRST approach
-                                cached_count = 0
-                                failed_count = 0
-                                
-                                for user in player_list:
-                                    if isinstance(user, dict):
-                                        # Try different ID field names
-                                        user_id = None
-                                        username = None
-                                        
-                                        # Common ID field names
-                                        for id_field in ['user_id', 'id', 'player_id', 'userId', 'playerId']:
-                                            if id_field in user:
-                                                user_id = user[id_field]
-                                                break
-                                        
-                                        # Common username field names - the 'name' field from users API is actually the username
-                                        for name_field in ['username', 'uname', 'player_name', 'userName', 'playerName', 'name']:
-                                            if name_field in user and user[name_field] is not None:
-                                                username = user[name_field]
-                                                break
-                                        
-                                        if user_id is None:
-                                            # Try to backfill from common fields
-                                            user_id = user.get('id') or user.get('player_id')
-
-                                        # USERNAME FIRST: Require username, user_id optional
-                                        if username:
-                                            try:
-                                                # Basic list data - let smart cache handle merging
-                                                list_data = {
-                                                    "id": str(user_id) if user_id else None,
-                                                    "user_id": str(user_id) if user_id else None,
-                                                    "uname": username,
-                                                    "username": username,
-                                                    "rank_name": user.get('rank_name') or user.get('rank'),
-                                                    "plating": user.get('plating'),
-                                                    "position": user.get('position'),
-                                                    "status": user.get('status'),
-                                                    "f_name": user.get('f_name') or (user.get('family', {}) or {}).get('name'),
-                                                    "f_id": user.get('f_id'),
-                                                    "f_isCapo": user.get('f_isCapo'),
-                                                    "version": user.get('version')
-                                                }
-                                                
-                                                # Let smart cache_player_data handle all merging logic
-                                                if data_manager.cache_player_data(user_id, username, list_data):
-                                                    cached_count += 1
-                                                    
-                                            except Exception as e:
-                                                print(f"[DYNAMIC_LIST_WORKER] ❌ Cache error for {username}: {e}")
-                                                failed_count += 1
-                                        else:
-                                            failed_count += 1
-                                            if failed_count <= 3:  # Only show first few failures
-                                                print(f"[DYNAMIC_LIST_WORKER] ⚠️ No username found in player keys: {list(user.keys())}")
-                                
-                                print(f"[DYNAMIC_LIST_WORKER] 💾 Cached {cached_count} players")
-                                
-                                # Notify backend of list update
-                                data_manager.notify_backend_list_updated({
-                                    "type": "dynamic_list_update",
-                                    "cached_players": cached_count,
-                                    "total_players": len(player_list)
-                                })
-                            else:
-                                print("[DYNAMIC_LIST_WORKER] ❌ No valid player data")
-                                
-                    except json.JSONDecodeError as e:
-                        print(f"[DYNAMIC_LIST_WORKER] ❌ Failed to parse JSON: {e}")
-                        print(f"[DYNAMIC_LIST_WORKER] Page content preview: {soup.text[:200]}")
-                else:
-                    print(f"[DYNAMIC_LIST_WORKER] ❌ Failed to bypass Cloudflare")
+                with profiler.capture("list_cycle"):
+                    with metrics.timer(STAGE_METRIC, worker="list", stage="fetch"):
+                        text = fetcher.fetch(USER_LIST_URL, "DYNAMIC_LIST_WORKER", timeout=settings.get('cloudflare_timeout', 60))
+                    if text is not None:
+                        with metrics.timer(STAGE_METRIC, worker="list", stage="cycle_processing"):
+                            process_user_list(data_manager, text, "DYNAMIC_LIST_WORKER")
+                    else:
+                        metrics.inc("scraper_fetch_failures_total", worker="list")
+                        list_log.error("❌ Failed to bypass Cloudflare", worker="DYNAMIC_LIST_WORKER")
                     
             except Exception as e:
-                print(f"[DYNAMIC_LIST_WORKER] ❌ Error: {e}")
+                list_log.error(f"❌ Error: {e}", worker="DYNAMIC_LIST_WORKER")
+
+            if data_manager.lease_manager:
+                data_manager.lease_manager.complete_list(list_interval)
             
-            print(f"[DYNAMIC_LIST_WORKER] ⏳ Next update in {list_interval} seconds")
+            list_log.info(f"⏳ Next update in {list_interval} seconds", worker="DYNAMIC_LIST_WORKER")
             time.sleep(list_interval)
             
     finally:
-        if driver:
+        if fetcher:
             try:
-                driver.quit()
-                print("[DYNAMIC_LIST_WORKER] Browser closed")
+                fetcher.close()
+                list_log.info("Browser closed", worker="DYNAMIC_LIST_WORKER")
             except:
                 pass
 
 def smart_list_worker(driver, data_manager, priority_queue):
     """Worker that fetches the main user list with improved Cloudflare handling"""
+    fetcher = BrowserFetcher(driver, settle_delay=2, kind="list")
     while True:
         try:
-            print(f"\n[LIST_WORKER] Fetching user list...")
+            list_log.info("Fetching user list...", worker="LIST_WORKER")
             
-            # Use improved Cloudflare handler
-            if smart_cloudflare_handler(driver, USER_LIST_URL, worker_name="LIST_WORKER"):
-                time.sleep(2)  # Extra wait after Cloudflare
-                page_source = driver.page_source
-                soup = BeautifulSoup(page_source, 'html.parser')
-                
-                # Try to parse JSON from the page
-                try:
-                    # Look for JSON data in the page
-                    if soup.text.strip().startswith('[') or soup.text.strip().startswith('{'):
-                        users_data = json.loads(soup.text.strip())
-                        
-                        # Handle both list and dict formats
-                        if isinstance(users_data, list):
-                            # Direct list of players
-                            player_list = users_data
-                            print(f"[LIST_WORKER] ✅ Got list format: {len(player_list)} players")
-                        elif isinstance(users_data, dict):
-                            # Dictionary wrapper or container
-                            print(f"[LIST_WORKER] 📊 Got dict format, keys: {list(users_data.keys())}")
-
-                            # Unwrap common wrapper {cached, time, expires, data}
-                            container = users_data.get('data', users_data)
-
-                            # If the unwrapped container is a list, it's the player list
-                            if isinstance(container, list):
-                                player_list = container
-                            elif isinstance(container, dict):
-                                # Try common keys inside container
-                                if 'users' in container:
-                                    player_list = container['users']
-                                elif 'players' in container:
-                                    player_list = container['players']
-                                else:
-                                    # The Barafranca users API gives family hierarchy, not players
-                                    # Skip this and rely on detail workers for now
-                                    print(f"[LIST_WORKER] ⚠️ Users API returns family data, not player list")
-                                    print(f"[LIST_WORKER] ℹ️ Relying on detective targets for player data")
-                                    player_list = []
-                            else:
-                                player_list = []
-
-                            print(f"[LIST_WORKER] ✅ Extracted {len(player_list) if isinstance(player_list, list) else 0} players from wrapper")
-                        else:
-                            print(f"[LIST_WORKER] ⚠️ Unexpected data format: {type(users_data)}")
-                            player_list = []
-                        
-                        # Process the player list
-                        if isinstance(player_list, list) and len(player_list) > 0:
-                            data_manager.full_user_list = player_list
-                            print(f"[LIST_WORKER] ✅ Updated user list: {len(player_list)} players")
-                            
-                            # Cache basic user data - USERNAME FIRST approach
-                            cached_count = 0
-                            failed_count = 0
-                            
-                            for user in player_list:
-                                if isinstance(user, dict):
-                                    # Try different ID field names
-                                    user_id = None
-                                    username = None
-                                    
-                                    # Common ID field names
-                                    for id_field in ['user_id', 'id', 'player_id', 'userId', 'playerId']:
-                                        if id_field in user:
-                                            user_id = user[id_field]
-                                            break
-                                    
-                                    # Common username field names - the 'name' field from users API is actually the username
-                                    for name_field in ['username', 'uname', 'player_name', 'userName', 'playerName', 'name']:
-                                        if name_field in user and user[name_field] is not None:
-                                            username = user[name_field]
-                                            break
-                                    
-                                    if user_id is None:
-                                        # Try to backfill from common fields
-                                        user_id = user.get('id') or user.get('player_id')
-
-                                    # USERNAME FIRST: Require username, user_id optional
-                                    if username:
-                                        try:
-                                            # Basic list data - let smart cache handle merging
-                                            list_data = {
-                                                "id": str(user_id) if user_id else None,
-                                                "user_id": str(user_id) if user_id else None,
-                                                "uname": username,
-                                                "username": username,
-                                                "rank_name": user.get('rank_name') or user.get('rank'),
-                                                "plating": user.get('plating'),
-                                                "position": user.get('position'),
-                                                "status": user.get('status'),
-                                                "f_name": user.get('f_name') or (user.get('family', {}) or {}).get('name'),
-                                                "f_id": user.get('f_id'),
-                                                "f_isCapo": user.get('f_isCapo'),
-                                                "version": user.get('version')
-                                            }
-                                            
-                                            # Let smart cache_player_data handle all merging logic
-                                            if data_manager.cache_player_data(user_id, username, list_data):
-                                                cached_count += 1
-                                                
-                                        except Exception as e:
-                                            print(f"[LIST_WORKER] ❌ Cache error for {username}: {e}")
-                                            failed_count += 1
-                                    else:
-                                        failed_count += 1
-                                        if failed_count <= 3:  # Only show first few failures
-                                            print(f"[LIST_WORKER] ⚠️ No username found in player keys: {list(user.keys())}")
-                            
-                            print(f"[LIST_WORKER] 💾 Cached {cached_count} players")
-                        else:
-                            print("[LIST_WORKER] ❌ No valid player data")
-                            
-                except json.JSONDecodeError as e:
-                    print(f"[LIST_WORKER] ❌ Failed to parse JSON: {e}")
-                    print(f"[LIST_WORKER] Page content preview: {soup.text[:200]}")
+            text = fetcher.fetch(USER_LIST_URL, "LIST_WORKER")
+            if text is not None:
+                process_user_list(data_manager, text, "LIST_WORKER")
             else:
-                print(f"[LIST_WORKER] ❌ Failed to bypass Cloudflare")
+                list_log.error("❌ Failed to bypass Cloudflare", worker="LIST_WORKER")
                 
         except Exception as e:
-            print(f"[LIST_WORKER] ❌ Error: {e}")
+            list_log.error(f"❌ Error: {e}", worker="LIST_WORKER")
         
-        print(f"[LIST_WORKER] ⏳ Next update in {MAIN_LIST_INTERVAL} seconds")
+        list_log.info(f"⏳ Next update in {MAIN_LIST_INTERVAL} seconds", worker="LIST_WORKER")
         time.sleep(MAIN_LIST_INTERVAL)
 
 
 def parallel_detail_worker(data_manager):
-    """Parallel detail worker using multiple browser tabs"""
-    drivers = []
+    """Parallel detail worker using multiple fetchers (browser tabs by default)"""
+    fetchers = []
     
     try:
         settings = data_manager.get_settings()
         parallel_tabs = settings.get('parallel_tabs', 5)
         detail_interval = settings.get('detail_worker_interval', 900)
         
-        print(f"[PARALLEL_WORKER] Starting with {parallel_tabs} tabs, interval: {detail_interval}s")
+        detail_log.info(f"Starting with {parallel_tabs} tabs, interval: {detail_interval}s", worker="PARALLEL_WORKER")
         
-        # Create multiple browser instances
+        # Create one fetcher per tab
         for i in range(parallel_tabs):
             try:
-                driver = create_compatible_browser()
-                if driver:
-                    drivers.append(driver)
-                    print(f"[PARALLEL_WORKER] Tab {i+1} ready")
+                fetcher = create_fetcher("detail", settle_delay=1)
+                if fetcher:
+                    fetchers.append(fetcher)
+                    detail_log.info(f"Tab {i+1} ready", worker="PARALLEL_WORKER")
             except Exception as e:
-                print(f"[PARALLEL_WORKER] Failed to create tab {i+1}: {e}")
+                detail_log.warning(f"Failed to create tab {i+1}: {e}", worker="PARALLEL_WORKER")
         
-        if not drivers:
-            print("[PARALLEL_WORKER] ❌ No browser tabs available")
+        if not fetchers:
+            detail_log.error("❌ No browser tabs available", worker="PARALLEL_WORKER")
             return
+
+        # Warm restart: resume the detail cadence from the checkpoint
+        delay = data_manager.resume_delay(data_manager.last_detail_batch, detail_interval)
+        if delay:
+            detail_log.info(f"♻️ Restored schedule, first batch in {delay} seconds", worker="PARALLEL_WORKER")
+            time.sleep(delay)
             
+        recycle_seen = memory_guard.recycle_generation
         while True:
             try:
+                # Memory guardrail asked for fresh browsers
+                if memory_guard.recycle_generation != recycle_seen:
+                    recycle_seen = memory_guard.recycle_generation
+                    fetchers = [recycle_fetcher(fetcher, "detail", 1, f"TAB-{i+1}") for i, fetcher in enumerate(fetchers)]
+
                 # Reload settings each cycle
                 settings = data_manager.get_settings()
                 detail_interval = settings.get('detail_worker_interval', 900)
                 
-                targets = list(data_manager.detective_targets)
-                if not targets:
-                    print("[PARALLEL_WORKER] ℹ️ No detective targets configured")
-                    time.sleep(detail_interval)
-                    continue
-                
-                print(f"[PARALLEL_WORKER] Processing {len(targets)} targets with {len(drivers)} tabs")
+                force_refresh = settings.get('detail_force_refresh', DETAIL_FORCE_REFRESH)
+
+                if data_manager.lease_manager:
+                    # Distributed: every tab claims due targets from the shared lease queue
+                    data_manager.load_detective_targets()
+                    data_manager.sync_lease_targets(include_family=False)
+                    target_batches = [data_manager.lease_manager.iter_claimed_details() for _ in fetchers]
+                    detail_log.info(f"Claiming shared targets with {len(fetchers)} tabs", worker="PARALLEL_WORKER")
+                else:
+                    if not data_manager.detective_targets and not data_manager.family_members:
+                        detail_log.info("ℹ️ No detective targets or target families configured", worker="PARALLEL_WORKER")
+                        time.sleep(detail_interval)
+                        continue
+
+                    # Skip targets whose list version/position/status/plating did not move
+                    targets, skipped = data_manager.get_detail_schedule(force_refresh)
+                    if skipped:
+                        detail_log.info(f"⏭️ Skipping {len(skipped)} unchanged targets", worker="PARALLEL_WORKER")
+                    if not targets:
+                        data_manager.record_detail_cycle(0)
+                        detail_log.info(f"⏳ No changed targets, next batch in {detail_interval} seconds", worker="PARALLEL_WORKER")
+                        time.sleep(detail_interval)
+                        continue
+
+                    detail_log.info(f"Processing {len(targets)} targets with {len(fetchers)} tabs", worker="PARALLEL_WORKER")
+
+                    # Round-robin so high-priority targets are spread over all tabs
+                    target_batches = [targets[i::len(fetchers)] for i in range(len(fetchers))]
                 
-                # Split targets among available drivers
                 updated_players = []
-                targets_per_driver = max(1, len(targets) // len(drivers))
-                
-                def process_targets(driver, target_list, driver_id):
-                    """Process targets for a specific driver"""
-                    driver_updates = []
-                    for username in target_list:
-                        try:
-                            url = USER_DETAIL_URL_TEMPLATE.format(username)
-                            print(f"[TAB-{driver_id}] 🔍 Getting {username}...")
-                            
-                            if smart_cloudflare_handler(driver, url, f"TAB-{driver_id}", timeout=settings.get('cloudflare_timeout', 60)):
-                                time.sleep(1)
-                                page_source = driver.page_source
-                                soup = BeautifulSoup(page_source, 'html.parser')
-                                
-                                if soup.text.strip().startswith('{'):
-                                    user_data = json.loads(soup.text.strip())
-                                    
-                                    if isinstance(user_data, dict):
-                                        inner = user_data.get('data', user_data)
-                                        
-                                        uid = user_data.get('user_id') or inner.get('user_id')
-                                        if not uid:
-                                            uid = data_manager.get_user_id_by_username(username)
-                                            if uid:
-                                                inner['user_id'] = uid
-                                        
-                                        data_manager.cache_player_data(uid, username, inner)
-                                        print(f"[TAB-{driver_id}] ✅ Updated {username} (wealth={inner.get('wealth', 'N/A')})")
-                                        
-                                        driver_updates.append({
-                                            "username": username,
-                                            "user_id": str(uid) if uid else None,
-                                            "wealth": inner.get('wealth'),
-                                            "kills": inner.get('kills'),
-                                            "bullets_shot": inner.get('bullets_shot')
-                                        })
-                            else:
-                                print(f"[TAB-{driver_id}] ❌ Failed to access {username}")
-                            
-                            # Small delay between requests
-                            time.sleep(random.uniform(2, 4))
-                            
-                        except Exception as e:
-                            print(f"[TAB-{driver_id}] ❌ Error processing {username}: {e}")
-                    
-                    return driver_updates
+                profile_session = profiler.start("detail_batch")
+                batch_start = time.perf_counter()
+                for i in range(len(fetchers)):
+                    metrics.set_gauge("scraper_tab_busy_seconds", 0.0, tab=i + 1)
                 
                 # Process targets in parallel using threads
-                from concurrent.futures import ThreadPoolExecutor
-                
-                with ThreadPoolExecutor(max_workers=len(drivers)) as executor:
+                with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
                     futures = []
                     
-                    for i, driver in enumerate(drivers):
-                        start_idx = i * targets_per_driver
-                        end_idx = start_idx + targets_per_driver if i < len(drivers) - 1 else len(targets)
-                        target_batch = targets[start_idx:end_idx]
+                    for i, fetcher in enumerate(fetchers):
+                        target_batch = target_batches[i]
                         
                         if target_batch:
-                            future = executor.submit(process_targets, driver, target_batch, i+1)
+                            future = executor.submit(process_targets, data_manager, fetcher, target_batch,
+                                                     i+1, settings, force_refresh, profile_session)
                             futures.append(future)
                     
                     # Collect results
@@ -1219,30 +2165,45 @@ def parallel_detail_worker(data_manager):
                             batch_results = future.result(timeout=300)  # 5 min timeout
                             updated_players.extend(batch_results)
                         except Exception as e:
-                            print(f"[PARALLEL_WORKER] ❌ Batch error: {e}")
+                            detail_log.error(f"❌ Batch error: {e}", worker="PARALLEL_WORKER")
                 
+                profiler.finish(profile_session)
+
+                # Busy share of every tab relative to the slowest tab in this batch
+                batch_seconds = time.perf_counter() - batch_start
+                metrics.observe(STAGE_METRIC, batch_seconds, worker="detail", stage="batch")
+                for i in range(len(fetchers)):
+                    busy = metrics.get_gauge("scraper_tab_busy_seconds", 0.0, tab=i + 1)
+                    metrics.set_gauge("scraper_tab_utilization", min(1.0, busy / batch_seconds) if batch_seconds else 0.0, tab=i + 1)
+
+                with metrics.timer(STAGE_METRIC, worker="detail", stage="mongo_flush"):
+                    notification_count = data_manager.flush_notifications()
+                    data_manager.flush_history()
+                data_manager.record_detail_cycle(len(updated_players))
+
                 # Send batch notification
                 if updated_players:
-                    print(f"[PARALLEL_WORKER] 📡 Batch complete: {len(updated_players)} players updated")
+                    detail_log.info(f"📡 Batch complete: {len(updated_players)} players updated, {notification_count} notifications", worker="PARALLEL_WORKER")
                     data_manager.notify_backend_list_updated({
                         "type": "parallel_batch_complete",
                         "updated_players": updated_players,
                         "count": len(updated_players),
-                        "tabs_used": len(drivers)
+                        "tabs_used": len(fetchers),
+                        "notifications": notification_count
                     })
                     
             except Exception as e:
-                print(f"[PARALLEL_WORKER] ❌ Cycle error: {e}")
+                detail_log.error(f"❌ Cycle error: {e}", worker="PARALLEL_WORKER")
             
-            print(f"[PARALLEL_WORKER] ⏳ Next batch in {detail_interval} seconds")
+            detail_log.info(f"⏳ Next batch in {detail_interval} seconds", worker="PARALLEL_WORKER")
             time.sleep(detail_interval)
             
     finally:
-        # Cleanup drivers
-        for i, driver in enumerate(drivers):
+        # Cleanup fetchers
+        for i, fetcher in enumerate(fetchers):
             try:
-                driver.quit()
-                print(f"[PARALLEL_WORKER] Tab {i+1} closed")
+                fetcher.close()
+                detail_log.info(f"Tab {i+1} closed", worker="PARALLEL_WORKER")
             except:
                 pass
 
@@ -1252,29 +2213,38 @@ if __name__ == '__main__':
     driver = None
     
     try:
-        print("\n[SETUP] Starting MongoDB-based Omerta Intelligence Scraping Service (Windows)...")
-        print("🪟 WINDOWS MODE: Browser zal ZICHTBAAR zijn voor Cloudflare bypass")
+        startup_log.info("Starting MongoDB-based Omerta Intelligence Scraping Service (Windows)...")
+        startup_log.info("🪟 WINDOWS MODE: Browser zal ZICHTBAAR zijn voor Cloudflare bypass")
         
         # Start Flask API
-        flask_thread = threading.Thread(target=lambda: app.run(debug=False, use_reloader=False, port=5001, host='127.0.0.1'))
+        api_server, serve_api, _ = create_api_server()
+        flask_thread = threading.Thread(target=serve_api, name="scraping-api")
         flask_thread.daemon = True
         flask_thread.start()
-        print("[WEB] Flask scraping API started on http://127.0.0.1:5001")
+        server_name = f"waitress, {API_THREADS} threads" if API_SERVER == 'waitress' and waitress_create_server else "werkzeug threaded"
+        api_log.info(f"Flask scraping API started on http://{API_HOST}:{API_PORT} ({server_name})")
 
-        # Disable Flask HTTP access logging
+        # Disable HTTP access logging
         import logging
-        log = logging.getLogger('werkzeug')
-        log.setLevel(logging.ERROR)
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        logging.getLogger('waitress').setLevel(logging.ERROR)
 
         # Setup VISIBLE compatible browser for Windows
-        print("\n--- SETTING UP COMPATIBLE BROWSER FOR CLOUDFLARE ---")
-        driver = create_compatible_browser()
-        
-        print("[BROWSER] ✅ Ready to bypass Cloudflare - browser is VISIBLE")
+        browser_log.info("Setting up compatible browser for Cloudflare")
+        if FETCHER_MODE == 'replay':
+            browser_log.info(f"⏭️ Replay mode: serving recorded responses from {RECORD_DIR}")
+        elif FETCHER_MODE == 'http':
+            browser_log.info(f"⏭️ HTTP mode: fetching from {BARAFRANCA_BASE_URL}")
+        else:
+            driver = create_compatible_browser()
+            browser_log.info("✅ Ready to bypass Cloudflare - browser is VISIBLE")
 
         # Signal setup complete
         setup_complete.set()
 
+        # Memory telemetry + RSS guardrails (driver recycling / cache trimming)
+        memory_guard.start()
+
         # Start dynamic list worker thread  
         list_thread = threading.Thread(target=dynamic_list_worker, args=(data_manager,))
         list_thread.daemon = True
@@ -1285,25 +2255,24 @@ if __name__ == '__main__':
         detail_thread.daemon = True
         detail_thread.start()
 
-        print(f"\n✅ All services active!")
-        print(f"📊 API Status: http://127.0.0.1:5001/api/scraping/status")
-        print(f"⚙️ Settings: http://127.0.0.1:5001/api/scraping/settings") 
-        print(f"🎯 Detective Targets: {len(data_manager.detective_targets)}")
-        print(f"💾 Cached Players: {data_manager.get_cached_players_count()}")
-        print(f"🔧 Settings are configurable via UI - restart required for changes")
-        print(f"\n💡 TIP: Laat het Chrome venster open - automatische bypass actief!")
-        print(f"🔧 HELP: Los CAPTCHA's op als die verschijnen")
-        print(f"🛑 STOP: Ctrl+C om te stoppen")
-        print(f"="*60)
+        startup_log.info("✅ All services active!")
+        startup_log.info(f"📊 API Status: http://{API_HOST}:{API_PORT}/api/scraping/status")
+        startup_log.info(f"⚙️ Settings: http://{API_HOST}:{API_PORT}/api/scraping/settings")
+        startup_log.info(f"🎯 Detective Targets: {len(data_manager.detective_targets)}")
+        startup_log.info(f"💾 Cached Players: {data_manager.get_cached_players_count()}")
+        startup_log.info("🔧 Settings are configurable via UI - restart required for changes")
+        startup_log.info("💡 TIP: Laat het Chrome venster open - automatische bypass actief!")
+        startup_log.info("🔧 HELP: Los CAPTCHA's op als die verschijnen")
+        startup_log.info("🛑 STOP: Ctrl+C om te stoppen")
 
         while True:
             time.sleep(100)
 
     except KeyboardInterrupt:
-        print("\n\n👋 Scraping service stopped by user.")
+        startup_log.info("👋 Scraping service stopped by user.")
     except Exception as e:
-        print(f"\n[ERROR] Error: {e}")
+        startup_log.error(f"Error: {e}")
     finally:
         if driver:
             driver.quit()
-        print("[SECURE] Browser connections closed.")
\ No newline at end of file
+        browser_log.info("Browser connections closed.")
\ No newline at end of file
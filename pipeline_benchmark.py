@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark - offline end-to-end run of the scraper ingestion path
+Serves a synthetic population through ReplayFetcher (no Chrome, no
+Cloudflare, no barafranca.com), runs the real list and detail stages of
+mongodb_scraping_service_windows.py against a throwaway MongoDB database and
+a stub backend, and reports throughput plus per-stage timings:
+fetch, parse, merge+write (cache, notifications, history) and notify.
+With --api-clients the scraper API is served by its production server and
+/api/scraping/players is hammered while idle and while list cycles run,
+to show read throughput holding up during ingestion.
+
+    python pipeline_benchmark.py --sizes 1000 10000 100000 --details 500 --latency 0.05
+    python pipeline_benchmark.py --sizes 2000 20000 --details 0 --api-clients 8 --api-seconds 10
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+from fetchers import ReplayFetcher
+from synthetic_data import SyntheticWorld
+
+# Load environment variables
+load_dotenv()
+
+BENCH_DB_NAME = os.environ.get('BENCH_DB_NAME', 'omerta_pipeline_bench')
+API_BENCH_PORT = int(os.environ.get('API_BENCH_PORT', 5099))
+
+
+class StubBackend(BaseHTTPRequestHandler):
+    """Accepts /api/internal/list-updated posts and counts them"""
+    received = 0
+    last_received_at = None
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with StubBackend.lock:
+            StubBackend.received += 1
+            StubBackend.last_received_at = time.time()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(b'{"success": true}')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_backend():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubBackend)
+    threading.Thread(target=server.serve_forever, name="stub-backend", daemon=True).start()
+    return server
+
+
+def wait_for_notify(since, timeout=10):
+    """Seconds until the stub backend received a post after `since` (None on timeout)"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        received_at = StubBackend.last_received_at
+        if received_at and received_at >= since:
+            return received_at - since
+        time.sleep(0.01)
+    return None
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def run_list_cycle(scraper, fetcher):
+    """One list cycle split into stages; returns (stage timings, cached count)"""
+    worker_name = "BENCH_LIST"
+    text, fetch_time = timed(fetcher.fetch, scraper.USER_LIST_URL, worker_name)
+    player_list, parse_time = timed(scraper.parse_user_list, text, worker_name)
+    sent_at = time.time()
+    cached, merge_time = timed(scraper.ingest_user_list, scraper.data_manager, player_list, text, worker_name)
+    return {
+        "fetch": fetch_time,
+        "parse": parse_time,
+        "merge_write": merge_time,
+        "notify": wait_for_notify(sent_at)
+    }, cached
+
+
+def run_detail_batch(scraper, fetchers, usernames):
+    """Fetch + cache detail pages spread round-robin over the fetchers"""
+    data_manager = scraper.data_manager
+    settings = data_manager.get_settings()
+    batches = [usernames[i::len(fetchers)] for i in range(len(fetchers))]
+    start = time.perf_counter()
+    updated = []
+    with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+        futures = [
+            executor.submit(scraper.process_targets, data_manager, fetcher, batch, i + 1,
+                            settings, scraper.DETAIL_FORCE_REFRESH)
+            for i, fetcher in enumerate(fetchers) if batch
+        ]
+        for future in futures:
+            updated.extend(future.result())
+    data_manager.flush_notifications()
+    data_manager.flush_history()
+    return time.perf_counter() - start, len(updated)
+
+
+def hammer(url, clients, seconds):
+    """`clients` threads fetching `url` back to back for `seconds`; returns latencies and errors"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.time() + seconds
+
+    def client():
+        session = requests.Session()
+        while time.time() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = session.get(url, timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def report_load(label, latencies, errors, seconds):
+    ordered = sorted(latencies) or [0]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    throughput = len(latencies) / seconds
+    print(f"[BENCH] {label:<12} {throughput:9.1f} req/s  p50={statistics.median(ordered) * 1000:.0f}ms "
+          f"p95={p95 * 1000:.0f}ms  errors={errors}")
+    return throughput
+
+
+def run_api_load(scraper, world, fetcher, clients, seconds, churn):
+    """/api/scraping/players throughput while idle vs. while list cycles run back to back"""
+    url = f"http://127.0.0.1:{API_BENCH_PORT}/api/scraping/players"
+    idle = report_load("api idle", *hammer(url, clients, seconds), seconds)
+
+    stop = threading.Event()
+    cycles = [0]
+
+    def ingest():
+        while not stop.is_set():
+            world.tick(churn)
+            fetcher.responses[scraper.USER_LIST_URL] = world.users_payload()
+            run_list_cycle(scraper, fetcher)
+            cycles[0] += 1
+
+    ingest_thread = threading.Thread(target=ingest, name="bench-ingest", daemon=True)
+    ingest_thread.start()
+    busy = report_load("api ingest", *hammer(url, clients, seconds), seconds)
+    stop.set()
+    ingest_thread.join()
+    print(f"[BENCH]              {cycles[0]} list cycles during load, "
+          f"throughput kept {busy / idle * 100 if idle else 0:.0f}% of idle")
+
+
+def report(label, size, stages, cached):
+    total = sum(value for value in stages.values() if value is not None)
+    notify = f"{stages['notify'] * 1000:.0f}ms" if stages['notify'] is not None else "timeout"
+    print(f"[BENCH] {label:<12} n={size:<7} total={total:7.2f}s  {size / total if total else 0:9.0f} players/s  "
+          f"fetch={stages['fetch']:.3f}s parse={stages['parse']:.3f}s "
+          f"merge+write={stages['merge_write']:.2f}s notify={notify}  cached={cached}")
+
+
+def run(sizes, details, tabs, latency, churn, api_clients=0, api_seconds=10):
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    client = MongoClient(mongo_url)
+    client.drop_database(BENCH_DB_NAME)
+
+    backend = start_stub_backend()
+    # The scraper module builds its data manager at import time from these variables
+    os.environ['DB_NAME'] = BENCH_DB_NAME
+    os.environ['BACKEND_URL'] = f"http://127.0.0.1:{backend.server_address[1]}"
+    os.environ['SCRAPER_DISTRIBUTED'] = '0'
+    import mongodb_scraping_service_windows as scraper
+
+    data_manager = scraper.data_manager
+    if api_clients:
+        _, serve_api, stop_api = scraper.create_api_server('127.0.0.1', API_BENCH_PORT)
+        threading.Thread(target=serve_api, name="bench-api", daemon=True).start()
+    try:
+        for size in sizes:
+            client[BENCH_DB_NAME].player_cache.delete_many({})
+            client[BENCH_DB_NAME].player_details.delete_many({})
+            client[BENCH_DB_NAME].intelligence_notifications.delete_many({})
+            data_manager.list_fingerprints.clear()
+            data_manager.detail_fetch_state.clear()
+
+            world = SyntheticWorld(size, seed=size)
+            fetcher = ReplayFetcher(responses=world.responses(scraper.USER_LIST_URL, scraper.USER_DETAIL_URL_TEMPLATE),
+                                    latency=latency)
+
+            stages, cached = run_list_cycle(scraper, fetcher)
+            report("cold list", size, stages, cached)
+
+            # Second cycle after a tick: most players unchanged, exercises the early-return path
+            changed = world.tick(churn)
+            fetcher.responses[scraper.USER_LIST_URL] = world.users_payload()
+            stages, cached = run_list_cycle(scraper, fetcher)
+            report("warm list", size, stages, cached)
+            print(f"[BENCH]              {len(changed)} players changed between cycles")
+
+            if details:
+                usernames = world.usernames()[:details]
+                detail_fetchers = [ReplayFetcher(responses=fetcher.responses, latency=latency) for _ in range(tabs)]
+                elapsed, updated = run_detail_batch(scraper, detail_fetchers, usernames)
+                print(f"[BENCH] {'details':<12} n={len(usernames):<7} total={elapsed:7.2f}s  "
+                      f"{len(usernames) / elapsed if elapsed else 0:9.0f} players/s  tabs={tabs} updated={updated}")
+
+            if api_clients:
+                run_api_load(scraper, world, fetcher, api_clients, api_seconds, churn)
+    finally:
+        if api_clients:
+            stop_api()
+        backend.shutdown()
+        client.drop_database(BENCH_DB_NAME)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of list and detail ingestion")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--details", type=int, default=500, help="detail pages per size (0 to skip)")
+    parser.add_argument("--tabs", type=int, default=5, help="parallel detail fetchers")
+    parser.add_argument("--latency", type=float, default=0.0, help="synthetic fetch latency in seconds")
+    parser.add_argument("--churn", type=float, default=0.01, help="fraction of players changed between list cycles")
+    parser.add_argument("--api-clients", type=int, default=0, help="concurrent /api/scraping/players clients (0 to skip)")
+    parser.add_argument("--api-seconds", type=float, default=10, help="duration of each API load phase")
+    args = parser.parse_args()
+    run(args.sizes, args.details, args.tabs, args.latency, args.churn, args.api_clients, args.api_seconds)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Player Changes - pure helpers shared by the scraper and the data tools
+Change detection between two cached player snapshots, the stat-history
+snapshot, the top-level fields promoted onto player_cache documents and the
+hot/cold split between player_cache and player_details.
+No Mongo, browser or Flask imports, so the seeder and benchmarks can use
+them without the Windows scraping stack.
+"""
+
+# Stat history: velden die per speler over tijd bewaard worden
+HISTORY_FIELDS = ['kills', 'shots', 'wealth', 'plating', 'position', 'rank_name', 'status', 'f_name', 'honorpoints']
+
+# Groot en zelden veranderend: staan in player_details (cold) i.p.v. in player_cache.data (hot)
+COLD_FIELDS = ('profile', 'avatar', 'gc_availability')
+
+
+def plating_level(plating):
+    """Numeric plating level, same scale as getPlatingLevel in PlayersPage.js (None if unknown)"""
+    if not plating:
+        return None
+    level = str(plating).lower()
+    if 'none' in level or 'no plating' in level:
+        return 0
+    if 'very high' in level:
+        return 4
+    if 'high' in level:
+        return 3
+    if 'medium' in level:
+        return 2
+    if 'low' in level:
+        return 1
+    return None
+
+def shots_total(bullets_shot):
+    """bullets_shot is either {'total': n, ...} or a plain number"""
+    if isinstance(bullets_shot, dict):
+        return bullets_shot.get('total')
+    return bullets_shot
+
+def detect_player_changes(username, old, new):
+    """Classify field deltas between two cached snapshots into notification tuples.
+
+    Returns a list of (notification_type, message, data). Fields missing on
+    either side are ignored, so a first detail fetch never reports a change.
+    """
+    changes = []
+
+    old_kills, new_kills = old.get('kills'), new.get('kills')
+    if isinstance(old_kills, (int, float)) and isinstance(new_kills, (int, float)) and new_kills > old_kills:
+        changes.append(("kill_update", f"{username} made {new_kills - old_kills} kill(s) ({old_kills} → {new_kills})",
+                        {"old": old_kills, "new": new_kills}))
+
+    old_shots, new_shots = shots_total(old.get('bullets_shot')), shots_total(new.get('bullets_shot'))
+    if isinstance(old_shots, (int, float)) and isinstance(new_shots, (int, float)) and new_shots > old_shots:
+        changes.append(("shot_update", f"{username} fired {new_shots - old_shots} bullet(s) ({old_shots} → {new_shots})",
+                        {"old": old_shots, "new": new_shots}))
+
+    old_plating, new_plating = old.get('plating'), new.get('plating')
+    if old_plating != new_plating:
+        old_level, new_level = plating_level(old_plating), plating_level(new_plating)
+        if old_level is not None and new_level is not None and new_level < old_level:
+            changes.append(("plating_drop", f"{username} plating dropped: {old_plating} → {new_plating}",
+                            {"old": old_plating, "new": new_plating}))
+
+    old_wealth, new_wealth = old.get('wealth'), new.get('wealth')
+    if old_wealth is not None and new_wealth is not None and old_wealth != new_wealth:
+        changes.append(("wealth_change", f"{username} wealth changed: {old_wealth} → {new_wealth}",
+                        {"old": old_wealth, "new": new_wealth}))
+
+    old_rank, new_rank = old.get('rank_name'), new.get('rank_name')
+    if old_rank and new_rank and old_rank != new_rank:
+        changes.append(("rank_change", f"{username} rank changed: {old_rank} → {new_rank}",
+                        {"old": old_rank, "new": new_rank}))
+
+    old_family, new_family = old.get('f_name'), new.get('f_name')
+    if 'f_name' in old and 'f_name' in new and old_family != new_family:
+        changes.append(("family_change", f"{username} family changed: {old_family or 'none'} → {new_family or 'none'}",
+                        {"old": old_family, "new": new_family}))
+
+    old_status, new_status = old.get('status'), new.get('status')
+    if old_status is not None and old_status != 3 and new_status == 3:
+        changes.append(("death", f"{username} was killed in action", {"old": old_status, "new": new_status}))
+
+    return changes
+
+def history_snapshot(data):
+    """Flatten the tracked history fields out of a cached player document"""
+    if not isinstance(data, dict):
+        return {}
+    snapshot = {field: data.get(field) for field in HISTORY_FIELDS if field != 'shots'}
+    snapshot['shots'] = shots_total(data.get('bullets_shot'))
+    return {field: value for field, value in snapshot.items() if value is not None}
+
+def changed_history_fields(old, new):
+    """Only the tracked fields whose value differs between two snapshots"""
+    old_snapshot = history_snapshot(old) if old else {}
+    return {field: value for field, value in history_snapshot(new).items() if old_snapshot.get(field) != value}
+
+def promoted_fields(data):
+    """Top-level copies of list/stat fields so Mongo can filter and aggregate
+    on them (the full player document stays in the JSON 'data' string)"""
+    return {
+        "f_name": data.get('f_name'),
+        "f_id": data.get('f_id'),
+        "f_isCapo": data.get('f_isCapo'),
+        "rank_name": data.get('rank_name'),
+        "position": data.get('position'),
+        "status": data.get('status'),
+        "plating": data.get('plating'),
+        "kills": data.get('kills'),
+        "shots": shots_total(data.get('bullets_shot')),
+        "wealth": data.get('wealth')
+    }
+
+
+def username_key(username):
+    """Case-insensitive lookup key, stored as username_key on player_cache,
+    player_details and detective_targets (same result as Mongo's $toLower
+    for the ASCII names Omerta allows)"""
+    return str(username).lower()
+
+
+def split_player_data(data):
+    """(hot, cold): list-level and stat fields for player_cache.data, profile
+    fields (COLD_FIELDS) for the player_details document"""
+    hot = {key: value for key, value in data.items() if key not in COLD_FIELDS}
+    cold = {key: data[key] for key in COLD_FIELDS if data.get(key) is not None}
+    return hot, cold
+
+
+def join_player_data(hot, cold):
+    """Full player dict from a hot data dict and its player_details document (or None)"""
+    if not cold:
+        return hot
+    return {**hot, **{key: cold[key] for key in COLD_FIELDS if key in cold}}
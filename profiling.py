@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Profiling - opt-in cProfile capture of scraper cycles
+Arm a target through /api/scraping/profile and the next list cycle or
+detail batch is profiled (every thread of the batch, merged into one
+file). Results are .prof files (pstats format, open with snakeviz or
+pstats) kept in a directory with a bounded retention count. When nothing
+is armed, start() is a single dict check and returns None.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from scraper_logging import get_logger
+
+profile_log = get_logger("profile")
+
+PROFILE_DIR = os.environ.get('SCRAPER_PROFILE_DIR', 'profiles')
+PROFILE_RETENTION = int(os.environ.get('SCRAPER_PROFILE_RETENTION', 20))  # Max aantal bewaarde profielen
+PROFILE_TARGETS = ("list_cycle", "detail_batch")
+PROFILE_NAME = re.compile(r'^[\w\-.]+\.prof$')
+
+
+class ProfileStore:
+    """Directory of .prof files, pruned to the newest `retention` entries"""
+
+    def __init__(self, directory=PROFILE_DIR, retention=PROFILE_RETENTION):
+        self.directory = directory
+        self.retention = retention
+
+    def save(self, stats, label):
+        """Dump a pstats.Stats or cProfile.Profile as <label>-<timestamp>.prof"""
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{label}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}.prof"
+        stats.dump_stats(os.path.join(self.directory, name))
+        self.prune()
+        return name
+
+    def prune(self):
+        for entry in self.list()[self.retention:]:
+            try:
+                os.remove(os.path.join(self.directory, entry["name"]))
+            except OSError:
+                pass
+
+    def list(self):
+        """Stored profiles, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if PROFILE_NAME.match(name):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append({"name": name, "size": stat.st_size,
+                                "created": datetime.utcfromtimestamp(stat.st_mtime).isoformat()})
+        return sorted(entries, key=lambda entry: entry["created"], reverse=True)
+
+    def path(self, name):
+        """Absolute path of a stored profile, or None (also for names that try to leave the directory)"""
+        if not PROFILE_NAME.match(name or ""):
+            return None
+        path = os.path.abspath(os.path.join(self.directory, name))
+        return path if os.path.isfile(path) else None
+
+    def summary(self, name, limit=40, sort="cumulative"):
+        """Top functions of a stored profile as pstats text"""
+        path = self.path(name)
+        if not path:
+            return None
+        output = io.StringIO()
+        pstats.Stats(path, stream=output).sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+class ProfileSession:
+    """One armed capture; every thread that takes part profiles itself"""
+
+    def __init__(self, target):
+        self.target = target
+        self.started = time.time()
+        self.profiles = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def thread(self):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+: cProfile uses sys.monitoring, one active profile already covers all threads
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self.lock:
+                self.profiles.append(profile)
+
+
+class CycleProfiler:
+    """Arms one-shot captures of list cycles and detail batches"""
+
+    def __init__(self, store=None):
+        self.store = store or ProfileStore()
+        self.armed = {}  # target -> remaining captures
+        self.lock = threading.Lock()
+        self.last_saved = {}
+
+    def arm(self, target, count=1):
+        if target not in PROFILE_TARGETS:
+            raise ValueError(f"Unknown profile target: {target} (expected one of {', '.join(PROFILE_TARGETS)})")
+        with self.lock:
+            self.armed[target] = self.armed.get(target, 0) + max(1, int(count))
+        return self.armed[target]
+
+    def start(self, target):
+        """ProfileSession if a capture of this target is armed, else None"""
+        if not self.armed:
+            return None
+        with self.lock:
+            remaining = self.armed.get(target, 0)
+            if not remaining:
+                return None
+            if remaining == 1:
+                del self.armed[target]
+            else:
+                self.armed[target] = remaining - 1
+        return ProfileSession(target)
+
+    @contextmanager
+    def capture(self, target):
+        """Profile the with-block in the current thread if this target is armed"""
+        session = self.start(target)
+        if session is None:
+            yield None
+            return
+        try:
+            with session.thread():
+                yield session
+        finally:
+            self.finish(session)
+
+    def finish(self, session):
+        """Merge the per-thread profiles of a session and store them; returns the file name"""
+        if session is None or not session.profiles:
+            return None
+        stats = pstats.Stats(*session.profiles)
+        name = self.store.save(stats, session.target)
+        self.last_saved[session.target] = name
+        profile_log.info(f"📈 Saved {session.target} profile ({time.time() - session.started:.1f}s) as {name}")
+        return name
+
+    def get_status(self):
+        return {
+            "armed": dict(self.armed),
+            "targets": list(PROFILE_TARGETS),
+            "last_saved": dict(self.last_saved),
+            "retention": self.store.retention,
+            "profiles": self.store.list()
+        }
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Scrape Leases - MongoDB work queue shared by several scraper nodes
+Every unit of work (the users list, one detail target) is a document in
+scrape_leases. Nodes claim work atomically with find_one_and_update, keep
+their claims alive with heartbeats and release them when done. Leases of a
+crashed node expire and are picked up by the remaining nodes.
+
+Run directly to simulate several nodes with a fake fetcher against one mongod:
+    python scrape_leases.py --nodes 4 --targets 200 --latency 0.05
+"""
+
+import argparse
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from multiprocessing import Process
+
+from pymongo import MongoClient, ReturnDocument, UpdateOne
+from dotenv import load_dotenv
+
+from player_changes import username_key
+from scraper_logging import get_logger
+
+# Load environment variables
+load_dotenv()
+
+lease_log = get_logger("lease")
+
+# --- CONFIGURATIE ---
+LEASE_TTL = 120  # Seconden voordat een lease zonder heartbeat vervalt
+HEARTBEAT_INTERVAL = 30  # Seconden tussen heartbeats
+MAX_LEASE_HOLD = 600  # Nooit langer dan 10 minuten een lease vasthouden (hangende fetch)
+LIST_LEASE_ID = "list"
+PRIORITY_DETECTIVE = 0  # Expliciete detective targets
+PRIORITY_FAMILY = 1  # Leden van target families
+EPOCH = datetime(1970, 1, 1)
+
+
+def detail_lease_id(username):
+    """Lease of one detail target; case-insensitive, like every other username lookup"""
+    return f"detail:{username_key(username)}"
+
+
+class LeaseManager:
+    """Claims, heartbeats and completes scrape work stored in scrape_leases"""
+
+    def __init__(self, db, node_id=None, lease_ttl=LEASE_TTL, heartbeat_interval=HEARTBEAT_INTERVAL):
+        self.db = db
+        self.collection = db.scrape_leases
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_ttl = lease_ttl
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_thread = None
+
+        try:
+            self.collection.create_index([("kind", 1), ("priority", 1), ("next_due", 1)])
+            self.collection.create_index("owner")
+        except Exception as e:
+            if "already exists" not in str(e):
+                lease_log.warning(f"Index issue: {e}")
+
+        # The list duty always exists; it is claimed like any other work item
+        self.collection.update_one(
+            {"_id": LIST_LEASE_ID},
+            {"$setOnInsert": {"kind": "list", "priority": 0, "next_due": EPOCH,
+                              "owner": None, "lease_expires": EPOCH}},
+            upsert=True
+        )
+
+    # --- Heartbeats ---
+    def start_heartbeat(self):
+        if self.heartbeat_thread is None:
+            self.heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name="lease-heartbeat", daemon=True)
+            self.heartbeat_thread.start()
+
+    def heartbeat(self):
+        """Extend all leases held by this node (except ones held past MAX_LEASE_HOLD)"""
+        now = datetime.utcnow()
+        result = self.collection.update_many(
+            {"owner": self.node_id, "claimed_at": {"$gt": now - timedelta(seconds=MAX_LEASE_HOLD)}},
+            {"$set": {"lease_expires": now + timedelta(seconds=self.lease_ttl), "heartbeat_at": now}}
+        )
+        return result.modified_count
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                self.heartbeat()
+            except Exception as e:
+                lease_log.error(f"Heartbeat failed: {e}")
+
+    # --- Claiming ---
+    def claim(self, kind):
+        """Atomically claim the highest-priority due work item of this kind (None if nothing is due)"""
+        now = datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {"kind": kind, "next_due": {"$lte": now}, "lease_expires": {"$lt": now}},
+            {"$set": {
+                "owner": self.node_id,
+                "claimed_at": now,
+                "heartbeat_at": now,
+                "lease_expires": now + timedelta(seconds=self.lease_ttl)
+            }},
+            sort=[("priority", 1), ("next_due", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def complete(self, lease_id, next_due_in):
+        """Release a finished item and schedule it next_due_in seconds from now"""
+        now = datetime.utcnow()
+        result = self.collection.update_one(
+            {"_id": lease_id, "owner": self.node_id},
+            {"$set": {
+                "owner": None,
+                "lease_expires": EPOCH,
+                "next_due": now + timedelta(seconds=next_due_in),
+                "last_fetched": now,
+                "last_node": self.node_id
+            }, "$inc": {"fetches": 1}}
+        )
+        return result.modified_count > 0
+
+    def release(self, lease_id):
+        """Give up an item without completing it so another node can retry it"""
+        self.collection.update_one(
+            {"_id": lease_id, "owner": self.node_id},
+            {"$set": {"owner": None, "lease_expires": EPOCH}}
+        )
+
+    def claim_list(self):
+        return self.claim("list") is not None
+
+    def complete_list(self, list_interval):
+        return self.complete(LIST_LEASE_ID, list_interval)
+
+    def claim_detail(self):
+        lease = self.claim("detail")
+        return lease["username"] if lease else None
+
+    def iter_claimed_details(self):
+        """Yield usernames claimed one at a time until no detail work is due"""
+        while True:
+            username = self.claim_detail()
+            if username is None:
+                return
+            yield username
+
+    def complete_detail(self, username, next_due_in):
+        return self.complete(detail_lease_id(username), next_due_in)
+
+    def release_detail(self, username):
+        self.release(detail_lease_id(username))
+
+    # --- Schedule maintenance ---
+    def sync_detail_targets(self, classes, partial=False):
+        """Make the detail items match {priority: usernames} over all classes. A target that
+        moves to another class keeps its lease and schedule (priority is updated in place),
+        a username in several classes gets the most urgent one, new targets are due
+        immediately and only targets in no class at all are deleted.
+
+        partial=True: only the given classes are known to the caller, leases of the other
+        classes are left alone (a node without a fresh list syncing detective targets only)."""
+        targets = {}  # username_key -> (username, priority)
+        for priority, usernames in classes.items():
+            for username in usernames:
+                key = username_key(username)
+                name, current = targets.get(key, (username, priority))
+                targets[key] = (name, min(priority, current))
+        operations = [
+            UpdateOne(
+                {"_id": detail_lease_id(key)},
+                {"$set": {"kind": "detail", "username": username, "username_key": key, "priority": priority},
+                 "$setOnInsert": {"next_due": EPOCH, "owner": None, "lease_expires": EPOCH}},
+                upsert=True
+            )
+            for key, (username, priority) in targets.items()
+        ]
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+        # Also removes leases written before username_key (their _id used the typed casing)
+        stale = {"kind": "detail", "username_key": {"$nin": list(targets)}}
+        if partial:
+            stale["priority"] = {"$in": list(classes)}
+        self.collection.delete_many(stale)
+
+    def mark_changed(self, usernames):
+        """Pull changed players forward so the next free node fetches them (list-cased names
+        match targets typed in any casing: lease ids are username_key based)"""
+        if not usernames:
+            return 0
+        now = datetime.utcnow()
+        result = self.collection.update_many(
+            {"_id": {"$in": [detail_lease_id(username) for username in usernames]}, "next_due": {"$gt": now}},
+            {"$set": {"next_due": now}}
+        )
+        return result.modified_count
+
+    def get_stats(self):
+        """Work item counts per kind plus leases held per node"""
+        now = datetime.utcnow()
+        return {
+            "node_id": self.node_id,
+            "due": self.collection.count_documents({"next_due": {"$lte": now}, "lease_expires": {"$lt": now}}),
+            "leased": self.collection.count_documents({"lease_expires": {"$gte": now}}),
+            "total": self.collection.count_documents({}),
+            "leases_by_node": {
+                doc["_id"]: doc["count"] for doc in self.collection.aggregate([
+                    {"$match": {"lease_expires": {"$gte": now}}},
+                    {"$group": {"_id": "$owner", "count": {"$sum": 1}}}
+                ])
+            }
+        }
+
+
+# --- SIMULATIE ---
+def simulate_node(mongo_url, db_name, node_index, latency, lease_ttl, crash_after):
+    """One fake scraper node: claim, 'fetch' (sleep), log, complete"""
+    db = MongoClient(mongo_url)[db_name]
+    leases = LeaseManager(db, node_id=f"sim-{node_index}", lease_ttl=lease_ttl,
+                          heartbeat_interval=max(1, lease_ttl // 3))
+    leases.start_heartbeat()
+    fetched = 0
+    while True:
+        username = leases.claim_detail()
+        if username is None:
+            # Leases of a crashed node may still expire; wait once before giving up
+            time.sleep(lease_ttl + 1)
+            username = leases.claim_detail()
+            if username is None:
+                break
+        if crash_after and fetched >= crash_after:
+            os._exit(1)  # Simulated crash: the claimed lease is never completed
+        time.sleep(latency)
+        db.scrape_lease_sim_log.insert_one({"node": leases.node_id, "username": username, "at": datetime.utcnow()})
+        leases.complete_detail(username, 24 * 3600)
+        fetched += 1
+
+
+def run_simulation(nodes, targets, latency, lease_ttl, crash_node):
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    db_name = os.environ.get('LEASE_SIM_DB_NAME', 'omerta_lease_sim')
+    client = MongoClient(mongo_url)
+    client.drop_database(db_name)
+    db = client[db_name]
+
+    seeder = LeaseManager(db, node_id="seeder", lease_ttl=lease_ttl)
+    seeder.sync_detail_targets({PRIORITY_DETECTIVE: [f"SimPlayer{i}" for i in range(targets)]})
+    print(f"[SIM] {targets} targets, {nodes} nodes, {latency}s fake fetch latency")
+
+    start = time.time()
+    processes = [
+        Process(target=simulate_node, args=(mongo_url, db_name, i, latency, lease_ttl,
+                                            5 if crash_node and i == 0 else 0))
+        for i in range(nodes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.time() - start
+
+    log = db.scrape_lease_sim_log
+    fetched = log.count_documents({})
+    unique = len(log.distinct("username"))
+    per_node = {doc["_id"]: doc["count"] for doc in log.aggregate([{"$group": {"_id": "$node", "count": {"$sum": 1}}}])}
+    print(f"[SIM] Fetched {fetched} ({unique} unique) in {elapsed:.2f}s = {fetched / elapsed:.1f} fetches/s")
+    print(f"[SIM] Duplicates: {fetched - unique}, missing: {targets - unique}")
+    print(f"[SIM] Per node: {per_node}")
+    client.drop_database(db_name)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulate several scraper nodes sharing Mongo work leases")
+    parser.add_argument("--nodes", type=int, default=4)
+    parser.add_argument("--targets", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake fetch time in seconds")
+    parser.add_argument("--lease-ttl", type=int, default=3)
+    parser.add_argument("--crash-node", action="store_true", help="node 0 dies holding a lease; it must be reclaimed")
+    args = parser.parse_args()
+    run_simulation(args.nodes, args.targets, args.latency, args.lease_ttl, args.crash_node)
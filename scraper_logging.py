@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Scraper Logging - non-blocking structured logging for the scraper threads
+Worker threads only put records on a queue; one background listener thread
+formats them and does the (slow, on a Windows console) writes. Records carry
+structured fields (worker, target, stage, duration) and every category
+(scraper.list, scraper.detail, scraper.cache, ...) has its own level and
+rate limit, so per-player and Cloudflare-wait chatter can be turned down
+without touching the code.
+
+Environment:
+    SCRAPER_LOG_LEVEL=INFO                      default level for all categories
+    SCRAPER_LOG_LEVELS=cache=WARNING,detail=DEBUG
+    SCRAPER_LOG_RATES=cache=5,detail=20         max records per second per category
+    SCRAPER_LOG_FORMAT=text|json
+    SCRAPER_LOG_FILE=scraper.log                also write to a rotating file
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+from queue import SimpleQueue
+
+STRUCTURED_FIELDS = ("worker", "target", "stage", "duration")
+LOGGER_PREFIX = "scraper"
+# Records per second per category; chatty per-player categories are limited by default
+DEFAULT_RATES = {"cache": 20, "cloudflare": 2}
+
+
+def parse_mapping(value, convert):
+    """'cache=WARNING,detail=DEBUG' -> {'cache': convert('WARNING'), ...}"""
+    mapping = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            key, raw = item.split("=", 1)
+            try:
+                mapping[key.strip()] = convert(raw.strip())
+            except ValueError:
+                pass
+    return mapping
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Logger that accepts worker/target/stage/duration as keyword arguments"""
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in STRUCTURED_FIELDS if key in kwargs}
+        kwargs["extra"] = {**kwargs.get("extra", {}), "fields": fields}
+        return msg, kwargs
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per category; errors always pass. Suppressed counts are
+    attached to the next record of that category that gets through."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self.buckets = {}  # category -> [tokens, last refill]
+        self.suppressed = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        category = record.name.rsplit(".", 1)[-1]
+        rate = self.rates.get(category)
+        if not rate or record.levelno >= logging.ERROR:
+            return True
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.get(category, (rate, now))
+            tokens = min(rate, tokens + (now - last) * rate)
+            if tokens < 1:
+                self.buckets[category] = (tokens, now)
+                self.suppressed[category] = self.suppressed.get(category, 0) + 1
+                return False
+            self.buckets[category] = (tokens - 1, now)
+            suppressed = self.suppressed.pop(category, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class NonFormattingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread (same process, no pickling)"""
+
+    def prepare(self, record):
+        return record
+
+
+class StructuredFormatter(logging.Formatter):
+    def __init__(self, as_json=False):
+        super().__init__()
+        self.as_json = as_json
+
+    def format(self, record):
+        fields = dict(getattr(record, "fields", None) or {})
+        message = record.getMessage()
+        suppressed = getattr(record, "suppressed", 0)
+        if self.as_json:
+            entry = {
+                "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+                "level": record.levelname,
+                "category": record.name,
+                "message": message,
+                **fields
+            }
+            if suppressed:
+                entry["suppressed"] = suppressed
+            if record.exc_info:
+                entry["exception"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str, ensure_ascii=False)
+
+        worker = fields.pop("worker", None) or record.name.rsplit(".", 1)[-1].upper()
+        parts = [f"[{worker}] {message}"]
+        duration = fields.pop("duration", None)
+        extras = [f"{key}={value}" for key, value in fields.items() if value is not None]
+        if duration is not None:
+            extras.append(f"{duration * 1000:.0f}ms")
+        if suppressed:
+            extras.append(f"+{suppressed} suppressed")
+        if extras:
+            parts.append(f"({', '.join(extras)})")
+        text = " ".join(parts)
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging():
+    """Install the queue handler on the 'scraper' logger once; returns the listener"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        as_json = os.environ.get('SCRAPER_LOG_FORMAT', 'text') == 'json'
+        formatter = StructuredFormatter(as_json)
+        handlers = []
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(formatter)
+        handlers.append(console)
+        log_file = os.environ.get('SCRAPER_LOG_FILE')
+        if log_file:
+            file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=10 * 1024 * 1024,
+                                                                backupCount=5, encoding='utf-8')
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+
+        log_queue = SimpleQueue()
+        queue_handler = NonFormattingQueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter({
+            **DEFAULT_RATES,
+            **parse_mapping(os.environ.get('SCRAPER_LOG_RATES'), float)
+        }))
+
+        root = logging.getLogger(LOGGER_PREFIX)
+        root.setLevel(os.environ.get('SCRAPER_LOG_LEVEL', 'INFO').upper())
+        root.addHandler(queue_handler)
+        root.propagate = False
+        for category, level in parse_mapping(os.environ.get('SCRAPER_LOG_LEVELS'), str.upper).items():
+            logging.getLogger(f"{LOGGER_PREFIX}.{category}").setLevel(level)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)  # Flush what is still queued on exit
+        return _listener
+
+
+def get_logger(category):
+    """Structured logger for one category (scraper.<category>)"""
+    setup_logging()
+    return StructuredLogger(logging.getLogger(f"{LOGGER_PREFIX}.{category}"), {})
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Scraper Metrics - the scraper's metric registry and descriptions
+One MetricsRegistry (metrics_registry.py) shared by the workers, fetchers
+and data manager. Observations are a perf_counter delta plus a dict update
+under one lock; render() produces the Prometheus text exposition format
+served at /api/scraping/metrics.
+"""
+
+from metrics_registry import MetricsRegistry
+
+metrics = MetricsRegistry()
+metrics.describe("scraper_stage_duration_seconds", "histogram",
+                 "Duration of one scraper pipeline stage (navigate, cloudflare_wait, extract, parse, merge, mongo_*)")
+metrics.describe("scraper_cloudflare_challenges_total", "counter", "Cloudflare interstitials seen, by outcome")
+metrics.describe("scraper_fetch_failures_total", "counter", "Fetches that returned no body")
+metrics.describe("scraper_cache_results_total", "counter", "cache_player_data outcomes (updated, unchanged, error)")
+metrics.describe("scraper_tab_busy_seconds_total", "counter", "Seconds a detail tab spent fetching and processing")
+metrics.describe("scraper_tab_utilization", "gauge", "Busy fraction of each detail tab during the last batch")
+metrics.describe("scraper_target_staleness_seconds", "gauge", "Seconds since the last successful detail fetch per target")
+metrics.describe("scraper_targets_never_fetched", "gauge", "Targets without a detail fetch since startup/checkpoint")
+metrics.describe("scraper_process_rss_bytes", "gauge", "Resident memory of the scraper process")
+metrics.describe("scraper_chrome_rss_bytes", "gauge", "Summed resident memory of child Chrome/chromedriver processes")
+metrics.describe("scraper_memory_actions_total", "counter", "Memory guardrail actions (recycle_drivers, trim_caches)")
+metrics.describe("scraper_players_snapshot_total", "counter", "/api/scraping/players snapshot hits and rebuilds")
+metrics.describe("scraper_cold_writes_total", "counter", "player_details (profile fields) writes; list cycles only write player_cache")
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Seed Data - bulk seeding of production-sized datasets for load testing
+Builds a seeded SyntheticWorld, replays `--days` of population changes into
+stat history (raw points + hourly/daily rollups) and intelligence
+notifications using the scraper's own change detection, keeps what the
+production retention would keep (raw points and notifications inside their
+TTL, rollups for the older days), and writes
+player_cache, detective_targets and all history through one batched
+insert_many path. Same --seed and sizes always give the same dataset.
+
+    python seed_data.py --db omerta_loadtest --players 100000 --targets 500 --days 90
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+from db_indexes import ensure_indexes, init_history_collections
+from player_changes import (detect_player_changes, changed_history_fields, history_snapshot, promoted_fields,
+                             username_key)
+from synthetic_data import SyntheticWorld
+
+# Load environment variables
+load_dotenv()
+
+# --- CONFIGURATIE ---
+BATCH_SIZE = 5000  # Documenten per insert_many
+TICKS_PER_DAY = 4  # Populatie-wijzigingen per gesimuleerde dag
+HISTORY_RAW_RETENTION_DAYS = int(os.environ.get('HISTORY_RAW_RETENTION_DAYS', 7))  # Zelfde TTL als de scraper
+HISTORY_HOURLY_RETENTION_DAYS = int(os.environ.get('HISTORY_HOURLY_RETENTION_DAYS', 90))
+HISTORY_DAILY_RETENTION_DAYS = int(os.environ.get('HISTORY_DAILY_RETENTION_DAYS', 730))
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 30))  # Zelfde TTL als de scraper; 0 = nooit
+SEEDED_COLLECTIONS = ["player_cache", "player_details", "detective_targets", "intelligence_notifications",
+                      "player_stat_history", "player_stat_rollups"]
+PRODUCTION_DB_NAME = "omerta_intelligence"
+
+
+def bulk_insert(collection, docs, batch_size=BATCH_SIZE):
+    """Write an iterable of documents with unordered insert_many batches; returns the count"""
+    written = 0
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            collection.insert_many(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        written += len(batch)
+    return written
+
+
+def snapshot_copy(detail):
+    """Copy of a detail dict that later ticks can't mutate (bullets_shot is nested)"""
+    copy = dict(detail)
+    copy["bullets_shot"] = dict(detail["bullets_shot"])
+    return copy
+
+
+def player_document(player, detail, last_updated):
+    """player_cache document in the shape cache_player_data writes"""
+    data = {
+        **detail,
+        "id": player["id"],
+        "user_id": player["id"],
+        "uname": player["name"],
+        "username": player["name"],
+        "position": player["position"],
+        "f_id": player["f_id"],
+        "f_isCapo": player["f_isCapo"],
+        "version": player["version"]
+    }
+    return {
+        "username": player["name"],
+        "username_key": username_key(player["name"]),
+        "user_id": player["id"],
+        "data": json.dumps(data, default=str),
+        "cold_hash": None,  # Synthetic details have no profile fields, so no player_details document
+        "last_updated": last_updated,
+        "priority": 1,
+        **promoted_fields(data)
+    }
+
+
+def notification_document(player_id, username, notification_type, message, data, timestamp):
+    """intelligence_notifications document in the shape build_notification writes"""
+    return {
+        "player_id": player_id,
+        "username": username,
+        "username_key": username_key(username),
+        "notification_type": notification_type,
+        "message": message,
+        "data": json.dumps(data) if data else None,
+        "timestamp": timestamp,
+        "is_read": False
+    }
+
+
+def build_rollups(points):
+    """Fold raw history points into hourly/daily rollup documents (same shape as flush_history)"""
+    rollups = {}
+    for point in points:
+        ts = point["timestamp"]
+        buckets = (
+            ("hour", ts.replace(minute=0, second=0, microsecond=0), HISTORY_HOURLY_RETENTION_DAYS),
+            ("day", ts.replace(hour=0, minute=0, second=0, microsecond=0), HISTORY_DAILY_RETENTION_DAYS)
+        )
+        for resolution, bucket, retention_days in buckets:
+            key = (point["username_key"], resolution, bucket)
+            rollup = rollups.setdefault(key, {
+                "username": point["username"], "username_key": point["username_key"],
+                "resolution": resolution, "bucket": bucket,
+                "last": {}, "min": {}, "max": {}, "samples": 0,
+                "expires_at": bucket + timedelta(days=retention_days)
+            })
+            rollup["samples"] += 1
+            for field, value in point.items():
+                if field in ("username", "username_key", "timestamp"):
+                    continue
+                rollup["last"][field] = value
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    rollup["min"][field] = min(rollup["min"].get(field, value), value)
+                    rollup["max"][field] = max(rollup["max"].get(field, value), value)
+    return rollups.values()
+
+
+def within_retention(docs, field, retention_days, now):
+    """Only the documents the production TTL indexes would keep (retention_days 0 = all)"""
+    if retention_days <= 0:
+        return list(docs)
+    cutoff = now - timedelta(days=retention_days)
+    return [doc for doc in docs if doc[field] >= cutoff]
+
+
+def simulate_history(world, days, churn, history_for):
+    """Replay `days` of ticks; returns (history points, notification documents)"""
+    start = datetime.utcnow() - timedelta(days=days)
+    previous = {username: snapshot_copy(world.details[username]) for username in history_for}
+    points = [{"username": username, "username_key": username_key(username), "timestamp": start,
+               **history_snapshot(previous[username])}
+              for username in history_for]
+    notifications = []
+    player_ids = {player["name"]: player["id"] for player in world.players}
+
+    for tick in range(days * TICKS_PER_DAY):
+        tick_start = start + timedelta(days=tick / TICKS_PER_DAY)
+        for username in world.tick(churn):
+            if username not in previous:
+                continue
+            timestamp = tick_start + timedelta(seconds=world.rng.uniform(0, 86400 / TICKS_PER_DAY))
+            old, new = previous[username], world.details[username]
+            for notification_type, message, data in detect_player_changes(username, old, new):
+                notifications.append(notification_document(
+                    player_ids[username], username, notification_type, message, data, timestamp
+                ))
+            fields = changed_history_fields(old, new)
+            if fields:
+                points.append({"username": username, "username_key": username_key(username),
+                               "timestamp": timestamp, **fields})
+            previous[username] = snapshot_copy(new)
+
+    points.sort(key=lambda point: point["timestamp"])
+    return points, notifications
+
+
+def seed(db, players, seed_value, targets, days, churn, history_players, batch_size):
+    started = time.time()
+    # Same schema as production: time-series history (recreated, older seeds made a plain
+    # collection) and the declared indexes, built before the inserts
+    db.drop_collection("player_stat_history")
+    for name in SEEDED_COLLECTIONS:
+        db[name].delete_many({})
+    init_history_collections(db, HISTORY_RAW_RETENTION_DAYS)
+    result = ensure_indexes(db)
+    print(f"[SEED] Indexes: {len(result['created'])} created, {len(result['conflicts'])} conflicts")
+
+    world = SyntheticWorld(players, seed=seed_value)
+    usernames = world.usernames()
+    target_usernames = world.rng.sample(usernames, min(targets, len(usernames)))
+    # History is kept for detective targets first, then the top of the list
+    history_for = list(dict.fromkeys(target_usernames + usernames[:history_players]))
+
+    points, notifications = simulate_history(world, days, churn, history_for)
+    print(f"[SEED] Simulated {days} days: {len(points)} history points, {len(notifications)} notifications "
+          f"({time.time() - started:.1f}s)")
+
+    # Raw points and notifications past their TTL would be purged as soon as the service
+    # runs; older days only survive as rollups, which are built from every simulated point
+    now = datetime.utcnow()
+    rollups = [rollup for rollup in build_rollups(points) if rollup["expires_at"] > now]
+    notifications = within_retention(notifications, "timestamp", NOTIFICATION_RETENTION_DAYS, now)
+    points = within_retention(points, "timestamp", HISTORY_RAW_RETENTION_DAYS, now)
+    print(f"[SEED] Within retention: {len(points)} raw points ({HISTORY_RAW_RETENTION_DAYS}d), "
+          f"{len(notifications)} notifications ({NOTIFICATION_RETENTION_DAYS}d), {len(rollups)} rollups")
+
+    counts = {
+        "player_cache": bulk_insert(db.player_cache, (
+            player_document(player, world.details[player["name"]],
+                            now - timedelta(minutes=world.rng.randint(0, 24 * 60)))
+            for player in world.players
+        ), batch_size),
+        "detective_targets": bulk_insert(db.detective_targets, (
+            {
+                "username": username,
+                "username_key": username_key(username),
+                "player_id": f"player_{username.lower()}",
+                "added_timestamp": now - timedelta(days=world.rng.randint(0, days)),
+                "is_active": True
+            }
+            for username in target_usernames
+        ), batch_size),
+        "intelligence_notifications": bulk_insert(db.intelligence_notifications, notifications, batch_size),
+        "player_stat_history": bulk_insert(db.player_stat_history, points, batch_size),
+        "player_stat_rollups": bulk_insert(db.player_stat_rollups, rollups, batch_size)
+    }
+
+    for name, count in counts.items():
+        print(f"[SEED] {name}: {count}")
+    print(f"[SEED] ✅ Done in {time.time() - started:.1f}s")
+    return counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Bulk-seed a MongoDB database with a synthetic Omerta population")
+    parser.add_argument("--db", default=os.environ.get('DB_NAME', PRODUCTION_DB_NAME))
+    parser.add_argument("--players", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--targets", type=int, default=200, help="detective targets")
+    parser.add_argument("--days", type=int, default=90, help="days of simulated history (older raw points/notifications only as rollups)")
+    parser.add_argument("--churn", type=float, default=0.01, help="fraction of players changed per tick")
+    parser.add_argument("--history-players", type=int, default=5000,
+                        help="players (besides targets) that get stat history and notifications")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--force", action="store_true", help=f"allow seeding {PRODUCTION_DB_NAME}")
+    args = parser.parse_args()
+
+    if args.db == PRODUCTION_DB_NAME and not args.force:
+        parser.error(f"refusing to overwrite {PRODUCTION_DB_NAME}; use --db <name> or --force")
+
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    print(f"[SEED] {args.players} players, {args.targets} targets, {args.days} days into {args.db} ({mongo_url})")
+    seed(MongoClient(mongo_url)[args.db], args.players, args.seed, args.targets, args.days,
+         args.churn, args.history_players, args.batch_size)
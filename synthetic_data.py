@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Synthetic Data - deterministic fake Barafranca population
+Generates players in the shape of the users API (list level) and user API
+(detail level) from a seed, and evolves them between ticks (kills, shots,
+plating drops, promotions, family changes, deaths). Used by the offline
+pipeline benchmark; same seed and size always give the same population.
+"""
+
+import json
+import random
+import time
+
+RANKS = [
+    "Empty-suit", "Delivery Boy", "Picciotto", "Shoplifter", "Pickpocket", "Thief",
+    "Associate", "Mobster", "Soldier", "Swindler", "Assassin", "Local Chief",
+    "Chief", "Bruglione", "Capodecina", "Godfather"
+]
+PLATINGS = ["None", "Low", "Medium", "High", "Very High"]
+FAMILY_PREFIXES = ["Corleone", "Barzini", "Tattaglia", "Cuneo", "Stracci", "Falcone",
+                   "Moretti", "Rizzo", "Lucchese", "Gambino", "Bonanno", "Genovese"]
+STATUS_ALIVE = 1
+STATUS_DEAD = 3
+
+
+class SyntheticWorld:
+    """A seeded population that can be served as API payloads and evolved tick by tick"""
+
+    def __init__(self, size, seed=0, families=None):
+        self.rng = random.Random(seed)
+        self.families = self._make_families(families or max(1, size // 50))
+        self.players = []  # users API entries (list level)
+        self.details = {}  # username -> user API data (detail level)
+        self.ticks = 0
+        for index in range(size):
+            self._add_player(index)
+
+    def _make_families(self, count):
+        families = []
+        for index in range(count):
+            prefix = FAMILY_PREFIXES[index % len(FAMILY_PREFIXES)]
+            families.append({"f_id": 100 + index, "f_name": f"{prefix}{index // len(FAMILY_PREFIXES) or ''}"})
+        return families
+
+    def _add_player(self, index):
+        rng = self.rng
+        username = f"Player{index:06d}"
+        family = rng.choice(self.families) if rng.random() < 0.6 else None
+        rank_index = min(len(RANKS) - 1, int(rng.expovariate(0.35)))
+        player = {
+            "id": str(100000 + index),
+            "name": username,
+            "rank_name": RANKS[rank_index],
+            "plating": rng.choice(PLATINGS),
+            "position": index + 1,
+            "status": STATUS_ALIVE,
+            "f_name": family["f_name"] if family else None,
+            "f_id": family["f_id"] if family else None,
+            "f_isCapo": bool(family) and rng.random() < 0.05,
+            "version": 1
+        }
+        kills = int(rng.expovariate(0.05)) * (rank_index + 1) // 4
+        self.players.append(player)
+        self.details[username] = {
+            "id": player["id"],
+            "uname": username,
+            "rank_name": player["rank_name"],
+            "plating": player["plating"],
+            "position": player["position"],
+            "status": player["status"],
+            "f_name": player["f_name"],
+            "wealth": rng.randint(0, 7),
+            "kills": kills,
+            "bullets_shot": {"total": kills * rng.randint(2, 6)},
+            "honorpoints": rng.randint(0, 5000),
+            "startjail": rng.randint(0, 500),
+            "totalrp": rng.randint(0, 20000)
+        }
+        return player
+
+    def usernames(self):
+        return [player["name"] for player in self.players]
+
+    # --- Evolution ---
+    def tick(self, fraction=0.01):
+        """Change a fraction of the living players; returns the changed usernames"""
+        rng = self.rng
+        alive = [player for player in self.players if player["status"] != STATUS_DEAD]
+        changed = rng.sample(alive, min(len(alive), max(1, int(len(alive) * fraction)))) if alive else []
+        for player in changed:
+            detail = self.details[player["name"]]
+            roll = rng.random()
+            if roll < 0.45:
+                gained = rng.randint(1, 3)
+                detail["kills"] += gained
+                detail["bullets_shot"]["total"] += gained * rng.randint(2, 6)
+            elif roll < 0.65:
+                detail["bullets_shot"]["total"] += rng.randint(1, 20)
+            elif roll < 0.80:
+                level = PLATINGS.index(player["plating"]) if player["plating"] in PLATINGS else 0
+                player["plating"] = PLATINGS[max(0, level - rng.randint(1, 2))]
+            elif roll < 0.90:
+                rank_index = RANKS.index(player["rank_name"])
+                player["rank_name"] = RANKS[min(len(RANKS) - 1, rank_index + 1)]
+            elif roll < 0.97:
+                family = rng.choice(self.families + [None])
+                player["f_name"] = family["f_name"] if family else None
+                player["f_id"] = family["f_id"] if family else None
+                player["f_isCapo"] = False
+            else:
+                player["status"] = STATUS_DEAD
+            player["version"] += 1
+            for key in ("rank_name", "plating", "status", "f_name"):
+                detail[key] = player[key]
+        self.ticks += 1
+        return [player["name"] for player in changed]
+
+    # --- Payloads ---
+    def users_payload(self):
+        """Body of the users API (wrapper format)"""
+        now = int(time.time())
+        return json.dumps({"cached": True, "time": now, "expires": now + 60, "data": self.players})
+
+    def user_payload(self, username):
+        """Body of the user API for one player, or None for unknown usernames"""
+        detail = self.details.get(username)
+        if detail is None:
+            return None
+        return json.dumps({"data": detail})
+
+    def responses(self, list_url, detail_url_template):
+        """{url: body} map for ReplayFetcher covering the list and every detail page"""
+        responses = {list_url: self.users_payload()}
+        for username in self.details:
+            responses[detail_url_template.format(username)] = self.user_payload(username)
+        return responses
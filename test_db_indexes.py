@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for db_indexes.py: case-duplicate usernames must not block the unique
+username_key indexes. The MongoDB test needs a server at MONGO_URL and is
+skipped without one (mongo_client in conftest.py).
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+pymongo = pytest.importorskip("pymongo")
+
+from db_indexes import backfill_username_keys, dedupe_username_keys, duplicate_ids, ensure_indexes
+
+TEST_DB_NAME = "omerta_test_db_indexes"
+
+
+@pytest.fixture
+def db(mongo_client):
+    mongo_client.drop_database(TEST_DB_NAME)
+    yield mongo_client[TEST_DB_NAME]
+    mongo_client.drop_database(TEST_DB_NAME)
+
+
+def test_duplicate_ids_keeps_most_recently_updated():
+    now = datetime.utcnow()
+    docs = [{"_id": 1, "last_updated": now - timedelta(hours=1)}, {"_id": 2, "last_updated": now}, {"_id": 3}]
+    assert sorted(duplicate_ids(docs, ("last_updated",))) == [1, 3]
+
+
+def test_duplicate_ids_prefers_active_detective_target():
+    now = datetime.utcnow()
+    docs = [{"_id": 1, "is_active": False, "added_timestamp": now},
+            {"_id": 2, "is_active": True, "added_timestamp": now - timedelta(days=3)}]
+    assert duplicate_ids(docs, ("is_active", "added_timestamp")) == [1]
+
+
+def test_unique_username_key_index_builds_over_case_variants(db):
+    now = datetime.utcnow()
+    db.player_cache.insert_many([
+        {"username": "Teg", "data": "{}", "last_updated": now - timedelta(hours=1)},
+        {"username": "teg", "data": "{}", "last_updated": now}
+    ])
+    db.detective_targets.insert_many([
+        {"username": "Teg", "is_active": True, "added_timestamp": now - timedelta(days=1)},
+        {"username": "TEG", "is_active": False, "added_timestamp": now}
+    ])
+
+    backfill_username_keys(db)
+    assert dedupe_username_keys(db, log=lambda message: None) == 2
+    result = ensure_indexes(db, log=lambda message: None, collections=["player_cache", "detective_targets"])
+
+    assert result["conflicts"] == []
+    assert [doc["username"] for doc in db.player_cache.find()] == ["teg"]
+    assert [doc["username"] for doc in db.detective_targets.find()] == ["Teg"]
+    for collection in (db.player_cache, db.detective_targets):
+        assert "username_key_1" in collection.index_information()
+    # The index is in place now: a new case variant is rejected
+    with pytest.raises(pymongo.errors.DuplicateKeyError):
+        db.player_cache.insert_one({"username": "TEG", "username_key": "teg"})
+
+
+def test_rollup_case_variants_merge_into_one_series(db):
+    bucket = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    db.player_stat_rollups.insert_many([
+        {"username": "Teg", "resolution": "hour", "bucket": bucket, "samples": 1},
+        {"username": "teg", "resolution": "hour", "bucket": bucket, "samples": 3},
+        {"username": "teg", "resolution": "hour", "bucket": bucket - timedelta(hours=1), "samples": 2}
+    ])
+
+    backfill_username_keys(db)
+    assert dedupe_username_keys(db, log=lambda message: None) == 1
+    result = ensure_indexes(db, log=lambda message: None, collections=["player_stat_rollups"])
+
+    assert result["conflicts"] == []
+    assert sorted(doc["samples"] for doc in db.player_stat_rollups.find({"username_key": "teg"})) == [2, 3]
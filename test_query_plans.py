@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Query plan regression tests: seeds a throwaway database (seed_data.py),
+creates the declared index set (db_indexes.py) and runs explain() on every
+hot query of the scraper and the backend. A query fails when its winning
+plan contains a COLLSCAN or an in-memory SORT stage. The MongoDB tests need
+a server at MONGO_URL and are skipped without one (mongo_client in
+conftest.py).
+
+    python -m pytest test_query_plans.py
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pymongo")
+
+from bson import ObjectId
+
+from db_indexes import ensure_indexes, backfill_username_keys
+from player_changes import username_key
+from seed_data import seed
+
+QUERY_PLAN_DB_NAME = os.environ.get('QUERY_PLAN_DB_NAME', 'omerta_query_plans')
+QUERY_PLAN_PLAYERS = int(os.environ.get('QUERY_PLAN_PLAYERS', 5000))
+BAD_STAGES = {"COLLSCAN", "SORT"}  # SORT = blocking in-memory sort; index order shows up as IXSCAN
+
+
+def hot_queries(db):
+    """(name, collection, filter, sort, limit) for every hot query, with sample values from the data"""
+    player = db.player_cache.find_one({"f_name": {"$nin": [None, ""]}}) or db.player_cache.find_one() or {}
+    username = player.get("username", "nobody")
+    keys = [doc.get("username_key") for doc in db.player_cache.find({}, {"username_key": 1}).limit(2000)]
+    now = datetime.utcnow()
+    notification = db.intelligence_notifications.find_one({}, sort=[("timestamp", -1)]) or {}
+    page_ts, page_id = notification.get("timestamp", now), notification.get("_id", ObjectId())
+    keyset = {"timestamp": {"$lte": page_ts},
+              "$or": [{"timestamp": {"$lt": page_ts}}, {"timestamp": page_ts, "_id": {"$lt": page_id}}]}
+    newest_first = [("timestamp", -1), ("_id", -1)]
+    return [
+        ("players snapshot", "player_cache", {}, [("last_updated", -1)], 2000),
+        ("player by username", "player_cache", {"username_key": username_key(username)}, None, 1),
+        ("player by user_id", "player_cache", {"user_id": player.get("user_id", "0")}, None, 1),
+        ("family members", "player_cache", {"f_name": player.get("f_name", "none")}, [("position", 1)], 0),
+        ("player details join", "player_details", {"username_key": {"$in": keys}}, None, 0),
+        ("active detective targets", "detective_targets", {"is_active": True}, None, 0),
+        ("detective target upsert", "detective_targets", {"username_key": username_key(username)}, None, 1),
+        ("latest notifications", "intelligence_notifications", {}, newest_first, 51),
+        ("older notifications page", "intelligence_notifications", keyset, newest_first, 51),
+        ("notifications by username", "intelligence_notifications",
+         {"username_key": notification.get("username_key", "nobody")}, newest_first, 51),
+        ("notifications by type", "intelligence_notifications",
+         {"notification_type": notification.get("notification_type", "death")}, newest_first, 51),
+        ("scraping settings", "scraping_settings", {"type": "intervals"}, None, 1),
+        ("family targets", "app_settings", {"setting_type": "family_targets"}, None, 1),
+        ("user preferences", "user_preferences", {"user_id": "default"}, None, 1),
+        ("raw history", "player_stat_history",
+         {"username_key": username_key(username), "timestamp": {"$gte": now - timedelta(days=7), "$lte": now}},
+         [("timestamp", 1)], 0),
+        ("hourly rollups", "player_stat_rollups",
+         {"username_key": username_key(username), "resolution": "hour",
+          "bucket": {"$gte": now - timedelta(days=30), "$lte": now}},
+         [("bucket", 1)], 0),
+    ]
+
+
+def plan_stages(plan):
+    """Every stage name in a (possibly nested, classic or SBE, time-series) plan"""
+    stages = []
+    if isinstance(plan, dict):
+        if isinstance(plan.get("stage"), str):
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(plan_stages(value))
+    return stages
+
+
+def winning_plan(explain):
+    if "queryPlanner" in explain:
+        return explain["queryPlanner"]["winningPlan"]
+    # Time-series and other aggregation-backed finds: the plan sits in the first $cursor stage
+    for stage in explain.get("stages", []):
+        if "$cursor" in stage:
+            return stage["$cursor"]["queryPlanner"]["winningPlan"]
+    return explain
+
+
+def explain_query(db, collection, query_filter, sort, limit):
+    command = {"find": collection, "filter": query_filter}
+    if sort:
+        command["sort"] = dict(sort)
+    if limit:
+        command["limit"] = limit
+    return db.command("explain", command, verbosity="queryPlanner")
+
+
+@pytest.fixture(scope="module")
+def seeded_db(mongo_client):
+    mongo_client.drop_database(QUERY_PLAN_DB_NAME)
+    db = mongo_client[QUERY_PLAN_DB_NAME]
+    seed(db, QUERY_PLAN_PLAYERS, 0, targets=200, days=7, churn=0.01, history_players=500, batch_size=5000)
+    db.scraping_settings.update_one({"type": "intervals"}, {"$set": {"list_interval": 30}}, upsert=True)
+    db.app_settings.update_one({"setting_type": "family_targets"}, {"$set": {"families": []}}, upsert=True)
+    yield db
+    mongo_client.drop_database(QUERY_PLAN_DB_NAME)
+
+
+@pytest.fixture(scope="module")
+def index_result(seeded_db):
+    backfill_username_keys(seeded_db)  # Same as scraper startup, so username_key lookups can use their index
+    return ensure_indexes(seeded_db, log=lambda message: None)
+
+
+def test_plan_stages_walks_nested_plans():
+    plan = {"stage": "FETCH", "inputStage": {"stage": "OR", "inputStages": [
+        {"stage": "IXSCAN"}, {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}]}}
+    assert plan_stages(plan) == ["FETCH", "OR", "IXSCAN", "SORT", "COLLSCAN"]
+
+
+def test_winning_plan_of_time_series_explain():
+    explain = {"stages": [{"$cursor": {"queryPlanner": {"winningPlan": {"stage": "IXSCAN"}}}}, {"$_internalUnpackBucket": {}}]}
+    assert winning_plan(explain) == {"stage": "IXSCAN"}
+
+
+def test_declared_indexes_build_without_conflicts(index_result):
+    assert index_result["conflicts"] == []
+
+
+def test_hot_queries_use_an_index(seeded_db, index_result):
+    failures = {}
+    for name, collection, query_filter, sort, limit in hot_queries(seeded_db):
+        stages = plan_stages(winning_plan(explain_query(seeded_db, collection, query_filter, sort, limit)))
+        if BAD_STAGES.intersection(stages):
+            failures[name] = " > ".join(stages)
+    assert failures == {}, f"queries without a usable index: {failures}"